@@ -0,0 +1,502 @@
+from fastapi import APIRouter, HTTPException, status, Request, Header, Cookie, UploadFile, File, Form
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+import asyncio
+import uuid
+import csv
+import io
+import os
+import zipfile
+import logging
+
+from auth_utils import get_current_teacher_id
+
+router = APIRouter(prefix="/api/batch", tags=["batch"])
+logger = logging.getLogger(__name__)
+
+# Worker count per pipeline stage (OCR -> RAG -> LLM)
+BATCH_OCR_WORKERS = int(os.environ.get('BATCH_OCR_WORKERS', '2'))
+BATCH_RAG_WORKERS = int(os.environ.get('BATCH_RAG_WORKERS', '1'))
+BATCH_LLM_WORKERS = int(os.environ.get('BATCH_LLM_WORKERS', '4'))
+
+# A running batch refreshes its heartbeat; batches silent for longer are resumable
+BATCH_HEARTBEAT_SECONDS = 15
+BATCH_STALE_SECONDS = 60
+
+# Page images are staged (not embedded in batch items) and must outlive restarts and later resumes
+BATCH_PAGES_TTL_MINUTES = int(os.environ.get('BATCH_PAGES_TTL_MINUTES', str(7 * 24 * 60)))
+
+SCRIPT_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg')
+MAX_SCRIPT_BYTES = 15 * 1024 * 1024  # Stay below MongoDB's 16MB document limit
+
+# Identifies this process as the owner of the batches it runs
+WORKER_ID = f"{os.getpid()}_{uuid.uuid4().hex[:8]}"
+
+# Batches currently running in this process
+_running_batches: Dict[str, asyncio.Task] = {}
+
+# ==================== HELPERS ====================
+
+def expand_uploads(uploads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten uploaded files, extracting answer scripts from any ZIP archives"""
+    scripts = []
+    for upload in uploads:
+        if upload['filename'].lower().endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(upload['data'])) as archive:
+                for info in archive.infolist():
+                    name = Path(info.filename).name
+                    if info.is_dir() or name.startswith('.') or '__MACOSX' in info.filename:
+                        continue
+                    if name.lower().endswith(SCRIPT_EXTENSIONS):
+                        scripts.append({'filename': name, 'data': archive.read(info)})
+        elif upload['filename'].lower().endswith(SCRIPT_EXTENSIONS):
+            scripts.append(upload)
+    return scripts
+
+def parse_roster(roster_bytes: Optional[bytes]) -> Dict[str, str]:
+    """Parse a roster CSV mapping filename -> roll_number or student_id"""
+    if not roster_bytes:
+        return {}
+    reader = csv.DictReader(io.StringIO(roster_bytes.decode('utf-8-sig')))
+    roster = {}
+    for row in reader:
+        filename = (row.get('filename') or '').strip()
+        student_ref = (row.get('student_id') or row.get('roll_number') or '').strip()
+        if filename and student_ref:
+            roster[filename] = student_ref
+    return roster
+
+def match_student(filename: str, roster: Dict[str, str], students_by_ref: Dict[str, dict]) -> Optional[dict]:
+    """Map a script to a student via the roster, falling back to the filename stem as roll number"""
+    ref = roster.get(filename) or Path(filename).stem
+    return students_by_ref.get(ref)
+
+# ==================== PIPELINE ====================
+
+async def run_batch(batch_id: str):
+    """Run a batch through a staged OCR -> RAG -> LLM pipeline.
+
+    Each stage has its own bounded queue and worker count. Progress is persisted
+    per item, so a restarted batch skips work that has already completed.
+    """
+    from server import (
+        db, AnswerScript, ocr_answer_file, stage_answer_pages, resolve_upload_token, resolve_syllabus,
+        retrieve_script_contexts, grade_script_contexts, store_answer_script, store_evaluations
+    )
+    import feedback_index
+
+    batch = await db.batch_jobs.find_one({"id": batch_id}, {"_id": 0})
+    if not batch:
+        logger.warning(f"Batch {batch_id} no longer exists, not running it")
+        return
+
+    try:
+        syllabus = await resolve_syllabus(batch['subject'], batch['topic'])
+    except HTTPException as e:
+        await db.batch_jobs.update_one(
+            {"id": batch_id},
+            {"$set": {"status": "failed", "error": e.detail, "updated_at": datetime.now(timezone.utc)}}
+        )
+        return
+
+    # Snapshot the feedback version once; graders reuse compiled feedback blocks without querying
+    feedback_version = await feedback_index.current_version(batch['subject'])
+
+    ocr_queue = asyncio.Queue(maxsize=BATCH_OCR_WORKERS * 2)
+    rag_queue = asyncio.Queue(maxsize=BATCH_RAG_WORKERS * 2)
+    llm_queue = asyncio.Queue(maxsize=BATCH_LLM_WORKERS * 2)
+
+    async def mark_failed(item: dict, error: Exception):
+        logger.error(f"Batch {batch_id} item {item['id']} failed: {error}")
+        detail = error.detail if isinstance(error, HTTPException) else str(error)
+        await db.batch_items.update_one(
+            {"id": item['id']},
+            {"$set": {"stage": "failed", "error": detail, "updated_at": datetime.now(timezone.utc)}}
+        )
+
+    async def ocr_worker():
+        while True:
+            item = await ocr_queue.get()
+            try:
+                stored = await db.batch_items.find_one({"id": item['id']}, {"_id": 0, "file_data": 1})
+                result = await ocr_answer_file(stored['file_data'], item['filename'], item.get('content_type'))
+                # Only the token is kept on the item, so its document stays small however many pages there are
+                ocr = {
+                    "ocr_text": result['ocr_text'],
+                    "upload_token": await stage_answer_pages(result['all_pages'], BATCH_PAGES_TTL_MINUTES)
+                }
+                item.update(ocr)
+                await db.batch_items.update_one(
+                    {"id": item['id']},
+                    {
+                        "$set": {**ocr, "stage": "ocr_done", "updated_at": datetime.now(timezone.utc)},
+                        "$unset": {"file_data": ""}
+                    }
+                )
+                await rag_queue.put(item)
+            except Exception as e:
+                await mark_failed(item, e)
+            finally:
+                ocr_queue.task_done()
+
+    async def rag_worker():
+        while True:
+            item = await rag_queue.get()
+            try:
+                item['contexts'] = await retrieve_script_contexts(item['ocr_text'], syllabus)
+                await llm_queue.put(item)
+            except Exception as e:
+                await mark_failed(item, e)
+            finally:
+                rag_queue.task_done()
+
+    async def llm_worker():
+        while True:
+            item = await llm_queue.get()
+            try:
+                answer_data = {
+                    "student_id": item.get('student_id'),
+                    "student_name": item['student_name'],
+                    "class_id": batch['class_id'],
+                    "class_name": batch.get('class_name'),
+                    "section_id": batch['section_id'],
+                    "section_name": batch.get('section_name'),
+                    "subject": batch['subject'],
+                    "topic": batch['topic'],
+                    "exam_date": batch.get('exam_date'),
+                    "ocr_text": item['ocr_text'],
+                    "upload_token": item.get('upload_token'),
+                    # Items OCR'd before pages were staged carry them inline
+                    "image_base64": item.get('image_base64'),
+                    "all_pages": item.get('all_pages', [])
+                }
+
+                # A previous run may have stored the script (and its evaluations) before it stopped
+                answer_script, evaluations = None, []
+                if item.get('answer_script_id'):
+                    script = await db.answer_scripts.find_one({"id": item['answer_script_id']}, {"_id": 0, "all_pages": 0})
+                    if script:
+                        answer_script = AnswerScript(**script)
+                        evaluations = await db.evaluations.find(
+                            {"answer_script_id": answer_script.id}, {"_id": 0, "id": 1, "score": 1}
+                        ).to_list(None)
+
+                if not evaluations:
+                    eval_results = await grade_script_contexts(
+                        item['contexts'],
+                        syllabus.get('questions_text'),
+                        batch['subject'],
+                        batch['topic'],
+                        feedback_version=feedback_version
+                    )
+                    if answer_script is None:
+                        # Record the script id before storing it, so a resume finds the script instead of adding another
+                        script_id = item.get('answer_script_id') or str(uuid.uuid4())
+                        await db.batch_items.update_one({"id": item['id']}, {"$set": {"answer_script_id": script_id}})
+                        answer_script = await store_answer_script(await resolve_upload_token(answer_data), script_id=script_id)
+                    stored = await store_evaluations(answer_script, answer_data, eval_results)
+                    evaluations = [{"id": e.id, "score": e.score} for e in stored]
+
+                await db.batch_items.update_one(
+                    {"id": item['id']},
+                    {
+                        "$set": {
+                            "stage": "completed",
+                            "answer_script_id": answer_script.id,
+                            "evaluation_ids": [e['id'] for e in evaluations],
+                            "average_score": sum(e['score'] for e in evaluations) / len(evaluations) if evaluations else 0.0,
+                            "updated_at": datetime.now(timezone.utc)
+                        },
+                        "$unset": {"all_pages": "", "image_base64": "", "upload_token": ""}
+                    }
+                )
+                if item.get('upload_token'):
+                    await db.staged_uploads.delete_one({"token": item['upload_token']})
+            except Exception as e:
+                await mark_failed(item, e)
+            finally:
+                llm_queue.task_done()
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(BATCH_HEARTBEAT_SECONDS)
+            await db.batch_jobs.update_one(
+                {"id": batch_id, "owner": WORKER_ID},
+                {"$set": {"heartbeat_at": datetime.now(timezone.utc)}}
+            )
+
+    stages = [
+        (ocr_queue, [asyncio.create_task(ocr_worker()) for _ in range(BATCH_OCR_WORKERS)]),
+        (rag_queue, [asyncio.create_task(rag_worker()) for _ in range(BATCH_RAG_WORKERS)]),
+        (llm_queue, [asyncio.create_task(llm_worker()) for _ in range(BATCH_LLM_WORKERS)]),
+    ]
+    heartbeat_task = asyncio.create_task(heartbeat())
+
+    try:
+        # Feed unfinished items into the stage they stopped at
+        cursor = db.batch_items.find(
+            {"batch_id": batch_id, "stage": {"$in": ["pending", "ocr_done"]}},
+            {"_id": 0, "file_data": 0}
+        )
+        async for item in cursor:
+            if item['stage'] == 'pending':
+                await ocr_queue.put(item)
+            else:
+                await rag_queue.put(item)
+
+        # Drain the stages in order; later stages keep receiving work until earlier ones finish
+        for queue, workers in stages:
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+
+        failed = await db.batch_items.count_documents({"batch_id": batch_id, "stage": "failed"})
+        await db.batch_jobs.update_one(
+            {"id": batch_id},
+            {"$set": {
+                "status": "completed_with_errors" if failed else "completed",
+                "completed_at": datetime.now(timezone.utc),
+                "updated_at": datetime.now(timezone.utc)
+            }}
+        )
+        logger.info(f"Batch {batch_id} finished ({failed} failed items)")
+    finally:
+        heartbeat_task.cancel()
+        for _, workers in stages:
+            for worker in workers:
+                worker.cancel()
+
+def start_batch(batch_id: str):
+    """Run a batch in the background of this process"""
+    if batch_id in _running_batches:
+        return
+
+    task = asyncio.create_task(run_batch(batch_id))
+    _running_batches[batch_id] = task
+
+    def on_done(t: asyncio.Task):
+        _running_batches.pop(batch_id, None)
+        if not t.cancelled() and t.exception():
+            logger.error(f"Batch {batch_id} crashed: {t.exception()}")
+
+    task.add_done_callback(on_done)
+
+async def resume_batches():
+    """Claim and restart batches left unfinished by a stopped or crashed process"""
+    from server import db
+
+    while True:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=BATCH_STALE_SECONDS)
+        while True:
+            batch = await db.batch_jobs.find_one_and_update(
+                {"status": "running", "heartbeat_at": {"$lt": stale_before}},
+                {"$set": {"owner": WORKER_ID, "heartbeat_at": datetime.now(timezone.utc)}},
+                projection={"_id": 0, "id": 1}
+            )
+            if not batch:
+                break
+            logger.info(f"Resuming batch {batch['id']}")
+            start_batch(batch['id'])
+        await asyncio.sleep(BATCH_STALE_SECONDS)
+
+# ==================== ROUTES ====================
+
+@router.post("/evaluate", status_code=status.HTTP_202_ACCEPTED)
+async def create_batch_evaluation(
+    request: Request,
+    class_id: str = Form(...),
+    section_id: str = Form(...),
+    subject: str = Form(...),
+    topic: str = Form(None),
+    exam_date: str = Form(None),
+    files: List[UploadFile] = File(...),
+    roster: UploadFile = File(None),
+    authorization: Optional[str] = Header(None),
+    session_token: Optional[str] = Cookie(None)
+):
+    """Evaluate a whole section's answer scripts (multiple files or a ZIP) in the background.
+
+    Scripts are matched to students through an optional roster CSV with columns
+    filename and roll_number (or student_id); otherwise the file name is used as
+    the roll number.
+    """
+    from server import db
+
+    try:
+        teacher_id = await get_current_teacher_id(request, authorization, session_token)
+
+        cls = await db.classes.find_one({"id": class_id, "teacher_id": teacher_id}, {"_id": 0, "name": 1})
+        if not cls:
+            raise HTTPException(status_code=404, detail="Class not found")
+
+        section = await db.sections.find_one({"id": section_id, "class_id": class_id}, {"_id": 0, "name": 1})
+        if not section:
+            raise HTTPException(status_code=404, detail="Section not found")
+
+        uploads = [{'filename': f.filename, 'content_type': f.content_type, 'data': await f.read()} for f in files]
+        scripts = expand_uploads(uploads)
+        if not scripts:
+            raise HTTPException(status_code=400, detail="No answer scripts (PDF/PNG/JPG) found in upload")
+
+        roster_map = parse_roster(await roster.read() if roster else None)
+
+        students = await db.students.find(
+            {"class_id": class_id, "section_id": section_id},
+            {"_id": 0, "id": 1, "name": 1, "roll_number": 1}
+        ).to_list(5000)
+        students_by_ref = {}
+        for student in students:
+            students_by_ref[student['roll_number']] = student
+            students_by_ref[student['id']] = student
+
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        now = datetime.now(timezone.utc)
+
+        items = []
+        for script in scripts:
+            student = match_student(script['filename'], roster_map, students_by_ref)
+            item = {
+                "id": f"item_{uuid.uuid4().hex[:12]}",
+                "batch_id": batch_id,
+                "filename": script['filename'],
+                "content_type": script.get('content_type'),
+                "student_id": student['id'] if student else None,
+                "student_name": student['name'] if student else Path(script['filename']).stem,
+                "stage": "pending",
+                "file_data": script['data'],
+                "created_at": now,
+                "updated_at": now
+            }
+            if len(script['data']) > MAX_SCRIPT_BYTES:
+                item.update({"stage": "failed", "error": "File too large", "file_data": None})
+            elif not student:
+                item.update({"stage": "failed", "error": "No matching student in roster", "file_data": None})
+            items.append(item)
+
+        batch = {
+            "id": batch_id,
+            "teacher_id": teacher_id,
+            "class_id": class_id,
+            "class_name": cls["name"],
+            "section_id": section_id,
+            "section_name": section["name"],
+            "subject": subject,
+            "topic": topic or 'General',
+            "exam_date": exam_date,
+            "total_items": len(items),
+            "status": "running",
+            "owner": WORKER_ID,
+            "heartbeat_at": now,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        await db.batch_items.insert_many(items)
+        await db.batch_jobs.insert_one(batch)
+        start_batch(batch_id)
+
+        logger.info(f"Batch {batch_id} created with {len(items)} scripts by {teacher_id}")
+        return {
+            "success": True,
+            "batch_id": batch_id,
+            "total_items": len(items),
+            "unmatched": [i["filename"] for i in items if i["stage"] == "failed"]
+        }
+
+    except HTTPException:
+        raise
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid ZIP archive")
+    except Exception as e:
+        logger.error(f"Create batch error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create batch evaluation")
+
+@router.get("/{batch_id}")
+async def get_batch_status(
+    batch_id: str,
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    session_token: Optional[str] = Cookie(None)
+):
+    """Get batch progress with per-item stage"""
+    from server import db
+
+    try:
+        teacher_id = await get_current_teacher_id(request, authorization, session_token)
+
+        batch = await db.batch_jobs.find_one({"id": batch_id, "teacher_id": teacher_id}, {"_id": 0})
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+
+        items = await db.batch_items.find(
+            {"batch_id": batch_id},
+            {"_id": 0, "id": 1, "filename": 1, "student_id": 1, "student_name": 1, "stage": 1,
+             "error": 1, "evaluation_ids": 1, "average_score": 1, "updated_at": 1}
+        ).to_list(5000)
+
+        progress = {"pending": 0, "ocr_done": 0, "completed": 0, "failed": 0}
+        for item in items:
+            progress[item["stage"]] = progress.get(item["stage"], 0) + 1
+
+        return {**batch, "progress": progress, "items": items}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get batch error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get batch status")
+
+@router.post("/{batch_id}/resume")
+async def resume_batch(
+    batch_id: str,
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    session_token: Optional[str] = Cookie(None)
+):
+    """Retry failed items of a batch and restart it"""
+    from server import db
+
+    try:
+        teacher_id = await get_current_teacher_id(request, authorization, session_token)
+
+        batch = await db.batch_jobs.find_one({"id": batch_id, "teacher_id": teacher_id}, {"_id": 0, "id": 1})
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        if batch_id in _running_batches:
+            raise HTTPException(status_code=409, detail="Batch is already running")
+
+        # Take ownership atomically, unless another process is running it with a fresh heartbeat
+        now = datetime.now(timezone.utc)
+        claimed = await db.batch_jobs.find_one_and_update(
+            {
+                "id": batch_id,
+                "$or": [
+                    {"status": {"$ne": "running"}},
+                    {"heartbeat_at": {"$lt": now - timedelta(seconds=BATCH_STALE_SECONDS)}}
+                ]
+            },
+            {"$set": {"status": "running", "owner": WORKER_ID, "heartbeat_at": now}},
+            projection={"_id": 0, "id": 1}
+        )
+        if not claimed:
+            raise HTTPException(status_code=409, detail="Batch is already running")
+
+        # Failed items that finished OCR restart at RAG; the rest need the original file
+        await db.batch_items.update_many(
+            {"batch_id": batch_id, "stage": "failed", "ocr_text": {"$exists": True}},
+            {"$set": {"stage": "ocr_done"}, "$unset": {"error": ""}}
+        )
+        await db.batch_items.update_many(
+            {"batch_id": batch_id, "stage": "failed", "file_data": {"$type": "binData"}},
+            {"$set": {"stage": "pending"}, "$unset": {"error": ""}}
+        )
+        start_batch(batch_id)
+
+        return {"success": True, "batch_id": batch_id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Resume batch error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to resume batch")
@@ -0,0 +1,60 @@
+# Incremental linear score calibration (raw LLM score -> teacher score) fitted with NumPy
+from typing import Optional
+
+import numpy as np
+
+CALIBRATION_MIN_SAMPLES = 5  # Below this, raw scores are returned unchanged
+PRIOR_WEIGHT = 2.0  # Pseudo-observations on y = x at each anchor, pulling sparse fits toward identity
+PRIOR_ANCHORS = (25.0, 75.0)
+
+class LinearCalibrator:
+    """Least-squares fit of teacher_score = a + b * raw_score kept as running sufficient statistics.
+
+    Each update is O(1), so the model is refitted incrementally as feedback arrives.
+    """
+
+    __slots__ = ("stats", "_coef")
+
+    def __init__(self):
+        # n, sum(x), sum(y), sum(x*x), sum(x*y)
+        self.stats = np.zeros(5, dtype=np.float64)
+        self._coef: Optional[np.ndarray] = None
+
+    @property
+    def n(self) -> int:
+        return int(self.stats[0])
+
+    @property
+    def active(self) -> bool:
+        return self.n >= CALIBRATION_MIN_SAMPLES
+
+    def update(self, raw_score: float, teacher_score: float):
+        x, y = float(raw_score), float(teacher_score)
+        self.stats += (1.0, x, y, x * x, x * y)
+        self._coef = None
+
+    def update_many(self, raw_scores: np.ndarray, teacher_scores: np.ndarray):
+        x = np.asarray(raw_scores, dtype=np.float64)
+        y = np.asarray(teacher_scores, dtype=np.float64)
+        self.stats += (len(x), x.sum(), y.sum(), (x * x).sum(), (x * y).sum())
+        self._coef = None
+
+    def coefficients(self) -> np.ndarray:
+        """Intercept and slope, regularized toward the identity mapping"""
+        if self._coef is None:
+            n, sx, sy, sxx, sxy = self.stats
+            anchors = np.asarray(PRIOR_ANCHORS)
+            n += PRIOR_WEIGHT * len(anchors)
+            sx += PRIOR_WEIGHT * anchors.sum()
+            sy += PRIOR_WEIGHT * anchors.sum()
+            sxx += PRIOR_WEIGHT * (anchors ** 2).sum()
+            sxy += PRIOR_WEIGHT * (anchors ** 2).sum()
+            self._coef = np.linalg.solve(np.array([[n, sx], [sx, sxx]]), np.array([sy, sxy]))
+        return self._coef
+
+    def apply(self, raw_score: float) -> float:
+        """Calibrated score in [0, 100]"""
+        if not self.active:
+            return float(raw_score)
+        a, b = self.coefficients()
+        return round(float(np.clip(a + b * float(raw_score), 0.0, 100.0)), 1)
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Request, Header, Cookie
 from pydantic import BaseModel, Field
-from typing import Optional, List, Annotated
+from typing import Optional, List, Dict, Annotated
 from datetime import datetime, timezone
+import asyncio
 import uuid
 import logging
 
 from auth_utils import get_current_teacher_id
+import response_cache
 
 router = APIRouter(prefix="/api/classes", tags=["classes"])
 logger = logging.getLogger(__name__)
@@ -39,6 +41,30 @@ class SectionResponse(BaseModel):
     student_count: int = 0
     created_at: datetime
 
+# ==================== COUNTS ====================
+
+async def count_by(collection, field: str, ids: List[str]) -> Dict[str, int]:
+    """Documents per value of `field` for the given ids, in one $group round trip"""
+    if not ids:
+        return {}
+    groups = await collection.aggregate([
+        {"$match": {field: {"$in": ids}}},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    return {group["_id"]: group["count"] for group in groups}
+
+async def add_class_counts(db, classes: List[dict]) -> List[dict]:
+    """Fill in section_count and student_count for each class"""
+    ids = [cls["id"] for cls in classes]
+    section_counts, student_counts = await asyncio.gather(
+        count_by(db.sections, "class_id", ids),
+        count_by(db.students, "class_id", ids)
+    )
+    for cls in classes:
+        cls["section_count"] = section_counts.get(cls["id"], 0)
+        cls["student_count"] = student_counts.get(cls["id"], 0)
+    return classes
+
 # ==================== CLASS ROUTES ====================
 
 @router.post("/", response_model=ClassResponse, status_code=status.HTTP_201_CREATED)
@@ -114,17 +140,7 @@ async def get_classes(
             {"_id": 0}
         ).sort("created_at", -1).to_list(1000)
         
-        # Get counts for each class
-        for cls in classes:
-            # Count sections
-            section_count = await db.sections.count_documents({"class_id": cls["id"]})
-            cls["section_count"] = section_count
-            
-            # Count students
-            student_count = await db.students.count_documents({"class_id": cls["id"]})
-            cls["student_count"] = student_count
-        
-        return classes
+        return await add_class_counts(db, classes)
         
     except HTTPException:
         raise
@@ -159,12 +175,7 @@ async def get_class(
                 detail="Class not found"
             )
         
-        # Get counts
-        section_count = await db.sections.count_documents({"class_id": class_id})
-        student_count = await db.students.count_documents({"class_id": class_id})
-        
-        cls["section_count"] = section_count
-        cls["student_count"] = student_count
+        await add_class_counts(db, [cls])
         
         return cls
         
@@ -215,13 +226,12 @@ async def update_class(
                 detail="No changes made"
             )
         
+        # Cached progress reports carry the class name
+        await response_cache.bump_versions(db, "classes")
+        
         # Get updated class
         updated = await db.classes.find_one({"id": class_id}, {"_id": 0})
-        section_count = await db.sections.count_documents({"class_id": class_id})
-        student_count = await db.students.count_documents({"class_id": class_id})
-        
-        updated["section_count"] = section_count
-        updated["student_count"] = student_count
+        await add_class_counts(db, [updated])
         
         logger.info(f"Class updated: {class_id}")
         
@@ -261,6 +271,7 @@ async def delete_class(
         students_deleted = await db.students.delete_many({"class_id": class_id})
         sections_deleted = await db.sections.delete_many({"class_id": class_id})
         await db.classes.delete_one({"id": class_id})
+        await response_cache.bump_versions(db, "students", "classes", "sections")
         
         logger.info(f"Class deleted: {class_id}, {sections_deleted.deleted_count} sections, {students_deleted.deleted_count} students")
         
@@ -371,10 +382,9 @@ async def get_sections(
             {"_id": 0}
         ).sort("name", 1).to_list(1000)
         
-        # Get student count for each section
+        student_counts = await count_by(db.students, "section_id", [section["id"] for section in sections])
         for section in sections:
-            student_count = await db.students.count_documents({"section_id": section["id"]})
-            section["student_count"] = student_count
+            section["student_count"] = student_counts.get(section["id"], 0)
         
         return sections
         
@@ -411,6 +421,7 @@ async def delete_section(
         # Delete related students
         students_deleted = await db.students.delete_many({"section_id": section_id})
         await db.sections.delete_one({"id": section_id})
+        await response_cache.bump_versions(db, "students", "sections")
         
         logger.info(f"Section deleted: {section_id}, {students_deleted.deleted_count} students")
         
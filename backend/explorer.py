@@ -0,0 +1,303 @@
+# Database explorer helpers: the collection overview (estimated counts, sampled schemas)
+# and keyset-paginated browsing with display values computed inside MongoDB
+import asyncio
+import json
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+import pagination
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SAMPLE_SIZE = 50  # Documents sampled per collection to infer its fields
+OVERVIEW_CACHE_SECONDS = 30
+
+# Python-style names the explorer UI keys its type badges on
+BSON_TYPE_NAMES = {
+    "string": "str",
+    "double": "float",
+    "int": "int",
+    "long": "int",
+    "decimal": "Decimal128",
+    "bool": "bool",
+    "date": "datetime",
+    "null": "NoneType",
+    "objectId": "ObjectId",
+    "binData": "bytes",
+    "array": "list",
+    "object": "dict"
+}
+
+PREVIEW_STRING_CHARS = 500  # Longer strings are cut server-side in the table view
+
+# field<op>value filter expressions; the longest operators are tried first
+FILTER_OPERATORS = (("!=", "$ne"), (">=", "$gte"), ("<=", "$lte"), ("=", "$eq"), (">", "$gt"), ("<", "$lt"), ("~", "$regex"))
+FIELD_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$")
+
+_overview: Optional[Tuple[float, Dict[str, Any]]] = None
+
+def invalidate():
+    global _overview
+    _overview = None
+
+async def sample_schema(collection, size: int = SCHEMA_SAMPLE_SIZE) -> Dict[str, str]:
+    """Field -> type description merged over a $sample of documents.
+
+    Only each field's BSON type and size leave the server, never the values, so
+    sampling a collection of base64 images or embeddings stays cheap.
+    """
+    samples = await collection.aggregate([
+        {"$sample": {"size": size}},
+        {"$project": {"_id": 0, "fields": {"$map": {
+            "input": {"$objectToArray": "$$ROOT"},
+            "in": {
+                "k": "$$this.k",
+                "t": {"$type": "$$this.v"},
+                "n": {"$switch": {"branches": [
+                    {"case": {"$isArray": "$$this.v"}, "then": {"$size": "$$this.v"}},
+                    {"case": {"$eq": [{"$type": "$$this.v"}, "string"]}, "then": {"$strLenCP": "$$this.v"}},
+                    {"case": {"$eq": [{"$type": "$$this.v"}, "object"]}, "then": {"$size": {"$objectToArray": "$$this.v"}}}
+                ], "default": None}},
+                "e": {"$cond": [
+                    {"$and": [{"$isArray": "$$this.v"}, {"$gt": [{"$size": "$$this.v"}, 0]}]},
+                    {"$type": {"$arrayElemAt": ["$$this.v", 0]}},
+                    None
+                ]}
+            }
+        }}}}
+    ]).to_list(None)
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for sample in samples:
+        for field in sample['fields']:
+            if field['k'] == "_id":
+                continue
+            info = merged.setdefault(field['k'], {"types": [], "size": 0, "element": None})
+            type_name = BSON_TYPE_NAMES.get(field['t'], field['t'])
+            if type_name not in info['types']:
+                info['types'].append(type_name)
+            info['size'] = max(info['size'], field['n'] or 0)
+            info['element'] = info['element'] or field['e']
+
+    schema = {}
+    for key, info in merged.items():
+        described = []
+        for type_name in info['types']:
+            if type_name == "list":
+                element = info['element']
+                type_name = f"list[{BSON_TYPE_NAMES.get(element, element)}] ({info['size']} items)" if element else "list (empty)"
+            elif type_name == "dict":
+                type_name = f"dict ({info['size']} keys)"
+            elif type_name == "str" and info['size'] > 100:
+                type_name = f"str (len={info['size']})"
+            described.append(type_name)
+        schema[key] = " | ".join(described)
+    return schema
+
+async def describe_collection(db, name: str) -> Dict[str, Any]:
+    collection = db[name]
+    count, schema = await asyncio.gather(
+        collection.estimated_document_count(),
+        sample_schema(collection),
+        return_exceptions=True
+    )
+    for result in (count, schema):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not describe collection {name}: {result}")
+    return {
+        "name": name,
+        "count": count if isinstance(count, int) else None,
+        "schema": schema if isinstance(schema, dict) else {}
+    }
+
+async def collections_overview(db) -> Dict[str, Any]:
+    """Every collection's estimated count and sampled schema (cached for OVERVIEW_CACHE_SECONDS)"""
+    global _overview
+    if _overview is not None and time.monotonic() - _overview[0] < OVERVIEW_CACHE_SECONDS:
+        return _overview[1]
+    names = sorted(await db.list_collection_names())
+    collections: List[Dict[str, Any]] = list(await asyncio.gather(*(describe_collection(db, name) for name in names)))
+    overview = {
+        "database": db.name,
+        "total_collections": len(collections),
+        "collections": collections
+    }
+    _overview = (time.monotonic(), overview)
+    return overview
+
+def _filter_date(raw: str) -> Optional[datetime]:
+    """ISO 8601 date/datetime literal as a UTC datetime (naive values are taken as UTC)"""
+    if not ISO_DATE_RE.match(raw):
+        return None
+    try:
+        value = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _filter_value(raw: str) -> Any:
+    """JSON scalars (numbers, true/false/null, quoted strings) as themselves, anything else as a string"""
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return raw
+    return value if isinstance(value, (str, int, float, bool)) or value is None else raw
+
+def parse_filters(expressions: Sequence[str]) -> Dict[str, Any]:
+    """Mongo filter for `field=value`, `field!=value`, `field>=value`, ... and `field~text` (contains)"""
+    clauses = []
+    for expression in expressions:
+        for token, operator in FILTER_OPERATORS:
+            field, found, raw = expression.partition(token)
+            if found and FIELD_NAME_RE.match(field.strip()):
+                break
+        else:
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {expression}")
+        field, raw = field.strip(), raw.strip()
+        date = _filter_date(raw) if operator != "$regex" else None
+        if operator == "$regex":
+            clauses.append({field: {"$regex": re.escape(raw), "$options": "i"}})
+        elif date is not None:
+            # Dates are stored natively in most collections but as strings in some (exam_date);
+            # comparisons only match values of the same BSON type, so test both forms
+            if operator == "$eq":
+                clauses.append({field: {"$in": [date, raw]}})
+            elif operator == "$ne":
+                clauses.append({field: {"$nin": [date, raw]}})
+            else:
+                clauses.append({"$or": [{field: {operator: date}}, {field: {operator: raw}}]})
+        else:
+            clauses.append({field: {operator: _filter_value(raw)}})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _display_value(value: str) -> Dict[str, Any]:
+    """Aggregation expression for how a field value is shown in the table.
+
+    Numeric arrays (embeddings) become a "[Vector: n dims, min, max]" summary, arrays of
+    vectors a count, binary values a size, long strings a prefix, and arrays of strings or
+    binary values (page images) a count and total size unless they are short.
+    """
+    first = {"$arrayElemAt": [value, 0]}
+    is_nonempty_array = {"$and": [{"$isArray": value}, {"$gt": [{"$size": value}, 0]}]}
+    # Characters (strings) or bytes (binary) held by an array's elements
+    element_sizes = {"$reduce": {"input": value, "initialValue": 0, "in": {"$add": ["$$value", {"$switch": {
+        "branches": [
+            {"case": {"$eq": [{"$type": "$$this"}, "string"]}, "then": {"$strLenCP": "$$this"}},
+            {"case": {"$eq": [{"$type": "$$this"}, "binData"]}, "then": {"$binarySize": "$$this"}}
+        ],
+        "default": 0
+    }}]}}}
+    return {"$switch": {"branches": [
+        {
+            "case": {"$and": [is_nonempty_array, {"$in": [{"$type": first}, ["double", "int", "long", "decimal"]]}]},
+            "then": {"$concat": [
+                "[Vector: ", {"$toString": {"$size": value}}, " dims, min=",
+                {"$toString": {"$round": [{"$min": value}, 4]}}, ", max=",
+                {"$toString": {"$round": [{"$max": value}, 4]}}, "]"
+            ]}
+        },
+        {
+            "case": {"$and": [is_nonempty_array, {"$isArray": first}]},
+            "then": {"$concat": [
+                "[", {"$toString": {"$size": value}}, " vectors, ",
+                {"$toString": {"$size": first}}, " dims]"
+            ]}
+        },
+        {
+            "case": {"$and": [is_nonempty_array, {"$in": [{"$type": first}, ["string", "binData"]]}]},
+            "then": {"$let": {"vars": {"total": element_sizes}, "in": {"$cond": [
+                {"$gt": ["$$total", PREVIEW_STRING_CHARS]},
+                {"$concat": [
+                    "[", {"$toString": {"$size": value}}, " items, ", {"$toString": "$$total"},
+                    {"$cond": [{"$eq": [{"$type": first}, "string"]}, " chars", " bytes"]}, " total]"
+                ]},
+                {"$map": {"input": value, "as": "item", "in": {"$cond": [
+                    {"$eq": [{"$type": "$$item"}, "binData"]},
+                    {"$concat": ["[binary data: ", {"$toString": {"$binarySize": "$$item"}}, " bytes]"]},
+                    "$$item"
+                ]}}}
+            ]}}}
+        },
+        {
+            "case": {"$eq": [{"$type": value}, "binData"]},
+            "then": {"$concat": ["[binary data: ", {"$toString": {"$binarySize": value}}, " bytes]"]}
+        },
+        {
+            "case": {"$and": [
+                {"$eq": [{"$type": value}, "string"]},
+                {"$gt": [{"$strLenCP": value}, PREVIEW_STRING_CHARS]}
+            ]},
+            "then": {"$concat": [
+                {"$substrCP": [value, 0, PREVIEW_STRING_CHARS]},
+                "... (", {"$toString": {"$strLenCP": value}}, " chars total)"
+            ]}
+        }
+    ], "default": value}}
+
+def browse_pipeline(query: Dict[str, Any], sort: Sequence[Tuple[str, int]], limit: int,
+                    fields: Optional[Tuple[str, ...]]) -> List[Dict[str, Any]]:
+    """Page of documents in `sort` order, each carrying its sort-key values in `_cursor`"""
+    pipeline = [
+        {"$match": query},
+        {"$sort": dict(sort)},
+        {"$limit": limit},
+        {"$set": {"_cursor": [f"${field}" for field, _ in sort]}}
+    ]
+    if fields is not None:
+        pipeline.append({"$project": {"_cursor": 1, **{name: 1 for name in fields}}})
+    pipeline.append({"$replaceWith": {"$mergeObjects": [
+        {"_cursor": "$_cursor"},
+        {"$arrayToObject": {"$map": {
+            "input": {"$filter": {
+                "input": {"$objectToArray": "$$ROOT"},
+                "cond": {"$not": [{"$in": ["$$this.k", ["_id", "_cursor"]]}]}
+            }},
+            "in": {"k": "$$this.k", "v": _display_value("$$this.v")}
+        }}}
+    ]}})
+    return pipeline
+
+async def browse_collection(collection, filters: Sequence[str], sort_field: str, descending: bool,
+                            limit: int, cursor: Optional[str], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """One keyset page of a collection, filtered and sorted in MongoDB.
+
+    Documents are ordered by (sort_field, _id) and the next page starts after the
+    last row's cursor, so deep pages cost the same as the first.
+    """
+    if not FIELD_NAME_RE.match(sort_field):
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort_field}")
+    direction = -1 if descending else 1
+    sort = [(sort_field, direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+
+    query = parse_filters(filters)
+    keyset = pagination.keyset_filter(sort, cursor, nullable=True)
+    if keyset:
+        query = {"$and": [query, keyset]} if query else keyset
+
+    rows, total = await asyncio.gather(
+        collection.aggregate(browse_pipeline(query, sort, limit, fields)).to_list(limit),
+        collection.estimated_document_count() if not filters else asyncio.sleep(0, result=None)
+    )
+    next_cursor = pagination.encode_cursor(rows[-1]['_cursor']) if len(rows) == limit else None
+    for row in rows:
+        del row['_cursor']
+
+    columns: Dict[str, str] = {}
+    for row in rows:
+        for key, value in row.items():
+            if columns.get(key, "NoneType") == "NoneType":
+                columns[key] = type(value).__name__
+    return {
+        "total": total,
+        "next_cursor": next_cursor,
+        "columns": [{"name": name, "type": type_name} for name, type_name in columns.items()],
+        "data": rows
+    }
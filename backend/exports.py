@@ -0,0 +1,60 @@
+# Streaming CSV / NDJSON exports rendered straight from a Motor cursor (constant memory)
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Sequence
+
+import serialization
+
+EXPORT_BATCH_SIZE = 500  # Rows per cursor batch and per streamed chunk
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson"
+}
+
+def csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat() + "Z"
+    if isinstance(value, (list, dict)):
+        return serialization.dumps(value).decode()
+    return value
+
+async def stream_rows(cursor, export_format: str, columns: Sequence[str]) -> AsyncIterator[bytes]:
+    """Encoded chunks of the cursor's documents, EXPORT_BATCH_SIZE rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    chunk = []
+    if export_format == "csv":
+        writer.writerow(columns)
+
+    def flush() -> bytes:
+        if export_format == "csv":
+            data = buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+        data = b"".join(chunk)
+        chunk.clear()
+        return data
+
+    rows = 0
+    async for doc in cursor:
+        if export_format == "csv":
+            writer.writerow([csv_cell(doc.get(column)) for column in columns])
+        else:
+            chunk.append(serialization.dumps({column: doc.get(column) for column in columns}) + b"\n")
+        rows += 1
+        if rows % EXPORT_BATCH_SIZE == 0:
+            yield flush()
+    data = flush()
+    if data:
+        yield data
+
+def attachment_headers(name: str, export_format: str) -> Dict[str, str]:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    return {"Content-Disposition": f'attachment; filename="{name}-{stamp}.{export_format}"'}
@@ -0,0 +1,250 @@
+# In-memory per-subject vector index over teacher feedback logs, with precompiled prompt blocks
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import ReturnDocument, UpdateOne
+
+from calibration import LinearCalibrator
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_VERSION_CHECK_SECONDS = 5  # How often a cached index re-checks the subject's feedback version
+FEEDBACK_INDEX_MAX_LOGS = 5000
+FEEDBACK_BLOCK_CACHE_SIZE = 256  # Rendered blocks kept per subject
+TOPIC_MATCH_BONUS = 0.1  # Prefer corrections from the same topic when similarity is close
+
+LOG_FIELDS = ("id", "topic", "question", "answer_text", "ai_score", "teacher_score", "feedback")
+CALIBRATION_FIELDS = ("topic", "raw_score", "ai_score", "teacher_score")
+
+FEEDBACK_BLOCK_HEADER = (
+    "\nCRITICAL: FOLLOW THESE PREVIOUS TEACHER CORRECTIONS\n"
+    "You have been inconsistent in the past. Below are examples of how the TEACHER wants you to grade. "
+    "ADAPT YOUR SCORING IMMEDIATELY to match the 'Teacher Corrected Score' logic:\n"
+)
+FEEDBACK_BLOCK_FOOTER = (
+    "\nURGENT: If the current evaluation contains similar questions or answers, APPLY THE TEACHER'S RULE ABOVE. "
+    "Do not repeat your previous scoring mistakes.\n"
+)
+
+def feedback_embedding_text(question: Optional[str], answer_text: Optional[str]) -> str:
+    """Text embedded for a feedback log and for the answers it is compared against"""
+    return f"{question or ''}\n{answer_text or ''}".strip()
+
+def render_correction(log: Dict[str, Any]) -> str:
+    """Render one feedback log as a [PAST CORRECTION] prompt snippet"""
+    # Keep it concise but include the question
+    ans = log.get('answer_text', '')
+    if len(ans) > 200: ans = ans[:200] + "..."
+
+    return (
+        f"\n[PAST CORRECTION]\n"
+        f"- FOR QUESTION: {log.get('question')}\n"
+        f"- STUDENT ANSWER SNIPPET: {ans}\n"
+        f"- YOUR WRONG SCORE: {log.get('ai_score')}\n"
+        f"- TEACHER'S CORRECT SCORE: {log.get('teacher_score')}\n"
+        f"- TEACHER'S RULE: {log.get('feedback')}\n"
+    )
+
+def calibration_pair(log: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """(raw LLM score, teacher score) of a feedback log; logs written before calibration only have ai_score"""
+    raw = log.get('raw_score', log.get('ai_score'))
+    teacher = log.get('teacher_score')
+    if raw is None or teacher is None:
+        return None
+    return float(raw), float(teacher)
+
+class SubjectIndex:
+    """Embeddings matrix plus a precompiled prompt snippet for every usable feedback log of one subject.
+    
+    Also holds the subject's score calibrators (one per topic plus one subject-wide
+    under the key None), fitted from every feedback log of the subject. `log_ids`
+    are the ids of every log already counted, so a write is never applied twice.
+    """
+
+    def __init__(self, logs: List[Dict[str, Any]], vectors: List[List[float]], version: int,
+                 calibrators: Optional[Dict[Optional[str], LinearCalibrator]] = None, log_ids: Optional[set] = None):
+        self.logs = logs
+        self.log_ids = log_ids if log_ids is not None else {log.get('id') for log in logs}
+        self.topics = [log.get('topic') for log in logs]
+        self.snippets = [render_correction(log) for log in logs]
+        self.matrix = np.asarray(vectors, dtype=np.float32) if vectors else np.empty((0, 0), dtype=np.float32)
+        self.calibrators = calibrators or {}
+        self.version = version
+        self.checked_at = time.monotonic()
+        # (topic, selected log indices) -> rendered feedback block
+        self.blocks: Dict[Tuple[Optional[str], Tuple[int, ...]], str] = {}
+
+    def add(self, log: Dict[str, Any], vector: List[float]):
+        self.logs.append(log)
+        self.topics.append(log.get('topic'))
+        self.snippets.append(render_correction(log))
+        row = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        self.matrix = row if self.matrix.size == 0 else np.vstack([self.matrix, row])
+        self.blocks.clear()
+
+    def add_calibration(self, topic: Optional[str], raw_score: float, teacher_score: float):
+        # A log without a topic only counts toward the subject-wide calibrator (key None), once
+        for key in {None, topic}:
+            self.calibrators.setdefault(key, LinearCalibrator()).update(raw_score, teacher_score)
+
+    def calibrator(self, topic: Optional[str]) -> Optional[LinearCalibrator]:
+        """Most specific active calibrator: the topic's, else the subject-wide one"""
+        for key in (topic, None):
+            calibrator = self.calibrators.get(key)
+            if calibrator and calibrator.active:
+                return calibrator
+        return None
+
+    def search(self, query_vector: List[float], k: int, topic: Optional[str] = None) -> List[int]:
+        """Indices of the k logs most similar to the query, best first"""
+        if not self.logs or k <= 0:
+            return []
+        if k >= len(self.logs):
+            # Every log is selected; keep a stable order so the rendered block is reused
+            return list(range(len(self.logs)))
+        # Embeddings are unit-normalized, so the dot product is the cosine similarity
+        scores = self.matrix @ np.asarray(query_vector, dtype=np.float32)
+        if topic:
+            scores = scores + TOPIC_MATCH_BONUS * np.fromiter((t == topic for t in self.topics), dtype=np.float32, count=len(self.topics))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [int(i) for i in top[np.argsort(-scores[top])]]
+
+    def block(self, query_vector: List[float], k: int, topic: Optional[str] = None) -> str:
+        """Rendered adaptive-learning block for the selected corrections (cached)"""
+        selected = tuple(self.search(query_vector, k, topic))
+        if not selected:
+            return ""
+        key = (topic, selected)
+        block = self.blocks.get(key)
+        if block is None:
+            if len(self.blocks) >= FEEDBACK_BLOCK_CACHE_SIZE:
+                self.blocks.clear()
+            block = FEEDBACK_BLOCK_HEADER + "".join(self.snippets[i] for i in selected) + FEEDBACK_BLOCK_FOOTER
+            self.blocks[key] = block
+        return block
+
+_indexes: Dict[str, SubjectIndex] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+def _usable(log: Dict[str, Any]) -> bool:
+    return bool(log.get('answer_text') and log.get('feedback'))
+
+async def current_version(subject: str) -> int:
+    """Current feedback version of a subject (bumped by every feedback write)"""
+    from server import db
+    doc = await db.feedback_versions.find_one({"_id": subject}, {"version": 1})
+    return doc["version"] if doc else 0
+
+async def bump_version(subject: str) -> int:
+    """Atomically increment a subject's feedback version and return the new value"""
+    from server import db
+    doc = await db.feedback_versions.find_one_and_update(
+        {"_id": subject},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+async def _load_subject(subject: str, version: int) -> SubjectIndex:
+    """Load every usable feedback log of a subject in a single query"""
+    from server import db, get_embeddings
+
+    projection = {"_id": 0, "embedding": 1, **{field: 1 for field in LOG_FIELDS + CALIBRATION_FIELDS}}
+    raw_logs = await db.feedback_logs.find(
+        {"subject": subject},
+        projection
+    ).sort("timestamp", -1).limit(FEEDBACK_INDEX_MAX_LOGS).to_list(FEEDBACK_INDEX_MAX_LOGS)
+
+    # Fit calibrators from every log with scores, vectorized per topic
+    pairs_by_topic: Dict[Optional[str], List[Tuple[float, float]]] = {}
+    for log in raw_logs:
+        pair = calibration_pair(log)
+        if pair:
+            pairs_by_topic.setdefault(None, []).append(pair)
+            if log.get('topic') is not None:
+                pairs_by_topic.setdefault(log['topic'], []).append(pair)
+    calibrators = {}
+    for key, pairs in pairs_by_topic.items():
+        scores = np.asarray(pairs, dtype=np.float64)
+        calibrators[key] = LinearCalibrator()
+        calibrators[key].update_many(scores[:, 0], scores[:, 1])
+
+    logs, vectors, backfill = [], [], []
+    for log in raw_logs:
+        if not _usable(log):
+            continue
+        vector = log.pop('embedding', None)
+        if not vector:
+            # Feedback written before embeddings were stored: embed it once and keep the result
+            vector = await get_embeddings(feedback_embedding_text(log.get('question'), log.get('answer_text')))
+            if log.get('id'):
+                backfill.append(UpdateOne({"id": log['id']}, {"$set": {"embedding": vector}}))
+            await asyncio.sleep(0)  # Let other requests run between embeddings
+        logs.append({field: log.get(field) for field in LOG_FIELDS})
+        vectors.append(vector)
+    if backfill:
+        await db.feedback_logs.bulk_write(backfill, ordered=False)
+        logger.info(f"Stored {len(backfill)} missing feedback embeddings for subject '{subject}'")
+
+    logger.info(f"Loaded feedback index for subject '{subject}' v{version} ({len(logs)} logs)")
+    return SubjectIndex(logs, vectors, version, calibrators, {log.get('id') for log in raw_logs})
+
+async def get_subject_index(subject: str, min_version: Optional[int] = None) -> SubjectIndex:
+    """Return the cached index for a subject, reloading it when its feedback version changes.
+
+    With min_version (a version snapshot taken by the caller, e.g. once per batch),
+    a cached index at least that new is used without querying MongoDB at all.
+    """
+    index = _indexes.get(subject)
+    if index:
+        if min_version is not None and index.version >= min_version:
+            return index
+        if min_version is None and time.monotonic() - index.checked_at < FEEDBACK_VERSION_CHECK_SECONDS:
+            return index
+
+    lock = _locks.setdefault(subject, asyncio.Lock())
+    async with lock:
+        index = _indexes.get(subject)
+        if index and min_version is not None and index.version >= min_version:
+            return index
+        version = await current_version(subject)
+        if index and index.version == version:
+            index.checked_at = time.monotonic()
+            return index
+        index = await _load_subject(subject, version)
+        _indexes[subject] = index
+    return index
+
+async def get_calibrator(subject: str, topic: Optional[str], min_version: Optional[int] = None) -> Optional[LinearCalibrator]:
+    """Active score calibrator for a subject/topic, or None while there is too little feedback"""
+    index = await get_subject_index(subject, min_version)
+    return index.calibrator(topic)
+
+async def feedback_block(subject: str, topic: Optional[str], query_vector: List[float], k: int, min_version: Optional[int] = None) -> str:
+    """Compiled adaptive-learning prompt block with the k corrections most similar to the query"""
+    index = await get_subject_index(subject, min_version)
+    return index.block(query_vector, k, topic)
+
+def add_feedback(subject: str, log: Dict[str, Any], vector: List[float], version: int):
+    """Apply a feedback write (already persisted at `version`) to the cached subject index"""
+    index = _indexes.get(subject)
+    if index is None:
+        return
+    if index.version != version - 1:
+        # Missed writes from another process; reload on next use
+        _indexes.pop(subject, None)
+        return
+    index.version = version
+    if log.get('id') in index.log_ids:
+        # Loaded from MongoDB between the log's insert and its version bump
+        return
+    index.log_ids.add(log.get('id'))
+    pair = calibration_pair(log)
+    if pair:
+        index.add_calibration(log.get('topic'), *pair)
+    if _usable(log):
+        index.add({field: log.get(field) for field in LOG_FIELDS}, vector)
@@ -0,0 +1,82 @@
+# Sparse fieldsets: `fields=` query parameters mapped to Mongo projections and narrowed response models
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+def parse_fields(fields: Optional[str], model: Optional[Type[BaseModel]] = None, always: Iterable[str] = ("id",)) -> Optional[Tuple[str, ...]]:
+    """Requested field names (plus `always`), or None when every field is wanted.
+
+    With a model, unknown names are rejected with a 400 listing them.
+    """
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    if model is not None:
+        unknown = [name for name in requested if name not in model.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    selected = list(dict.fromkeys([name for name in always if model is None or name in model.model_fields] + requested))
+    return tuple(selected)
+
+@lru_cache(maxsize=32)
+def model_defaults(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Static defaults of the model's optional fields (fields with a default_factory are left out)"""
+    return {
+        name: field.default for name, field in model.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    }
+
+def projection(fields: Optional[Tuple[str, ...]], extra: Iterable[str] = (), exclude: Optional[Dict[str, int]] = None,
+               model: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
+    """Mongo projection for the selected fields (plus `extra` needed server-side), else the default exclusions.
+
+    With a model, rows come back shaped as the model would have validated them: fields
+    missing from older documents get the model's defaults, and excluded model fields
+    are returned as their default instead of their stored value.
+    """
+    if model is None:
+        if fields is None:
+            return {"_id": 0, **(exclude or {})}
+        return {"_id": 0, **{name: 1 for name in (*fields, *extra)}}
+
+    defaults = model_defaults(model)
+    spec: Dict[str, Any] = {"_id": 0}
+    for name in (fields or tuple(model.model_fields)):
+        if fields is None and name in (exclude or {}):
+            if name in defaults:
+                spec[name] = {"$literal": defaults[name]}
+        elif name in defaults:
+            spec[name] = {"$ifNull": [f"${name}", {"$literal": defaults[name]}]}
+        else:
+            spec[name] = 1
+    for name in extra:
+        spec.setdefault(name, 1)
+    return spec
+
+def unrequested(fields: Optional[Tuple[str, ...]], names: Iterable[str]) -> Tuple[str, ...]:
+    """Those of `names` (projected for server-side use) that the client did not ask for"""
+    if fields is None:
+        return ()
+    return tuple(name for name in names if name not in fields)
+
+@lru_cache(maxsize=128)
+def narrowed_model(model: Type[BaseModel], fields: Optional[Tuple[str, ...]]) -> Type[BaseModel]:
+    """Model declaring only the selected fields of `model` (the model itself when fields is None)"""
+    if fields is None:
+        return model
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(extra="ignore"),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    )
+
+@lru_cache(maxsize=128)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def model_response(rows: List[Dict[str, Any]], model: Type[BaseModel], fields: Optional[Tuple[str, ...]]) -> Response:
+    """JSON response of rows validated against the model narrowed to the selected fields"""
+    adapter = _list_adapter(narrowed_model(model, fields))
+    return Response(content=adapter.dump_json(adapter.validate_python(rows)), media_type="application/json")
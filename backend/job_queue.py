@@ -0,0 +1,199 @@
+# Durable MongoDB-backed job queue with leases, heartbeats and retry backoff
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', '60'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+JOB_BACKOFF_SECONDS = 5
+JOB_BACKOFF_MAX_SECONDS = 300
+JOB_POLL_SECONDS = 2
+JOB_RETENTION_HOURS = 24  # Finished jobs are removed by a TTL index after this
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+WORKER_ID = f"{os.getpid()}_{uuid.uuid4().hex[:8]}"
+
+# kind -> async handler(payload) returning a JSON-serializable result
+_handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {}
+
+# Wakes idle workers in this process as soon as a job is enqueued here
+_job_available = asyncio.Event()
+
+def register_handler(kind: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]]):
+    """Register the coroutine that executes jobs of a given kind"""
+    _handlers[kind] = handler
+
+async def ensure_job_indexes(db):
+    """Create the indexes the queue relies on"""
+    await db.jobs.create_index("id", unique=True)
+    await db.jobs.create_index([("status", 1), ("run_after", 1)])
+    await db.jobs.create_index([("status", 1), ("lease_expires_at", 1)])
+    await db.jobs.create_index(
+        "idempotency_key",
+        unique=True,
+        partialFilterExpression={"idempotency_key": {"$type": "string"}}
+    )
+    await db.jobs.create_index("expires_at", expireAfterSeconds=0)
+
+async def enqueue_job(kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> dict:
+    """Enqueue a job; re-enqueueing with the same idempotency key returns the original job"""
+    from server import db
+
+    now = datetime.now(timezone.utc)
+    job = {
+        "id": f"job_{uuid.uuid4().hex[:12]}",
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": JOB_MAX_ATTEMPTS,
+        "run_after": now,
+        "lease_expires_at": None,
+        "worker_id": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    if idempotency_key:
+        job["idempotency_key"] = f"{kind}:{idempotency_key}"
+
+    try:
+        await db.jobs.insert_one(job)
+    except DuplicateKeyError:
+        existing = await db.jobs.find_one({"idempotency_key": job["idempotency_key"]}, {"_id": 0, "payload": 0})
+        if existing:
+            return existing
+        raise
+
+    _job_available.set()
+    job.pop("_id", None)
+    job.pop("payload")
+    return job
+
+async def get_job(job_id: str) -> Optional[dict]:
+    """Fetch a job's status and result (without its payload)"""
+    from server import db
+    return await db.jobs.find_one({"id": job_id}, {"_id": 0, "payload": 0})
+
+async def claim_job(db) -> Optional[dict]:
+    """Atomically lease the next runnable job (queued and due, or running with an expired lease)"""
+    now = datetime.now(timezone.utc)
+    return await db.jobs.find_one_and_update(
+        {"$or": [
+            {"status": "queued", "run_after": {"$lte": now}},
+            {"status": "running", "lease_expires_at": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": WORKER_ID,
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "started_at": now,
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("run_after", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+async def _heartbeat(db, job_id: str):
+    """Extend the lease while the job is running"""
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        result = await db.jobs.update_one(
+            {"id": job_id, "worker_id": WORKER_ID, "status": "running"},
+            {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)}}
+        )
+        if result.matched_count == 0:
+            logger.warning(f"Lost lease on job {job_id}")
+            return
+
+async def run_job(db, job: dict):
+    """Execute a claimed job and record success, retry or failure"""
+    handler = _handlers.get(job["kind"])
+    heartbeat = asyncio.create_task(_heartbeat(db, job["id"]))
+    owned = {"id": job["id"], "worker_id": WORKER_ID}
+
+    try:
+        if not handler:
+            raise ValueError(f"No handler registered for job kind '{job['kind']}'")
+        if job["attempts"] > job.get("max_attempts", JOB_MAX_ATTEMPTS):
+            # Reclaimed after its worker died on the final attempt
+            raise RuntimeError("Worker lease expired on final attempt")
+        result = await handler(job["payload"])
+
+        now = datetime.now(timezone.utc)
+        await db.jobs.update_one(owned, {
+            "$set": {
+                "status": "succeeded",
+                "result": result,
+                "error": None,
+                "finished_at": now,
+                "updated_at": now,
+                "expires_at": now + timedelta(hours=JOB_RETENTION_HOURS)
+            },
+            "$unset": {"payload": ""}
+        })
+        logger.info(f"Job {job['id']} ({job['kind']}) succeeded")
+    except asyncio.CancelledError:
+        # Worker shutdown: hand the job back immediately instead of waiting for the lease to expire,
+        # without counting the interrupted run as an attempt
+        await db.jobs.update_one(owned, {
+            "$set": {"status": "queued", "run_after": datetime.now(timezone.utc)},
+            "$inc": {"attempts": -1}
+        })
+        raise
+    except Exception as e:
+        error = getattr(e, "detail", None) or str(e)
+        now = datetime.now(timezone.utc)
+        if job["attempts"] < job.get("max_attempts", JOB_MAX_ATTEMPTS):
+            delay = min(JOB_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1), JOB_BACKOFF_MAX_SECONDS)
+            update = {"status": "queued", "run_after": now + timedelta(seconds=delay), "error": error, "updated_at": now}
+            logger.warning(f"Job {job['id']} attempt {job['attempts']} failed, retrying in {delay}s: {error}")
+        else:
+            update = {
+                "status": "failed",
+                "error": error,
+                "finished_at": now,
+                "updated_at": now,
+                "expires_at": now + timedelta(hours=JOB_RETENTION_HOURS)
+            }
+            logger.error(f"Job {job['id']} failed after {job['attempts']} attempts: {error}")
+        await db.jobs.update_one(owned, {"$set": update})
+    finally:
+        heartbeat.cancel()
+
+async def worker_loop(db):
+    """Claim and run jobs until cancelled"""
+    while True:
+        try:
+            job = await claim_job(db)
+        except Exception as e:
+            logger.error(f"Failed to claim job: {e}")
+            job = None
+
+        if not job:
+            _job_available.clear()
+            try:
+                await asyncio.wait_for(_job_available.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        await run_job(db, job)
+
+def start_workers(db, count: int) -> List[asyncio.Task]:
+    """Start a pool of job workers in the running event loop"""
+    logger.info(f"Starting {count} job workers ({WORKER_ID})")
+    return [asyncio.create_task(worker_loop(db)) for _ in range(count)]
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, HTTPException, status, Header, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+import logging
+
+import job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+logger = logging.getLogger(__name__)
+
+MAX_JOB_FILE_BYTES = 15 * 1024 * 1024  # The payload is stored in the job document (16MB MongoDB limit)
+
+# ==================== ROUTES ====================
+
+@router.post("/ocr", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_ocr_job(
+    file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Queue OCR of an uploaded image or PDF; poll /api/jobs/{job_id} for the result"""
+    if file.size is not None and file.size > MAX_JOB_FILE_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+    contents = await file.read(MAX_JOB_FILE_BYTES + 1)
+    if len(contents) > MAX_JOB_FILE_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    try:
+        job = await job_queue.enqueue_job(
+            "ocr",
+            {"filename": file.filename, "content_type": file.content_type, "file_data": contents},
+            idempotency_key=idempotency_key
+        )
+        return {"job_id": job["id"], "status": job["status"]}
+    except Exception as e:
+        logger.error(f"Enqueue OCR job error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to queue OCR job")
+
+@router.post("/evaluate", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_evaluate_job(
+    answer_data: dict,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Queue evaluation of an answer script; accepts the same body as /api/answer/evaluate"""
+    try:
+        job = await job_queue.enqueue_job("evaluate", answer_data, idempotency_key=idempotency_key)
+        return {"job_id": job["id"], "status": job["status"]}
+    except Exception as e:
+        logger.error(f"Enqueue evaluate job error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to queue evaluation job")
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """Get a job's status, attempts, and result once finished"""
+    try:
+        job = await job_queue.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get job error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get job status")
+
+@router.get("/{job_id}/events")
+async def stream_job_status(job_id: str):
+    """Stream job status changes as Server-Sent Events until the job finishes"""
+    job = await job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_state = None
+        current = job
+        while current:
+            state = (current["status"], current.get("attempts"))
+            if state != last_state:
+                yield f"data: {json.dumps(current, default=str)}\n\n"
+                last_state = state
+            if current["status"] in job_queue.TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(1)
+            current = await job_queue.get_job(job_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
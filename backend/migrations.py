@@ -0,0 +1,82 @@
+# One-off data migrations
+#   python migrations.py dates     -- convert ISO-string timestamps to native BSON dates
+#   python migrations.py classes   -- link evaluations that only carry a class name to their class
+import asyncio
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Timestamp fields older versions of the API stored as ISO strings
+STRING_DATE_FIELDS: Dict[str, List[str]] = {
+    "syllabus": ["created_at"],
+    "answer_scripts": ["created_at"],
+    "evaluations": ["created_at", "updated_at"],
+    "feedback_logs": ["timestamp"]
+}
+
+async def migrate_string_dates(db) -> int:
+    """Rewrite string timestamps as dates in place (server-side, idempotent); returns documents changed"""
+    changed = 0
+    for collection, fields in STRING_DATE_FIELDS.items():
+        for field in fields:
+            result = await db[collection].update_many(
+                {field: {"$type": "string"}},
+                [{"$set": {field: {"$toDate": f"${field}"}}}]
+            )
+            if result.modified_count:
+                logger.info(f"Converted {result.modified_count} {collection}.{field} values to dates")
+            changed += result.modified_count
+    return changed
+
+async def backfill_class_ids(db) -> int:
+    """Set class_id on evaluations stored with only a class_name (idempotent); returns documents changed.
+
+    Only names that identify exactly one class are linked; ambiguous names are reported and left alone.
+    """
+    names = await db.evaluations.distinct("class_name", {
+        "class_id": {"$in": [None, ""]},
+        "class_name": {"$nin": [None, ""]}
+    })
+    if not names:
+        return 0
+    classes = await db.classes.aggregate([
+        {"$match": {"name": {"$in": names}}},
+        {"$group": {"_id": "$name", "ids": {"$addToSet": "$id"}}}
+    ]).to_list(None)
+    changed = 0
+    for cls in classes:
+        if len(cls['ids']) != 1:
+            logger.warning(f"Not linking evaluations of class '{cls['_id']}': {len(cls['ids'])} classes share the name")
+            continue
+        result = await db.evaluations.update_many(
+            {"class_id": {"$in": [None, ""]}, "class_name": cls['_id']},
+            {"$set": {"class_id": cls['ids'][0]}}
+        )
+        changed += result.modified_count
+    if changed:
+        logger.info(f"Linked {changed} evaluations to their class by name")
+    return changed
+
+MIGRATIONS = {
+    "dates": migrate_string_dates,
+    "classes": backfill_class_ids
+}
+
+if __name__ == "__main__":
+    import sys
+
+    from server import client, db
+
+    if len(sys.argv) != 2 or sys.argv[1] not in MIGRATIONS:
+        print(f"Usage: python migrations.py {{{'|'.join(MIGRATIONS)}}}")
+        sys.exit(1)
+
+    async def main():
+        try:
+            changed = await MIGRATIONS[sys.argv[1]](db)
+            print(f"Updated {changed} documents")
+        finally:
+            client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+# Opaque keyset (seek) pagination cursors for list endpoints
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 200
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    if isinstance(value, dict) and "$oid" in value:
+        return ObjectId(value["$oid"])
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort-key values of the last row of a page"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort-key values of a cursor; 400 if it was not produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("cursor size")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(sort: Sequence[Tuple[str, int]], cursor: Optional[str], nullable: bool = False) -> Dict[str, Any]:
+    """Mongo filter selecting the rows after `cursor` in `sort` order (empty without a cursor).
+
+    For sort [(a, -1), (b, -1)] and cursor (x, y) this is a < x OR (a == x AND b < y),
+    which an index on the same keys answers without skipping rows.
+
+    With `nullable`, sort fields may be null or missing: those sort before every other
+    value but never satisfy $lt/$gt, so they get explicit clauses.
+    """
+    if not cursor:
+        return {}
+    values = decode_cursor(cursor, len(sort))
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        prefix = {prev: values[j] for j, (prev, _) in enumerate(sort[:i])}
+        value = values[i]
+        if nullable and value is None:
+            # Nothing sorts below null; ascending, every non-null value follows it
+            if direction > 0:
+                clauses.append({**prefix, field: {"$ne": None}})
+            continue
+        clauses.append({**prefix, field: {"$lt" if direction < 0 else "$gt": value}})
+        if nullable and direction < 0 and field != "_id":
+            clauses.append({**prefix, field: None})
+    return {"$or": clauses}
+
+def next_cursor(rows: List[Dict[str, Any]], sort: Sequence[Tuple[str, int]], limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor([last.get(field) for field, _ in sort])
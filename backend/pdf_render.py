@@ -0,0 +1,36 @@
+# CPU-bound PDF page rendering, run in worker processes so OCR jobs use every core
+#   and never block the API's event loop
+import asyncio
+import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+RENDER_PROCESSES = int(os.environ.get('RENDER_PROCESSES', str(os.cpu_count() or 2)))
+RENDER_ZOOM = 3  # Rendering at 3x gives the OCR model enough detail
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def render_pdf_pages(contents: bytes) -> List[str]:
+    """Every page of a PDF as a base64 PNG"""
+    pages = []
+    with fitz.open(stream=contents, filetype="pdf") as doc:
+        for page in doc:
+            pix = page.get_pixmap(matrix=fitz.Matrix(RENDER_ZOOM, RENDER_ZOOM))
+            pages.append(base64.b64encode(pix.tobytes("png")).decode('utf-8'))
+    return pages
+
+async def render_pdf(contents: bytes) -> List[str]:
+    """render_pdf_pages in the shared process pool"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=RENDER_PROCESSES)
+    return await asyncio.get_running_loop().run_in_executor(_pool, render_pdf_pages, contents)
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
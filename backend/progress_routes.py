@@ -0,0 +1,228 @@
+from fastapi import APIRouter, HTTPException, Request, Header, Cookie
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+import asyncio
+import logging
+import math
+
+from auth_utils import get_current_teacher_id
+import response_cache
+import rollups
+
+router = APIRouter(prefix="/api/progress", tags=["progress"])
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+TREND_BUCKETS = {"day": 10, "month": 7}  # Prefix length of the YYYY-MM-DD bucket date
+
+# ==================== MODELS ====================
+
+class ScoreSummary(BaseModel):
+    count: int = 0
+    mean: Optional[float] = None
+    stddev: Optional[float] = None
+    percentiles: Dict[str, float] = {}
+    histogram: List[int] = []  # Evaluations per 5-point score bin, 0-100
+
+class SubjectProgress(ScoreSummary):
+    subject: Optional[str] = None
+
+class TrendPoint(BaseModel):
+    date: str
+    subject: Optional[str] = None
+    count: int
+    mean: float
+
+class StudentProgressRow(BaseModel):
+    student_id: str
+    name: Optional[str] = None
+    roll_number: Optional[str] = None
+    count: int = 0
+    mean: Optional[float] = None
+
+class ProgressReport(BaseModel):
+    scope: str
+    id: str
+    name: Optional[str] = None
+    overall: ScoreSummary
+    subjects: List[SubjectProgress]
+    trend: List[TrendPoint]
+    students: Optional[List[StudentProgressRow]] = None
+
+# ==================== HELPERS ====================
+
+def histogram_percentile(histogram: List[int], count: int, p: float) -> float:
+    """Score at percentile p, interpolated within its histogram bin"""
+    target = p / 100 * count
+    seen = 0
+    for i, n in enumerate(histogram):
+        if n and seen + n >= target:
+            return round((i + (target - seen) / n) * rollups.HISTOGRAM_BIN_WIDTH, 2)
+        seen += n
+    return 100.0
+
+def summarize(buckets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge progress buckets into count, mean, standard deviation, percentiles and histogram"""
+    count = sum(b['count'] for b in buckets)
+    if count == 0:
+        return {"count": 0}
+    score_sum = sum(b['score_sum'] for b in buckets)
+    square_sum = sum(b.get('score_sq_sum', 0) for b in buckets)
+    histogram = [0] * rollups.HISTOGRAM_BINS
+    for b in buckets:
+        for i, n in (b.get('histogram') or {}).items():
+            histogram[int(i)] += n
+    mean = score_sum / count
+    return {
+        "count": count,
+        "mean": round(mean, 2),
+        "stddev": round(math.sqrt(max(square_sum / count - mean * mean, 0.0)), 2),
+        "percentiles": {f"p{p}": histogram_percentile(histogram, count, p) for p in PERCENTILES},
+        "histogram": histogram
+    }
+
+def bucket_filter(subject: Optional[str], date_from: Optional[str], date_to: Optional[str]) -> Dict[str, Any]:
+    query = {}
+    if subject:
+        query["subject"] = subject
+    if date_from or date_to:
+        query["date"] = {}
+        if date_from:
+            query["date"]["$gte"] = date_from[:10]
+        if date_to:
+            query["date"]["$lte"] = date_to[:10]
+    return query
+
+async def build_report(db, scope: str, entity: Dict[str, Any], query: Dict[str, Any], bucket: str) -> Dict[str, Any]:
+    """Progress report for a student, section or class from its precomputed buckets.
+
+    The section/class summary covers evaluations graded while the student was in it;
+    the roster lists the current members with each student's full history.
+    """
+    loads = [db.progress_rollups.find({"scope": scope, "scope_id": entity['id'], **query}, {"_id": 0}).to_list(None)]
+    if scope != "student":
+        loads.append(db.students.find(
+            {f"{scope}_id": entity['id']},
+            {"_id": 0, "id": 1, "name": 1, "roll_number": 1}
+        ).sort("roll_number", 1).to_list(None))
+    results = await asyncio.gather(*loads)
+    buckets = results[0]
+
+    by_subject: Dict[Any, List[Dict[str, Any]]] = {}
+    trend: Dict[tuple, List[float]] = {}
+    for b in buckets:
+        by_subject.setdefault(b.get('subject'), []).append(b)
+        point = trend.setdefault((b['date'][:TREND_BUCKETS[bucket]], b.get('subject')), [0, 0.0])
+        point[0] += b['count']
+        point[1] += b['score_sum']
+
+    report = {
+        "scope": scope,
+        "id": entity['id'],
+        "name": entity.get('name'),
+        "overall": summarize(buckets),
+        "subjects": [
+            {"subject": subject, **summarize(subject_buckets)}
+            for subject, subject_buckets in sorted(by_subject.items(), key=lambda item: item[0] or "")
+        ],
+        "trend": [
+            {"date": date, "subject": subject, "count": count, "mean": round(total / count, 2)}
+            for (date, subject), (count, total) in sorted(trend.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+            if count
+        ]
+    }
+    if scope != "student":
+        roster = results[1]
+        # Per-student means for the current roster, from the student-scope buckets
+        member_stats = await db.progress_rollups.aggregate([
+            {"$match": {"scope": "student", "scope_id": {"$in": [student['id'] for student in roster]}, **query}},
+            {"$group": {"_id": "$scope_id", "count": {"$sum": "$count"}, "score_sum": {"$sum": "$score_sum"}}}
+        ]).to_list(None)
+        stats = {row['_id']: row for row in member_stats}
+        report["students"] = []
+        for student in roster:
+            row = stats.get(student['id'])
+            report["students"].append({
+                "student_id": student['id'],
+                "name": student.get('name'),
+                "roll_number": student.get('roll_number'),
+                "count": row['count'] if row else 0,
+                "mean": round(row['score_sum'] / row['count'], 2) if row and row['count'] else None
+            })
+    return report
+
+async def progress_response(request: Request, scope: str, collection: str, entity_id: str,
+                            subject: Optional[str], date_from: Optional[str], date_to: Optional[str],
+                            bucket: str, authorization: Optional[str], session_token: Optional[str]):
+    from server import db
+
+    if bucket not in TREND_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of: {', '.join(TREND_BUCKETS)}")
+    try:
+        teacher_id = await get_current_teacher_id(request, authorization, session_token)
+
+        entity = await db[collection].find_one({"id": entity_id, "teacher_id": teacher_id}, {"_id": 0, "id": 1, "name": 1})
+        if not entity:
+            raise HTTPException(status_code=404, detail=f"{scope.capitalize()} not found")
+
+        query = bucket_filter(subject, date_from, date_to)
+        # The report names the entity and lists the roster: renames and membership changes invalidate it
+        collections = ["evaluations", "students"] + ([collection] if collection != "students" else [])
+        return await response_cache.cached_json(
+            request, db, collections,
+            lambda: build_report(db, scope, entity, query, bucket),
+            ProgressReport
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get {scope} progress error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get {scope} progress")
+
+# ==================== ROUTES ====================
+
+@router.get("/students/{student_id}", response_model=ProgressReport)
+async def get_student_progress(
+    student_id: str,
+    request: Request,
+    subject: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    bucket: str = "day",
+    authorization: Optional[str] = Header(None),
+    session_token: Optional[str] = Cookie(None)
+):
+    """Score distribution, per-subject summary and trend (by exam date) for one student"""
+    return await progress_response(request, "student", "students", student_id, subject, date_from, date_to,
+                                   bucket, authorization, session_token)
+
+@router.get("/sections/{section_id}", response_model=ProgressReport)
+async def get_section_progress(
+    section_id: str,
+    request: Request,
+    subject: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    bucket: str = "day",
+    authorization: Optional[str] = Header(None),
+    session_token: Optional[str] = Cookie(None)
+):
+    """Progress of a section, with each of its students' evaluation count and mean"""
+    return await progress_response(request, "section", "sections", section_id, subject, date_from, date_to,
+                                   bucket, authorization, session_token)
+
+@router.get("/classes/{class_id}", response_model=ProgressReport)
+async def get_class_progress(
+    class_id: str,
+    request: Request,
+    subject: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    bucket: str = "day",
+    authorization: Optional[str] = Header(None),
+    session_token: Optional[str] = Cookie(None)
+):
+    """Progress of a class, with each of its students' evaluation count and mean"""
+    return await progress_response(request, "class", "classes", class_id, subject, date_from, date_to,
+                                   bucket, authorization, session_token)
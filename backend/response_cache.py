@@ -0,0 +1,84 @@
+# Versioned response cache with strong ETags for read-heavy dashboard endpoints
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+import serialization
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_SIZE = 256  # Rendered responses kept in this process
+
+# (path, query params, collection versions) -> (etag, body, extra headers)
+_responses: "OrderedDict[Tuple, Tuple[str, bytes, Dict[str, str]]]" = OrderedDict()
+
+async def read_versions(db, collections: Iterable[str]) -> Tuple[int, ...]:
+    """Current write versions of the given collections, in the order given"""
+    collections = tuple(collections)
+    docs = await db.cache_versions.find({"_id": {"$in": list(collections)}}).to_list(len(collections))
+    versions = {doc["_id"]: doc["version"] for doc in docs}
+    return tuple(versions.get(name, 0) for name in collections)
+
+async def bump_versions(db, *collections: str):
+    """Invalidate cached responses that read from these collections (in every process)"""
+    for name in collections:
+        await db.cache_versions.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+# Content-coding suffix the compression middleware adds to ETags ("abc-gzip")
+_ENCODED_ETAG_RE = re.compile(r'-(?:gzip|br|zstd)"$')
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [_ENCODED_ETAG_RE.sub('"', tag.strip()) for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def cached_json(
+    request: Request,
+    db,
+    collections: Iterable[str],
+    compute: Callable[[], Awaitable[Any]],
+    response_model: Any = None,
+    headers_from: Optional[Callable[[Any], Dict[str, str]]] = None,
+    omit: Iterable[str] = ()
+) -> Response:
+    """Serve a JSON response from the cache while its collections are unchanged.
+
+    The body is rendered once per (endpoint, query, versions); repeat requests cost
+    a single version lookup, and a matching If-None-Match gets a bodyless 304.
+    Without a response_model the data is rendered directly with orjson; headers_from
+    derives extra response headers (e.g. a page cursor) from the raw rows before the
+    `omit` keys (fetched only for that purpose) are dropped from them.
+    """
+    versions = await read_versions(db, collections)
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())), versions)
+
+    entry = _responses.get(key)
+    if entry is None:
+        data = await compute()
+        extra_headers = headers_from(data) if headers_from else {}
+        if response_model is not None:
+            adapter = TypeAdapter(response_model)
+            body = adapter.dump_json(adapter.validate_python(data))
+        else:
+            for name in omit:
+                for row in data:
+                    row.pop(name, None)
+            body = serialization.dumps(data)
+        entry = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body, extra_headers)
+        _responses[key] = entry
+        if len(_responses) > RESPONSE_CACHE_SIZE:
+            _responses.popitem(last=False)
+    else:
+        _responses.move_to_end(key)
+
+    etag, body, extra_headers = entry
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", **extra_headers}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,144 @@
+# Negotiated response compression (zstd / brotli / gzip) for large JSON and text bodies
+#   brotli and zstd come from the `brotli` / `zstandard` requirements; gzip is the fallback without them
+import asyncio
+import gzip
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_OFFLOAD_BYTES = 256 * 1024  # Larger bodies are compressed in a worker thread
+
+# Only textual bodies are worth compressing; images, PDFs, ZIPs and event streams are skipped
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/"
+)
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+_encoders: Dict[str, Callable[[bytes], bytes]] = {"gzip": lambda body: gzip.compress(body, compresslevel=6)}
+if brotli is not None:
+    # Quality 5 keeps most of brotli's gain on base64 text at a fraction of the default's CPU
+    _encoders["br"] = lambda body: brotli.compress(body, quality=5)
+if zstandard is not None:
+    _zstd = zstandard.ZstdCompressor(level=3)
+    _encoders["zstd"] = _zstd.compress
+
+# Server preference when the client weights encodings equally
+PREFERENCE = ("zstd", "br", "gzip")
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding the client accepts (q > 0), or None"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    candidates = [
+        (weights.get(name, weights.get("*", 0.0)), -rank, name)
+        for rank, name in enumerate(PREFERENCE) if name in _encoders
+    ]
+    best = max(candidates, default=None)
+    return best[2] if best and best[0] > 0 else None
+
+def is_compressible(headers: Headers, size: int) -> bool:
+    if size < COMPRESSION_MIN_BYTES or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+async def compress(body: bytes, encoding: str) -> bytes:
+    encoder = _encoders[encoding]
+    if len(body) >= COMPRESSION_OFFLOAD_BYTES:
+        return await asyncio.to_thread(encoder, body)
+    return encoder(body)
+
+class CompressionMiddleware:
+    """Compress complete (non-streaming) responses with the negotiated encoding.
+
+    Adds Vary: Accept-Encoding, suffixes strong ETags with the encoding, and reports
+    the original size and compression time in X-Uncompressed-Length and Server-Timing.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        streaming = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if streaming or message["type"] != "http.response.body":
+                await send(message)
+                return
+            if message.get("more_body", False):
+                # Streaming responses (SSE, exports) are passed through untouched
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if is_compressible(headers, len(body)):
+                started = time.perf_counter()
+                compressed = await compress(body, encoding)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if len(compressed) < len(body):
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(compressed))
+                    headers["X-Uncompressed-Length"] = str(len(body))
+                    headers.append("Server-Timing", f"compress;dur={elapsed_ms:.1f};desc=\"{encoding}\"")
+                    etag = headers.get("etag")
+                    if etag and etag.startswith('"'):
+                        # A compressed representation needs its own strong validator
+                        headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+                    logger.debug(f"{scope['path']}: {len(body)} -> {len(compressed)} bytes ({encoding}, {elapsed_ms:.1f}ms)")
+                    body = compressed
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
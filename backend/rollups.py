@@ -0,0 +1,275 @@
+# Incrementally maintained analytics rollups
+#   python rollups.py rebuild   -- backfill rollups from all existing evaluations
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_KEYS = ("subject", "topic", "class_id", "section_id", "day")
+
+# Progress rollups: one bucket per (scope, entity, subject, exam day) with a score histogram
+PROGRESS_KEYS = ("scope", "scope_id", "subject", "date")
+PROGRESS_SCOPES = (("student", "student_id"), ("section", "section_id"), ("class", "class_id"))
+HISTOGRAM_BIN_WIDTH = 5  # Scores are 0-100; bin i holds [5i, 5i + 5), the last bin includes 100
+HISTOGRAM_BINS = 20
+
+def rollup_day(created_at: Any) -> str:
+    """UTC day bucket (YYYY-MM-DD) of an evaluation timestamp"""
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return created_at.date().isoformat()
+
+def rollup_key(evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "subject": evaluation.get('subject'),
+        "topic": evaluation.get('topic'),
+        "class_id": evaluation.get('class_id'),
+        "section_id": evaluation.get('section_id'),
+        "day": rollup_day(evaluation['created_at'])
+    }
+
+def score_bin(score: float) -> int:
+    return min(max(int(score // HISTOGRAM_BIN_WIDTH), 0), HISTOGRAM_BINS - 1)
+
+def progress_date(evaluation: Dict[str, Any]) -> str:
+    """Exam day (YYYY-MM-DD) of an evaluation, falling back to the day it was graded"""
+    exam_date = evaluation.get('exam_date')
+    if exam_date:
+        try:
+            return datetime.fromisoformat(str(exam_date)[:10]).date().isoformat()
+        except ValueError:
+            pass
+    return rollup_day(evaluation['created_at'])
+
+async def ensure_rollup_indexes(db):
+    await db.analytics_rollups.create_index([(key, 1) for key in ROLLUP_KEYS], unique=True)
+    await db.progress_rollups.create_index([(key, 1) for key in PROGRESS_KEYS], unique=True)
+
+def progress_key(scope: str, scope_id: str, evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    return {"scope": scope, "scope_id": scope_id, "subject": evaluation.get('subject'), "date": progress_date(evaluation)}
+
+def progress_ops(evaluations: List[Dict[str, Any]], sign: int = 1) -> List[UpdateOne]:
+    """Progress bucket updates adding (sign=1) or removing (sign=-1) evaluations"""
+    ops = []
+    for evaluation in evaluations:
+        score = float(evaluation['score'])
+        for scope, field in PROGRESS_SCOPES:
+            if not evaluation.get(field):
+                continue
+            ops.append(UpdateOne(
+                progress_key(scope, evaluation[field], evaluation),
+                {"$inc": {
+                    "count": sign,
+                    "score_sum": sign * score,
+                    "score_sq_sum": sign * score * score,
+                    f"histogram.{score_bin(score)}": sign
+                }},
+                upsert=sign > 0
+            ))
+    return ops
+
+def analytics_ops(evaluations: List[Dict[str, Any]], sign: int = 1) -> List[UpdateOne]:
+    """Bucket updates adding (sign=1) or removing (sign=-1) evaluations"""
+    ops = []
+    for evaluation in evaluations:
+        score = float(evaluation['score'])
+        has_feedback = sign < 0 and bool(evaluation.get('feedback'))
+        ops.append(UpdateOne(
+            rollup_key(evaluation),
+            {"$inc": {
+                "count": sign,
+                "score_sum": sign * score,
+                "score_sq_sum": sign * score * score,
+                "similarity_sum": sign * float(evaluation.get('similarity_score') or 0),
+                "chunks_sum": sign * int(evaluation.get('retrieved_chunks') or 0),
+                # New evaluations have no feedback yet; removed ones take theirs along
+                "feedback_count": -int(has_feedback),
+                "correct_count": -int(has_feedback and evaluation.get('is_correct') is True)
+            }},
+            upsert=sign > 0
+        ))
+    return ops
+
+async def apply_evaluation_rollups(db, evaluations: List[Dict[str, Any]]):
+    """Add newly stored evaluations to their rollup buckets (one bulk write)"""
+    if not evaluations:
+        return
+    rollup_ops = analytics_ops(evaluations)
+    student_ops = [
+        UpdateOne({"_id": name}, {"$setOnInsert": {"_id": name}}, upsert=True)
+        for name in {e.get('student_name') for e in evaluations}
+    ]
+    writes = [
+        db.analytics_rollups.bulk_write(rollup_ops, ordered=False),
+        db.analytics_students.bulk_write(student_ops, ordered=False)
+    ]
+    ops = progress_ops(evaluations)
+    if ops:
+        writes.append(db.progress_rollups.bulk_write(ops, ordered=False))
+    await asyncio.gather(*writes)
+
+async def remove_evaluation_rollups(db, evaluations: List[Dict[str, Any]]):
+    """Take deleted evaluations back out of their rollup buckets (mirror of apply_evaluation_rollups)"""
+    if not evaluations:
+        return
+    await db.analytics_rollups.bulk_write(analytics_ops(evaluations, sign=-1), ordered=False)
+    await db.analytics_rollups.delete_many({
+        "$or": [rollup_key(evaluation) for evaluation in evaluations],
+        "count": {"$lte": 0}
+    })
+
+    # A student stays in the distinct-student set while any evaluation still names them
+    names = list({e.get('student_name') for e in evaluations})
+    remaining = await db.evaluations.distinct("student_name", {"student_name": {"$in": names}})
+    gone = [name for name in names if name not in remaining]
+    if gone:
+        await db.analytics_students.delete_many({"_id": {"$in": gone}})
+
+    ops = progress_ops(evaluations, sign=-1)
+    if ops:
+        await db.progress_rollups.bulk_write(ops, ordered=False)
+        await db.progress_rollups.delete_many({"$or": [op._filter for op in ops], "count": {"$lte": 0}})
+
+async def apply_feedback_rollup(db, evaluation: Dict[str, Any], feedback: Optional[str], is_correct: bool):
+    """Account for teacher feedback on an evaluation, counting each evaluation at most once"""
+    had_feedback = bool(evaluation.get('feedback'))
+    has_feedback = bool(feedback)
+    was_correct = evaluation.get('is_correct') is True if had_feedback else False
+    inc = {
+        "feedback_count": int(has_feedback) - int(had_feedback),
+        "correct_count": int(has_feedback and is_correct is True) - int(was_correct)
+    }
+    if any(inc.values()):
+        # A missing bucket has not been backfilled yet; the backfill counts this feedback itself
+        await db.analytics_rollups.update_one(rollup_key(evaluation), {"$inc": inc})
+
+async def read_rollup_totals(db) -> List[Dict[str, Any]]:
+    """Per-subject sums over all rollup buckets"""
+    return await db.analytics_rollups.aggregate([
+        {"$group": {
+            "_id": "$subject",
+            "count": {"$sum": "$count"},
+            "score_sum": {"$sum": "$score_sum"},
+            "feedback_count": {"$sum": "$feedback_count"},
+            "correct_count": {"$sum": "$correct_count"},
+            "similarity_sum": {"$sum": "$similarity_sum"},
+            "chunks_sum": {"$sum": "$chunks_sum"}
+        }}
+    ]).to_list(None)
+
+async def rebuild_rollups(db):
+    """Recompute all rollups from the evaluations collection ($out keeps the existing indexes)"""
+    await db.evaluations.aggregate([
+        {"$group": {
+            "_id": {
+                "subject": "$subject",
+                "topic": "$topic",
+                "class_id": {"$ifNull": ["$class_id", None]},
+                "section_id": {"$ifNull": ["$section_id", None]},
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$toDate": "$created_at"}}}
+            },
+            "count": {"$sum": 1},
+            "score_sum": {"$sum": "$score"},
+            "score_sq_sum": {"$sum": {"$multiply": ["$score", "$score"]}},
+            "similarity_sum": {"$sum": {"$ifNull": ["$similarity_score", 0]}},
+            "chunks_sum": {"$sum": {"$ifNull": ["$retrieved_chunks", 0]}},
+            "feedback_count": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$feedback", ""]}, ""]}, 0, 1]}},
+            "correct_count": {"$sum": {"$cond": [
+                {"$and": [{"$ne": [{"$ifNull": ["$feedback", ""]}, ""]}, {"$eq": ["$is_correct", True]}]}, 1, 0
+            ]}}
+        }},
+        {"$replaceWith": {"$mergeObjects": ["$_id", "$$ROOT"]}},
+        {"$unset": "_id"},
+        {"$out": "analytics_rollups"}
+    ], allowDiskUse=True).to_list(None)
+    await ensure_rollup_indexes(db)
+
+    await db.evaluations.aggregate([
+        {"$group": {"_id": "$student_name"}},
+        {"$out": "analytics_students"}
+    ], allowDiskUse=True).to_list(None)
+
+    await rebuild_progress_rollups(db)
+
+    buckets = await db.analytics_rollups.count_documents({})
+    logger.info(f"Rebuilt analytics rollups: {buckets} buckets")
+    return buckets
+
+async def ensure_analytics_rollups(db):
+    """Backfill all rollups for evaluations stored before they were maintained"""
+    if await db.analytics_rollups.estimated_document_count() == 0 and await db.evaluations.estimated_document_count() > 0:
+        buckets = await rebuild_rollups(db)
+        logger.info(f"Backfilled analytics rollups ({buckets} buckets)")
+
+async def ensure_progress_rollups(db):
+    """Backfill progress buckets for evaluations stored before they were maintained"""
+    if await db.progress_rollups.estimated_document_count() == 0 and await db.evaluations.estimated_document_count() > 0:
+        await rebuild_progress_rollups(db)
+        logger.info("Backfilled progress rollups")
+
+async def rebuild_progress_rollups(db):
+    """Recompute the per-student/section/class progress buckets from the evaluations collection"""
+    graded_day = {"$dateToString": {"format": "%Y-%m-%d", "date": {"$toDate": "$created_at"}}}
+    exam_day = {"$dateToString": {"format": "%Y-%m-%d", "date": {"$dateFromString": {
+        "dateString": {"$substrCP": [{"$ifNull": ["$exam_date", ""]}, 0, 10]},
+        "onError": None,
+        "onNull": None
+    }}}}
+    await db.evaluations.aggregate([
+        {"$project": {
+            "_id": 0,
+            "subject": 1,
+            "score": 1,
+            "date": {"$ifNull": [exam_day, graded_day]},
+            "bin": {"$min": [{"$max": [{"$floor": {"$divide": ["$score", HISTOGRAM_BIN_WIDTH]}}, 0]}, HISTOGRAM_BINS - 1]},
+            "scopes": [{"scope": scope, "scope_id": f"${field}"} for scope, field in PROGRESS_SCOPES]
+        }},
+        {"$unwind": "$scopes"},
+        {"$match": {"scopes.scope_id": {"$nin": [None, ""]}}},
+        {"$group": {
+            "_id": {
+                "scope": "$scopes.scope",
+                "scope_id": "$scopes.scope_id",
+                "subject": "$subject",
+                "date": "$date",
+                "bin": {"$toString": {"$toInt": "$bin"}}
+            },
+            "count": {"$sum": 1},
+            "score_sum": {"$sum": "$score"},
+            "score_sq_sum": {"$sum": {"$multiply": ["$score", "$score"]}}
+        }},
+        {"$group": {
+            "_id": {key: f"$_id.{key}" for key in PROGRESS_KEYS},
+            "count": {"$sum": "$count"},
+            "score_sum": {"$sum": "$score_sum"},
+            "score_sq_sum": {"$sum": "$score_sq_sum"},
+            "histogram": {"$push": {"k": "$_id.bin", "v": "$count"}}
+        }},
+        {"$set": {"histogram": {"$arrayToObject": "$histogram"}}},
+        {"$replaceWith": {"$mergeObjects": ["$_id", "$$ROOT"]}},
+        {"$unset": "_id"},
+        {"$out": "progress_rollups"}
+    ], allowDiskUse=True).to_list(None)
+    await ensure_rollup_indexes(db)
+
+if __name__ == "__main__":
+    import sys
+
+    from server import client, db
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python rollups.py rebuild")
+        sys.exit(1)
+
+    async def main():
+        try:
+            buckets = await rebuild_rollups(db)
+            print(f"Rebuilt {buckets} rollup buckets")
+        finally:
+            client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,15 @@
+# Fast JSON rendering of MongoDB documents with orjson (no per-row model revalidation on reads)
+from typing import Any
+
+import orjson
+
+# Motor returns naive UTC datetimes; render them as ISO 8601 with a Z suffix like Pydantic does
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+def _default(value: Any) -> Any:
+    # ObjectId, Decimal128 and other BSON types
+    return str(value)
+
+def dumps(value: Any) -> bytes:
+    """Serialize documents (datetimes included) straight to JSON bytes"""
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
@@ -1,14 +1,18 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, Form, HTTPException, Request, Header, Cookie
+from fastapi import FastAPI, APIRouter, UploadFile, File, Form, HTTPException, Request, Header, Cookie, Query
 from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 import uuid
-from datetime import datetime, timezone
+import re
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
 import base64
 import asyncio
 from groq import AsyncGroq
@@ -16,12 +20,28 @@ import PyPDF2
 import fitz # PyMuPDF
 import io
 from contextlib import asynccontextmanager
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from response_compression import CompressionMiddleware
 
 # Import new route modules
 import auth_routes
 import class_routes
 import student_routes
-from contextlib import asynccontextmanager
+import batch_routes
+import job_routes
+import progress_routes
+import job_queue
+import feedback_index
+import rollups
+import response_cache
+import pagination
+import fieldsets
+import migrations
+import syllabus_catalog
+import exports
+import explorer
+import pdf_render
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -33,6 +53,49 @@ mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ.get('DB_NAME', 'eduassist_db')]
 
+# Background job workers in this process (0 = run them via worker.py instead)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', str(os.cpu_count() or 2)))
+
+async def ensure_indexes():
+    """Create indexes used by the API (idempotent)"""
+    try:
+        await job_queue.ensure_job_indexes(db)
+        await rollups.ensure_rollup_indexes(db)
+        # Keyset pagination: every list filter is followed by the (created_at, id) sort key
+        for prefix in ([], ["subject"], ["subject", "topic"], ["class_id"], ["class_id", "section_id"], ["student_id"]):
+            await db.evaluations.create_index([(field, 1) for field in prefix] + list(PAGE_SORT))
+        for prefix in ([], ["subject", "topic"]):
+            await db.syllabus.create_index([(field, 1) for field in prefix] + list(PAGE_SORT))
+        await db.staged_uploads.create_index("token", unique=True)
+        # Duplicate submissions (same content hash or Idempotency-Key) are rejected by these
+        for field in ("submission_hash", "idempotency_key"):
+            await db.answer_scripts.create_index(
+                field, unique=True, partialFilterExpression={field: {"$type": "string"}}
+            )
+        await db.evaluations.create_index("answer_script_id")
+        await db.staged_uploads.create_index("expires_at", expireAfterSeconds=0)
+        await db.feedback_logs.create_index([("timestamp", 1)])
+        # Class/section pages count members with one grouped aggregation over these
+        await db.sections.create_index([("class_id", 1), ("name", 1)])
+        await db.students.create_index("class_id")
+        await db.students.create_index("section_id")
+        await db.students.create_index([("teacher_id", 1), ("roll_number", 1)])
+        # Joined into the student roster by id
+        await db.classes.create_index("id")
+        await db.sections.create_index("id")
+    except Exception as e:
+        logger.error(f"Could not create indexes: {e}")
+    try:
+        # Roll numbers are unique per class; fails (and is reported) while older duplicates remain
+        await db.students.create_index([("class_id", 1), ("roll_number", 1)], unique=True)
+    except Exception as e:
+        logger.error(f"Could not create unique roll number index: {e}")
+    try:
+        # Batch items store their script under a pre-generated id; a retried store must not duplicate it
+        await db.answer_scripts.create_index("id", unique=True)
+    except Exception as e:
+        logger.error(f"Could not create unique answer script id index: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
@@ -41,10 +104,29 @@ async def lifespan(app: FastAPI):
         logger.info("Successfully connected to MongoDB.")
     except Exception as e:
         logger.error(f"Could not connect to MongoDB: {e}")
+    
+    await ensure_indexes()
+    try:
+        await migrations.migrate_string_dates(db)
+        await migrations.backfill_class_ids(db)
+        await syllabus_catalog.ensure_catalog(db)
+        await rollups.ensure_analytics_rollups(db)
+        await rollups.ensure_progress_rollups(db)
+    except Exception as e:
+        logger.error(f"Could not migrate existing data: {e}")
+    
+    # Pick up batch evaluations interrupted by a restart
+    batch_watcher = asyncio.create_task(batch_routes.resume_batches())
+    job_workers = job_queue.start_workers(db, JOB_WORKERS) if JOB_WORKERS > 0 else []
         
     yield
     
     # Shutdown logic
+    batch_watcher.cancel()
+    for worker in job_workers:
+        worker.cancel()
+    await asyncio.gather(*job_workers, return_exceptions=True)
+    pdf_render.shutdown()
     logger.info("Closing MongoDB connection...")
     client.close()
 
@@ -57,6 +139,24 @@ app = FastAPI(
 # Groq API Key (free tier: 14,400 requests/day)
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY', '')
 
+# Max concurrent Groq evaluation calls (shared across all requests)
+LLM_CONCURRENCY = int(os.environ.get('LLM_CONCURRENCY', '4'))
+llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# Number of similar teacher corrections injected into each evaluation prompt
+FEEDBACK_EXEMPLARS = int(os.environ.get('FEEDBACK_EXEMPLARS', '5'))
+# Fewer examples are needed once a score calibrator corrects the LLM's bias locally
+FEEDBACK_EXEMPLARS_CALIBRATED = int(os.environ.get('FEEDBACK_EXEMPLARS_CALIBRATED', '2'))
+
+# How long OCR'd page images stay staged for /answer/evaluate to reference by upload token
+UPLOAD_TOKEN_TTL_MINUTES = int(os.environ.get('UPLOAD_TOKEN_TTL_MINUTES', '60'))
+
+# How long a duplicate submission waits for the in-flight original to finish evaluating
+SUBMISSION_WAIT_SECONDS = 120
+# The evaluating request refreshes its claim; a claim silent for longer was abandoned and is taken over
+SUBMISSION_HEARTBEAT_SECONDS = 20
+SUBMISSION_CLAIM_STALE_SECONDS = 90
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -126,6 +226,7 @@ class Evaluation(BaseModel):
     section_name: Optional[str] = None # Name of section
     answer_text: Optional[str] = None # The student's actual answer text for context
     score: float
+    raw_score: Optional[float] = None  # LLM score before calibration
     max_score: float = 100.0
     explanation: str
     missing_keywords: List[str] = []
@@ -346,47 +447,33 @@ async def ocr_image(image_base64: str, skip_cleanup: bool = False) -> str:
         logger.error(f"Error in OCR: {e}")
         raise HTTPException(status_code=500, detail=f"OCR failed: {str(e)}")
 
-async def evaluate_answer(answer_text: str, syllabus_content: str, questions_text: Optional[str], subject: str, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+def parse_llm_json(response_content: str) -> Any:
+    """Parse a JSON payload from an LLM response, stripping markdown fences"""
+    import json
+    response_text = response_content.strip()
+    if '```json' in response_text:
+        response_text = response_text.split('```json')[1].split('```')[0].strip()
+    elif '```' in response_text:
+        response_text = response_text.split('```')[1].split('```')[0].strip()
+    return json.loads(response_text)
+
+async def build_feedback_examples(subject: str, topic: Optional[str], query_text: str, k: int = FEEDBACK_EXEMPLARS, feedback_version: Optional[int] = None) -> str:
+    """Return the compiled adaptive-learning prompt block with the teacher corrections most similar to the answer"""
+    try:
+        query_embedding = await get_embeddings(query_text)
+        return await feedback_index.feedback_block(subject, topic, query_embedding, k, min_version=feedback_version)
+    except Exception as e:
+        logger.warning(f"Failed to fetch feedback logs: {e}")
+        return ""
+
+async def evaluate_answer(answer_text: str, syllabus_content: str, questions_text: Optional[str], subject: str, topic: Optional[str] = None, feedback_examples: Optional[str] = None) -> List[Dict[str, Any]]:
     """Evaluate answer using Groq (Llama 3.3 70B) with multi-question detection and adaptive learning"""
     try:
         client = AsyncGroq(api_key=GROQ_API_KEY)
         
         # === ADAPTIVE LEARNING: Fetch Teacher Feedback ===
-        feedback_examples = ""
-        try:
-            # First try: Query for recent teacher feedback in this subject + topic
-            feedback_query = {"subject": subject}
-            if topic:
-                feedback_query["topic"] = topic
-            
-            past_logs = await db.feedback_logs.find(feedback_query).sort("timestamp", -1).limit(8).to_list(8)
-            
-            # Fallback: If no topic-specific feedback, get subject-wide feedback
-            if not past_logs and topic:
-                logger.info(f"No topic feedback for '{topic}', falling back to subject '{subject}'")
-                past_logs = await db.feedback_logs.find({"subject": subject}).sort("timestamp", -1).limit(8).to_list(8)
-            
-            if past_logs:
-                logger.info(f"Retrieved {len(past_logs)} feedback logs for subject '{subject}' and topic '{topic}'")
-                feedback_examples = "\nCRITICAL: FOLLOW THESE PREVIOUS TEACHER CORRECTIONS\n"
-                feedback_examples += "You have been inconsistent in the past. Below are examples of how the TEACHER wants you to grade. ADAPT YOUR SCORING IMMEDIATELY to match the 'Teacher Corrected Score' logic:\n"
-                for log in past_logs:
-                    if log.get('answer_text') and log.get('feedback'):
-                        # Keep it concise but include the question
-                        ans = log.get('answer_text', '')
-                        if len(ans) > 200: ans = ans[:200] + "..."
-                        
-                        feedback_examples += f"\n[PAST CORRECTION]\n"
-                        feedback_examples += f"- FOR QUESTION: {log.get('question')}\n"
-                        feedback_examples += f"- STUDENT ANSWER SNIPPET: {ans}\n"
-                        feedback_examples += f"- YOUR WRONG SCORE: {log.get('ai_score')}\n"
-                        feedback_examples += f"- TEACHER'S CORRECT SCORE: {log.get('teacher_score')}\n"
-                        feedback_examples += f"- TEACHER'S RULE: {log.get('feedback')}\n"
-                feedback_examples += "\nURGENT: If the current evaluation contains similar questions or answers, APPLY THE TEACHER'S RULE ABOVE. Do not repeat your previous scoring mistakes.\n"
-            else:
-                logger.info(f"No existing feedback logs found for subject '{subject}' - topic '{topic}'")
-        except Exception as e:
-            logger.warning(f"Failed to fetch feedback logs: {e}")
+        if feedback_examples is None:
+            feedback_examples = await build_feedback_examples(subject, topic, answer_text)
 
         system_message = f"""You are an ELITE Educational Evaluator. 
         
@@ -442,27 +529,15 @@ async def evaluate_answer(answer_text: str, syllabus_content: str, questions_tex
         response_content = response.choices[0].message.content
         
         # Parse JSON response
-        import json
-        response_text = response_content.strip()
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0].strip()
-        
-        eval_results = json.loads(response_text)
+        eval_results = parse_llm_json(response_content)
         if not isinstance(eval_results, list):
             eval_results = [eval_results]
             
         return eval_results
     except Exception as e:
+        # Never store a placeholder grade: the submission is released so it can be retried
         logger.error(f"Error in evaluation: {e}")
-        return [{
-            "question": "General Evaluation",
-            "score": 50.0,
-            "explanation": f"Evaluation error: {str(e)}",
-            "missing_keywords": [],
-            "matched_concepts": []
-        }]
+        raise HTTPException(status_code=502, detail=f"Evaluation failed, please retry: {e}")
 
 
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
@@ -534,6 +609,240 @@ async def rag_retrieve(query_text: str, syllabus_doc: dict, top_k: int = 5) -> D
     }
 
 
+# Question markers at the start of a line: "1.", "Q1)", "Q.2:", "Question 3 -", "Ans 4."
+QUESTION_MARKER_RE = re.compile(
+    r'^[ \t]*(?P<prefix>(?:q(?:uestion)?|ans(?:wer)?|a)[ \t]*\.?[ \t]*)?(?P<num>\d{1,2})[ \t]*[.):\-]',
+    re.IGNORECASE | re.MULTILINE
+)
+
+def split_numbered_blocks(text: str, prefer_prefixed: bool = False) -> List[Dict[str, Any]]:
+    """Split text into blocks at question markers.
+    
+    With prefer_prefixed, if any marker carries an explicit prefix (Q/Ans), bare
+    numbers are treated as list items inside an answer and ignored. The markers
+    used must be strictly increasing: a repeated or decreasing number means a
+    numbered list inside an answer can't be told apart from the question numbers,
+    so the text is not split at all (empty list).
+    """
+    markers = list(QUESTION_MARKER_RE.finditer(text or ''))
+    if prefer_prefixed and any(m.group('prefix') for m in markers):
+        markers = [m for m in markers if m.group('prefix')]
+    
+    numbers = [int(m.group('num')) for m in markers]
+    if any(later <= earlier for earlier, later in zip(numbers, numbers[1:])):
+        return []
+    
+    blocks = []
+    for i, m in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        body = text[m.end():end].strip()
+        if body:
+            blocks.append({'number': numbers[i], 'text': body})
+    return blocks
+
+def segment_answer_script(answer_text: str, questions_text: Optional[str]) -> List[Dict[str, Any]]:
+    """Locally segment an answer script into per-question answers using the question paper.
+    
+    Returns an empty list when the script cannot be confidently split into at least
+    two answered questions, or when an answer marker matches no question; callers
+    then fall back to whole-script evaluation.
+    """
+    if not questions_text or not answer_text:
+        return []
+    
+    questions = {q['number']: q['text'] for q in split_numbered_blocks(questions_text)}
+    if len(questions) < 2:
+        return []
+    
+    answers = split_numbered_blocks(answer_text, prefer_prefixed=True)
+    if any(a['number'] not in questions for a in answers):
+        # A number beyond the paper is more likely a list item than a question
+        return []
+    segments = [
+        {'number': a['number'], 'question': questions[a['number']], 'answer': a['text']}
+        for a in answers
+    ]
+    return segments if len(segments) >= 2 else []
+
+async def evaluate_question(question: str, answer_text: str, syllabus_content: str, subject: str, topic: Optional[str] = None, feedback_examples: str = "") -> Dict[str, Any]:
+    """Evaluate a single question/answer pair using Groq (Llama 3.3 70B)"""
+    try:
+        client = AsyncGroq(api_key=GROQ_API_KEY)
+        
+        system_message = f"""You are an ELITE Educational Evaluator. 
+        
+        {feedback_examples}
+
+        TASK: 
+        1. Evaluate the student's answer to the given question using the SYLLABUS as a reference.
+        2. Match the TEACHER'S GRADING STYLE provided in the examples above.
+
+        You MUST respond ONLY with a single valid JSON object:
+        {{
+          "score": <number 0-100>,
+          "explanation": "<detailed pedagogical feedback>",
+          "missing_keywords": ["kw1", "kw2"],
+          "matched_concepts": ["concept1"]
+        }}
+
+        STRICT RULES:
+        - If teacher examples show they are more lenient than you, increase your scores.
+        - If teacher examples show they are stricter, decrease your scores.
+        - Respond ONLY with JSON. No conversational filler."""
+        
+        topic_info = f" on the topic '{topic}'" if topic else ""
+        prompt = f"""Evaluate this student answer for {subject}{topic_info}.
+        
+        QUESTION:
+        {question}
+        
+        REFERENCE MATERIAL/SYLLABUS (use for grading accuracy):
+        {syllabus_content}
+        
+        STUDENT ANSWER:
+        {answer_text}
+        
+        Respond ONLY with a JSON object containing: score, explanation, missing_keywords, and matched_concepts."""
+        
+        response = await client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1024,
+            temperature=0.3
+        )
+        
+        result = parse_llm_json(response.choices[0].message.content)
+        if isinstance(result, list):
+            result = result[0] if result else {}
+        result['question'] = question
+        return result
+    except Exception as e:
+        logger.error(f"Error evaluating question '{question[:50]}': {e}")
+        raise HTTPException(status_code=502, detail=f"Evaluation of question '{question[:50]}' failed, please retry: {e}")
+
+async def retrieve_script_contexts(answer_text: str, syllabus_doc: dict) -> List[Dict[str, Any]]:
+    """Segment a script against the question paper and retrieve a RAG context per question.
+    
+    A script that cannot be segmented yields a single context with question=None
+    covering the whole answer text.
+    """
+    segments = segment_answer_script(answer_text, syllabus_doc.get('questions_text'))
+    if not segments:
+        segments = [{'number': None, 'question': None, 'answer': answer_text}]
+    
+    rag_results = await asyncio.gather(*(rag_retrieve(segment['answer'], syllabus_doc, top_k=5) for segment in segments))
+    return [{**segment, 'rag': rag_result} for segment, rag_result in zip(segments, rag_results)]
+
+async def grade_script_contexts(contexts: List[Dict[str, Any]], questions_text: Optional[str], subject: str, topic: Optional[str] = None, feedback_version: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Run LLM evaluation for each retrieved context concurrently and merge the results.
+    
+    Every result carries its own answer_text and RAG statistics, and each call gets
+    the teacher corrections most similar to its own answer. Passing a feedback_version
+    snapshot reuses the cached feedback blocks without checking MongoDB.
+    
+    Raw LLM scores are corrected by the subject/topic calibrator learned from teacher
+    feedback; once it is active, prompts carry fewer feedback examples.
+    """
+    calibrator = None
+    try:
+        calibrator = await feedback_index.get_calibrator(subject, topic, feedback_version)
+    except Exception as e:
+        logger.warning(f"Failed to load score calibrator: {e}")
+    k = FEEDBACK_EXEMPLARS_CALIBRATED if calibrator else FEEDBACK_EXEMPLARS
+    
+    def with_rag(result: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        result['raw_score'] = float(result['score'])
+        if calibrator:
+            result['score'] = calibrator.apply(result['raw_score'])
+        result['answer_text'] = context['answer']
+        result['similarity_score'] = context['rag']['similarity_score']
+        result['retrieved_chunks'] = context['rag']['num_chunks_used']
+        result['chunk_scores'] = context['rag'].get('chunk_scores', [])
+        return result
+    
+    # Unsegmented script: one call that detects and grades every question
+    if len(contexts) == 1 and contexts[0]['question'] is None:
+        context = contexts[0]
+        feedback_examples = await build_feedback_examples(subject, topic, context['answer'], k, feedback_version=feedback_version)
+        async with llm_semaphore:
+            results = await evaluate_answer(
+                context['answer'],
+                context['rag']['context'],
+                questions_text,
+                subject,
+                topic,
+                feedback_examples=feedback_examples
+            )
+        return [with_rag(res, context) for res in results]
+    
+    async def grade(context: Dict[str, Any]) -> Dict[str, Any]:
+        feedback_examples = await build_feedback_examples(
+            subject, topic, feedback_index.feedback_embedding_text(context['question'], context['answer']), k,
+            feedback_version=feedback_version
+        )
+        async with llm_semaphore:
+            result = await evaluate_question(
+                context['question'],
+                context['answer'],
+                context['rag']['context'],
+                subject,
+                topic,
+                feedback_examples=feedback_examples
+            )
+        return with_rag(result, context)
+    
+    results = await asyncio.gather(*(grade(context) for context in contexts))
+    logger.info(f"Graded {len(results)} questions concurrently")
+    return list(results)
+
+
+# ==================== LIST HELPERS ====================
+
+# Sort key shared by the keyset-paginated list endpoints
+PAGE_SORT = [("created_at", -1), ("id", -1)]
+
+def page_headers(rows: List[Dict[str, Any]], limit: int) -> Dict[str, str]:
+    """X-Next-Cursor header for a page of rows sorted by PAGE_SORT (absent on the last page)"""
+    cursor = pagination.next_cursor(rows, PAGE_SORT, limit)
+    return {"X-Next-Cursor": cursor} if cursor else {}
+
+def date_range_filter(field: str, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    """Range filter on a native date field"""
+    date_range = {}
+    if start:
+        date_range["$gte"] = start
+    if end:
+        date_range["$lte"] = end
+    return {field: date_range}
+
+def evaluation_filter(subject: Optional[str] = None, topic: Optional[str] = None, class_id: Optional[str] = None,
+                      section_id: Optional[str] = None, student_id: Optional[str] = None,
+                      date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                      reviewed: Optional[bool] = None) -> Dict[str, Any]:
+    """Mongo filter for the evaluation list/export query parameters"""
+    query = {
+        key: value for key, value in (
+            ("subject", subject), ("topic", topic), ("class_id", class_id),
+            ("section_id", section_id), ("student_id", student_id)
+        ) if value
+    }
+    if date_from or date_to:
+        query["$and"] = [date_range_filter("created_at", date_from, date_to)]
+    if reviewed is not None:
+        query["feedback"] = {"$nin": [None, ""]} if reviewed else {"$in": [None, ""]}
+    return query
+
+async def syllabus_changed(subject_keys: List[Optional[str]]):
+    """Refresh the subject catalog entries and cached responses after a syllabus write"""
+    subject_keys = [key for key in subject_keys if key is not None]
+    writes = [response_cache.bump_versions(db, "syllabus")]
+    if subject_keys:
+        writes.append(syllabus_catalog.rebuild(db, subject_keys))
+    await asyncio.gather(*writes)
+
 # ==================== API ROUTES ==
 
 @api_router.get("/")
@@ -563,10 +872,10 @@ async def upload_syllabus(input: SyllabusCreate):
         )
         
         # Store in MongoDB
-        doc = syllabus.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
+        doc = syllabus_catalog.apply_keys(syllabus.model_dump())
         
         await db.syllabus.insert_one(doc)
+        await syllabus_changed([doc['subject_key']])
         
         logger.info(f"Syllabus uploaded: {syllabus.id}")
         return syllabus
@@ -636,10 +945,10 @@ async def upload_syllabus_file(
         )
         
         # Store in MongoDB
-        doc = syllabus.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
+        doc = syllabus_catalog.apply_keys(syllabus.model_dump())
         
         await db.syllabus.insert_one(doc)
+        await syllabus_changed([doc['subject_key']])
         
         logger.info(f"Syllabus file uploaded: {syllabus.id}")
         return {
@@ -655,28 +964,53 @@ async def upload_syllabus_file(
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/syllabus", response_model=List[Syllabus])
-async def get_all_syllabus():
-    """Get all syllabus entries (optimized - excludes large fields)"""
-    try:
+async def get_all_syllabus(
+    request: Request,
+    subject: Optional[str] = None,
+    topic: Optional[str] = None,
+    limit: int = 1000,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get syllabus entries, newest first (excludes large fields, cached until the next syllabus write).
+    
+    Keyset-paginated: pass the X-Next-Cursor response header back as `cursor`.
+    `fields` (comma-separated) limits the response to those fields.
+    """
+    limit = max(1, min(limit, 1000))
+    selected = fieldsets.parse_fields(fields, Syllabus)
+    query = {}
+    if subject:
+        query["subject"] = subject
+    if topic:
+        query["topic"] = topic
+    query.update(pagination.keyset_filter(PAGE_SORT, cursor))
+    
+    async def load():
         # Exclude large fields for list view
-        syllabus_list = await db.syllabus.find(
-            {}, 
-            {"_id": 0, "embeddings": 0, "chunks": 0, "question_paper": 0, "original_file_b64": 0}
-        ).limit(1000).to_list(1000)
-        
-        for item in syllabus_list:
-            if isinstance(item['created_at'], str):
-                item['created_at'] = datetime.fromisoformat(item['created_at'])
-            # Add empty arrays for excluded fields to match model
-            if 'chunks' not in item:
-                item['chunks'] = []
-            if 'embeddings' not in item:
-                item['embeddings'] = []
-        
-        return syllabus_list
+        return await db.syllabus.find(
+            query, 
+            fieldsets.projection(
+                selected,
+                extra=("created_at",),
+                exclude={"embeddings": 0, "chunks": 0, "question_paper": 0, "original_file_b64": 0, "subject_key": 0, "topic_key": 0},
+                model=Syllabus
+            )
+        ).sort(PAGE_SORT).limit(limit).to_list(limit)
+    
+    try:
+        # Documents were validated on write; the projection fills in defaults for older ones
+        return await response_cache.cached_json(
+            request, db, ["syllabus"], load,
+            headers_from=lambda rows: page_headers(rows, limit),
+            omit=fieldsets.unrequested(selected, ("created_at",))
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching syllabus: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.get("/syllabus/{syllabus_id}", response_model=Syllabus)
 async def get_syllabus_by_id(syllabus_id: str):
     """Get a specific syllabus entry by ID (includes question paper and original file)"""
@@ -685,9 +1019,6 @@ async def get_syllabus_by_id(syllabus_id: str):
         if not item:
             raise HTTPException(status_code=404, detail="Syllabus not found")
         
-        if isinstance(item['created_at'], str):
-            item['created_at'] = datetime.fromisoformat(item['created_at'])
-            
         return item
     except HTTPException:
         raise
@@ -702,6 +1033,16 @@ async def update_syllabus(syllabus_id: str, update_data: SyllabusUpdate):
         data = {k: v for k, v in update_data.model_dump().items() if v is not None}
         if not data:
             raise HTTPException(status_code=400, detail="No data provided to update")
+        
+        if 'subject' in data or 'topic' in data:
+            existing = await db.syllabus.find_one({"id": syllabus_id}, {"_id": 0, "subject": 1, "topic": 1, "subject_key": 1})
+            if not existing:
+                raise HTTPException(status_code=404, detail="Syllabus not found")
+            # Renaming moves the syllabus to another catalog key
+            data.update(syllabus_catalog.apply_keys({
+                "subject": data.get('subject', existing.get('subject')),
+                "topic": data.get('topic', existing.get('topic'))
+            }))
             
         result = await db.syllabus.update_one(
             {"id": syllabus_id},
@@ -710,6 +1051,7 @@ async def update_syllabus(syllabus_id: str, update_data: SyllabusUpdate):
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Syllabus not found")
+        await syllabus_changed([existing.get('subject_key'), data['subject_key']] if 'subject_key' in data else [])
             
         logger.info(f"Syllabus updated: {syllabus_id}")
         return {"success": True, "message": "Syllabus updated successfully"}
@@ -723,10 +1065,11 @@ async def update_syllabus(syllabus_id: str, update_data: SyllabusUpdate):
 async def delete_syllabus(syllabus_id: str):
     """Delete a syllabus entry"""
     try:
-        result = await db.syllabus.delete_one({"id": syllabus_id})
+        deleted = await db.syllabus.find_one_and_delete({"id": syllabus_id}, {"_id": 0, "subject_key": 1})
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(status_code=404, detail="Syllabus not found")
+        await syllabus_changed([deleted.get('subject_key')])
         
         logger.info(f"Syllabus deleted: {syllabus_id}")
         return {"success": True, "message": "Syllabus deleted successfully"}
@@ -744,6 +1087,7 @@ async def delete_subject(subject: str):
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Subject not found")
+        await syllabus_changed([syllabus_catalog.normalize(subject)])
         
         logger.info(f"Subject deleted: {subject}, count: {result.deleted_count}")
         return {
@@ -756,177 +1100,382 @@ async def delete_subject(subject: str):
         logger.error(f"Error deleting subject: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def ocr_answer_file(contents: bytes, filename: str, content_type: Optional[str] = None) -> Dict[str, Any]:
+    """Run OCR on an uploaded answer script (image or multi-page PDF)"""
+    # Check if it's a PDF
+    if content_type == 'application/pdf' or (filename or '').lower().endswith('.pdf'):
+        # Rendering (3x) and PNG encoding are CPU-bound: they run in the render process pool
+        all_page_images = await pdf_render.render_pdf(contents)
+        preview_base64 = all_page_images[0] if all_page_images else ""
+        total_text_parts = []
+        for i, page_base64 in enumerate(all_page_images):
+            # Extract RAW text only (no cleanup yet to preserve multi-page context)
+            page_raw_text = await ocr_image(page_base64, skip_cleanup=True)
+            total_text_parts.append(f"--- PAGE {i+1} ---\n{page_raw_text}")
+        
+        full_raw_text = "\n\n".join(total_text_parts)
+        
+        # Perform a SINGLE coherent cleanup for the entire document
+        logger.info("Performing coherent LLM cleanup for multi-page document...")
+        combined_text = await perform_llm_cleanup(full_raw_text)
+        
+        return {
+            "ocr_text": combined_text,
+            "image_base64": preview_base64,
+            "all_pages": all_page_images
+        }
+    
+    # Original image processing logic
+    image_base64 = base64.b64encode(contents).decode('utf-8')
+    ocr_text = await ocr_image(image_base64)
+    
+    return {
+        "ocr_text": ocr_text,
+        "image_base64": image_base64,
+        "all_pages": [image_base64] # Consistent return for single images
+    }
+
+async def stage_answer_pages(all_pages: List[str], ttl_minutes: int = UPLOAD_TOKEN_TTL_MINUTES) -> str:
+    """Keep OCR'd page images server-side (as binary) and return the token that references them"""
+    token = f"upl_{uuid.uuid4().hex}"
+    now = datetime.now(timezone.utc)
+    await db.staged_uploads.insert_one({
+        "token": token,
+        "pages": [base64.b64decode(page) for page in all_pages],
+        "created_at": now,
+        "expires_at": now + timedelta(minutes=ttl_minutes)
+    })
+    return token
+
+async def run_answer_ocr(contents: bytes, filename: str, content_type: Optional[str] = None, include_pages: bool = False) -> Dict[str, Any]:
+    """OCR an answer script and stage its pages; the page images are only returned on request"""
+    result = await ocr_answer_file(contents, filename, content_type)
+    staged = {
+        "ocr_text": result['ocr_text'],
+        "upload_token": await stage_answer_pages(result['all_pages']),
+        "page_count": len(result['all_pages'])
+    }
+    if include_pages:
+        staged.update(image_base64=result['image_base64'], all_pages=result['all_pages'])
+    return staged
+
+async def resolve_upload_token(answer_data: dict) -> dict:
+    """Fill in the page images of a submission that references staged pages by upload_token"""
+    token = answer_data.get('upload_token')
+    if not token:
+        return answer_data
+    staged = await db.staged_uploads.find_one(
+        {"token": token, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+        {"_id": 0, "pages": 1}
+    )
+    if not staged:
+        raise HTTPException(status_code=404, detail="Upload not found or expired, please run OCR again")
+    pages = [base64.b64encode(page).decode('utf-8') for page in staged['pages']]
+    return {**answer_data, "image_base64": pages[0] if pages else None, "all_pages": pages}
+
+async def resolve_syllabus(subject: str, topic: Optional[str]) -> dict:
+    """Find the syllabus used to grade a subject/topic via the normalized catalog (raises 404 if none exists)"""
+    for _ in range(2):
+        syllabus_id = await syllabus_catalog.resolve(db, subject, topic)
+        if not syllabus_id:
+            break
+        syllabus = await db.syllabus.find_one({"id": syllabus_id}, {"_id": 0})
+        if syllabus:
+            return syllabus
+        # Deleted by another process since the catalog was cached
+        syllabus_catalog.invalidate()
+    
+    raise HTTPException(status_code=404, detail=f"No syllabus found for subject: {subject}. Please ensure the subject name matches what you uploaded in 'Manage Subjects'.")
+
+async def store_answer_script(answer_data: dict, submission_hash: Optional[str] = None, idempotency_key: Optional[str] = None,
+                              script_id: Optional[str] = None) -> AnswerScript:
+    """Persist an answer script submission (raises DuplicateKeyError if its hash, key or script_id was already stored)"""
+    image_base64 = answer_data.get('image_base64')
+    
+    # Ensure all_pages is at least the primary image if it was sent empty
+    all_pages = answer_data.get('all_pages')
+    if not all_pages or len(all_pages) == 0:
+        all_pages = [image_base64] if image_base64 else []
+
+    answer_script = AnswerScript(
+        **({"id": script_id} if script_id else {}),
+        student_id=answer_data.get('student_id'),
+        class_id=answer_data.get('class_id'),
+        section_id=answer_data.get('section_id'),
+        student_name=answer_data.get('student_name'),
+        subject=answer_data.get('subject'),
+        topic=answer_data.get('topic') or 'General',
+        image_data=image_base64, # Thumbnail
+        all_pages=all_pages, # Store all pages
+        ocr_text=answer_data.get('ocr_text'),
+        exam_date=answer_data.get('exam_date')
+    )
+    
+    answer_doc = answer_script.model_dump()
+    if submission_hash:
+        answer_doc['submission_hash'] = submission_hash
+        answer_doc['claimed_at'] = datetime.now(timezone.utc)
+    if idempotency_key:
+        answer_doc['idempotency_key'] = idempotency_key
+    await db.answer_scripts.insert_one(answer_doc)
+    return answer_script
+
+def submission_fingerprint(answer_data: dict) -> str:
+    """Content hash identifying a re-submission of the same script for the same student and exam"""
+    ocr_text = " ".join((answer_data.get('ocr_text') or '').split()).casefold()
+    key = [
+        answer_data.get('student_id') or answer_data.get('student_name'),
+        answer_data.get('subject'),
+        answer_data.get('topic') or 'General',
+        answer_data.get('exam_date'),
+        ocr_text
+    ]
+    return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+SUBMISSION_FIELDS = {"_id": 0, "id": 1, "evaluation_ids": 1, "submission_hash": 1}
+
+async def find_submission(submission_hash: str, idempotency_key: Optional[str]) -> Optional[dict]:
+    """Previous submission with this Idempotency-Key or content (422 if the key was used for other content)"""
+    projection = SUBMISSION_FIELDS
+    if idempotency_key:
+        script = await db.answer_scripts.find_one({"idempotency_key": idempotency_key}, projection)
+        if script:
+            if script.get('submission_hash') != submission_hash:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different submission")
+            return script
+    return await db.answer_scripts.find_one({"submission_hash": submission_hash}, projection)
+
+async def discard_submission(answer_script_id: str, counted: bool):
+    """Delete a failed submission's script and any evaluations it already stored.
+    
+    `counted` says whether those evaluations were added to the rollups.
+    """
+    evaluations = await db.evaluations.find({"answer_script_id": answer_script_id}, EVALUATION_ROLLUP_FIELDS).to_list(None)
+    await asyncio.gather(
+        db.answer_scripts.delete_one({"id": answer_script_id}),
+        db.evaluations.delete_many({"answer_script_id": answer_script_id})
+    )
+    if evaluations:
+        writes = [response_cache.bump_versions(db, "evaluations")]
+        if counted:
+            writes.append(rollups.remove_evaluation_rollups(db, evaluations))
+        await asyncio.gather(*writes)
+
+async def take_over_claim(script_id: str) -> Optional[dict]:
+    """Atomically claim an unfinished submission whose evaluating process stopped refreshing it"""
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=SUBMISSION_CLAIM_STALE_SECONDS)
+    return await db.answer_scripts.find_one_and_update(
+        {
+            "id": script_id,
+            "evaluation_ids": None,
+            "$or": [
+                {"claimed_at": {"$lt": stale_before}},
+                # Claims stored before they carried a heartbeat
+                {"claimed_at": None, "created_at": {"$lt": stale_before}}
+            ]
+        },
+        {"$set": {"claimed_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "all_pages": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def keep_claim(script_id: str):
+    """Refresh a submission claim until cancelled, so waiting duplicates don't take it over"""
+    while True:
+        await asyncio.sleep(SUBMISSION_HEARTBEAT_SECONDS)
+        await db.answer_scripts.update_one(
+            {"id": script_id, "evaluation_ids": None},
+            {"$set": {"claimed_at": datetime.now(timezone.utc)}}
+        )
+
+async def submission_evaluations(script: dict) -> Union[List[Evaluation], dict]:
+    """Stored evaluations of a previous submission, waiting while it is still being evaluated.
+    
+    If the evaluating process stopped, the claim is taken over and the script
+    document is returned instead, for this request to evaluate.
+    """
+    deadline = asyncio.get_running_loop().time() + SUBMISSION_WAIT_SECONDS
+    while script.get('evaluation_ids') is None:
+        taken = await take_over_claim(script['id'])
+        if taken:
+            logger.info(f"Taking over abandoned submission {script['id']}")
+            return taken
+        if asyncio.get_running_loop().time() > deadline:
+            raise HTTPException(status_code=409, detail="An identical submission is still being evaluated")
+        await asyncio.sleep(1)
+        script = await db.answer_scripts.find_one({"id": script['id']}, SUBMISSION_FIELDS)
+        if not script:
+            raise HTTPException(status_code=409, detail="An identical submission failed, please submit again")
+    return await load_evaluations(script['evaluation_ids'])
+
+async def load_evaluations(evaluation_ids: List[str]) -> List[Evaluation]:
+    docs = await db.evaluations.find({"id": {"$in": evaluation_ids}}, {"_id": 0}).to_list(None)
+    by_id = {doc['id']: doc for doc in docs}
+    return [Evaluation(**by_id[eval_id]) for eval_id in evaluation_ids if eval_id in by_id]
+
+async def store_evaluations(answer_script: AnswerScript, answer_data: dict, eval_results: List[Dict[str, Any]]) -> List[Evaluation]:
+    """Persist one Evaluation per graded question of an answer script"""
+    saved_evaluations = []
+    eval_docs = []
+    for res in eval_results:
+        evaluation = Evaluation(
+            answer_script_id=answer_script.id,
+            student_id=answer_script.student_id,
+            class_id=answer_script.class_id,
+            section_id=answer_script.section_id,
+            student_name=answer_script.student_name,
+            subject=answer_script.subject,
+            topic=answer_script.topic,
+            question=res.get('question'),
+            score=res['score'],
+            raw_score=res.get('raw_score'),
+            explanation=res['explanation'],
+            exam_date=answer_script.exam_date,
+            class_name=answer_data.get('class_name'),
+            section_name=answer_data.get('section_name'),
+            answer_text=res.get('answer_text', answer_script.ocr_text),
+            missing_keywords=res.get('missing_keywords', []),
+            matched_concepts=res.get('matched_concepts', []),
+            similarity_score=res.get('similarity_score', 0.0),
+            retrieved_chunks=res.get('retrieved_chunks', 0),
+            student_script_image=answer_script.image_data # Added for review preview
+        )
+        
+        eval_doc = evaluation.model_dump()
+        eval_doc['rag_chunk_scores'] = res.get('chunk_scores', [])
+        saved_evaluations.append(evaluation)
+        eval_docs.append(eval_doc)
+    
+    if not eval_docs:
+        return saved_evaluations
+    # Store every question's evaluation in one round trip, then update the derived data
+    await db.evaluations.insert_many(eval_docs, ordered=True)
+    await asyncio.gather(
+        rollups.apply_evaluation_rollups(db, eval_docs),
+        response_cache.bump_versions(db, "evaluations")
+    )
+    return saved_evaluations
+
 @api_router.post("/answer/ocr")
-async def process_ocr(file: UploadFile = File(...)):
-    """Process uploaded image or PDF and extract text using OCR"""
+async def process_ocr(file: UploadFile = File(...), include_pages: bool = False):
+    """Process uploaded image or PDF and extract text using OCR.
+    
+    The page images stay on the server; pass the returned upload_token to
+    /answer/evaluate instead of sending them back.
+    """
     try:
         # Read file contents
         contents = await file.read()
-        
-        # Check if it's a PDF
-        if file.content_type == 'application/pdf' or file.filename.lower().endswith('.pdf'):
-            import fitz
-            from PIL import Image
-            
-            doc = fitz.open(stream=contents, filetype="pdf")
-            total_text_parts = []
-            preview_base64 = ""
-            
-            all_page_images = []
-            for i, page in enumerate(doc):
-                # Convert page to image (rendering at 3x for higher precision OCR)
-                pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                
-                # Convert PIL image to base64
-                buffered = io.BytesIO()
-                img.save(buffered, format="PNG")
-                page_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-                
-                all_page_images.append(page_base64)
-                if i == 0:
-                    preview_base64 = page_base64
-                
-                # Extract RAW text only (no cleanup yet to preserve multi-page context)
-                page_raw_text = await ocr_image(page_base64, skip_cleanup=True)
-                total_text_parts.append(f"--- PAGE {i+1} ---\n{page_raw_text}")
-            
-            doc.close()
-            full_raw_text = "\n\n".join(total_text_parts)
-            
-            # Perform a SINGLE coherent cleanup for the entire document
-            logger.info("Performing coherent LLM cleanup for multi-page document...")
-            combined_text = await perform_llm_cleanup(full_raw_text)
-            
-            return {
-                "success": True,
-                "ocr_text": combined_text,
-                "image_base64": preview_base64,
-                "all_pages": all_page_images
-            }
-        
-        # Original image processing logic
-        image_base64 = base64.b64encode(contents).decode('utf-8')
-        ocr_text = await ocr_image(image_base64)
-        
-        return {
-            "success": True,
-            "ocr_text": ocr_text,
-            "image_base64": image_base64,
-            "all_pages": [image_base64] # Consistent return for single images
-        }
+        result = await run_answer_ocr(contents, file.filename, file.content_type, include_pages)
+        return {"success": True, **result}
     except Exception as e:
         logger.error(f"Error in OCR processing: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/answer/evaluate", response_model=List[Evaluation])
-async def evaluate_answer_script(answer_data: dict):
-    """Evaluate an answer script using RAG pipeline (supports multiple questions per page)"""
+async def run_answer_evaluation(answer_data: dict, idempotency_key: Optional[str] = None) -> List[Evaluation]:
+    """Resolve the syllabus, evaluate every question of a script, and persist the results.
+    
+    A re-submission of the same content (or Idempotency-Key) returns the stored
+    evaluations instead of running RAG and the LLM again, or takes over the
+    evaluation if the request that claimed it stopped.
+    """
+    student_name = answer_data.get('student_name')
+    subject = answer_data.get('subject')
+    topic = answer_data.get('topic') or 'General' # Normalize empty topic
+    ocr_text = answer_data.get('ocr_text')
+    
+    submission_hash = submission_fingerprint(answer_data)
+    existing = await find_submission(submission_hash, idempotency_key)
+    if existing:
+        logger.info(f"Duplicate submission for {student_name}, returning stored evaluations")
+        return await previous_submission(existing, answer_data)
+    
+    # Staged pages and the syllabus (Smart Lookup) are independent
+    answer_data, syllabus = await asyncio.gather(
+        resolve_upload_token(answer_data),
+        resolve_syllabus(subject, topic)
+    )
+    
+    # Store the answer script (the unique indexes make this the claim on the submission)
+    # while RAG retrieval runs and the subject's feedback index is loaded
+    answer_script, contexts, feedback = await asyncio.gather(
+        store_answer_script(answer_data, submission_hash, idempotency_key),
+        retrieve_script_contexts(ocr_text, syllabus),
+        feedback_index.get_subject_index(subject),
+        return_exceptions=True
+    )
+    if isinstance(answer_script, DuplicateKeyError):
+        existing = await find_submission(submission_hash, idempotency_key)
+        if not existing:
+            raise HTTPException(status_code=409, detail="An identical submission failed, please submit again")
+        return await previous_submission(existing, answer_data)
+    if isinstance(answer_script, BaseException):
+        raise answer_script
+    
+    return await evaluate_claimed_script(answer_script, answer_data, syllabus, contexts, feedback)
+
+async def previous_submission(existing: dict, answer_data: dict) -> List[Evaluation]:
+    """Evaluations of an earlier identical submission, finishing it here if it was abandoned"""
+    result = await submission_evaluations(existing)
+    if isinstance(result, list):
+        return result
+    
+    answer_script = AnswerScript(**result)
+    # The stopped process may have stored the evaluations without recording them on the script
+    stored = await db.evaluations.find({"answer_script_id": answer_script.id}, {"_id": 0, "id": 1}).to_list(None)
+    if stored:
+        evaluation_ids = [doc['id'] for doc in stored]
+        await db.answer_scripts.update_one({"id": answer_script.id}, {"$set": {"evaluation_ids": evaluation_ids}})
+        return await load_evaluations(evaluation_ids)
+    
+    syllabus = await resolve_syllabus(answer_script.subject, answer_script.topic)
+    contexts, feedback = await asyncio.gather(
+        retrieve_script_contexts(answer_script.ocr_text, syllabus),
+        feedback_index.get_subject_index(answer_script.subject),
+        return_exceptions=True
+    )
+    return await evaluate_claimed_script(answer_script, answer_data, syllabus, contexts, feedback)
+
+async def evaluate_claimed_script(answer_script: AnswerScript, answer_data: dict, syllabus: dict,
+                                  contexts: Any, feedback: Any) -> List[Evaluation]:
+    """Grade and store a script this request holds the claim on (released again if anything fails)"""
+    heartbeat = asyncio.create_task(keep_claim(answer_script.id))
+    saved_evaluations = None
     try:
-        student_name = answer_data.get('student_name')
-        student_id = answer_data.get('student_id')
-        class_id = answer_data.get('class_id')
-        section_id = answer_data.get('section_id')
-        subject = answer_data.get('subject')
-        topic = answer_data.get('topic') or 'General' # Normalize empty topic
-        ocr_text = answer_data.get('ocr_text')
-        image_base64 = answer_data.get('image_base64')
-        exam_date = answer_data.get('exam_date')
-        class_name = answer_data.get('class_name')
-        section_name = answer_data.get('section_name')
-        
-        # Find relevant syllabus - Smart Lookup
-        # 1. Try exact subject + topic
-        query = {"subject": subject}
-        if topic and topic != 'General':
-            query["topic"] = topic
-            syllabus = await db.syllabus.find_one(query, {"_id": 0})
-        else:
-            syllabus = None
-
-        # 2. Fallback: Try just subject (gets the first available syllabus/notes for this subject)
-        if not syllabus:
-            logger.info(f"Syllabus for {subject} with topic {topic} not found, falling back to subject-only search")
-            syllabus = await db.syllabus.find_one({"subject": subject}, {"_id": 0})
-        
-        if not syllabus:
-            # Final check: Maybe a case-insensitive match for the subject?
-            logger.info(f"Syllabus for {subject} still not found, trying case-insensitive match")
-            syllabus = await db.syllabus.find_one({"subject": {"$regex": f"^{subject}$", "$options": "i"}}, {"_id": 0})
-
-        if not syllabus:
-            raise HTTPException(status_code=404, detail=f"No syllabus found for subject: {subject}. Please ensure the subject name matches exactly what you uploaded in 'Manage Subjects'.")
-        
-        # Ensure all_pages is at least the primary image if it was sent empty
-        all_pages = answer_data.get('all_pages')
-        if not all_pages or len(all_pages) == 0:
-            all_pages = [image_base64] if image_base64 else []
-
-        # Store answer script
-        answer_script = AnswerScript(
-            student_id=student_id,
-            class_id=class_id,
-            section_id=section_id,
-            student_name=student_name,
-            subject=subject,
-            topic=topic,
-            image_data=image_base64, # Thumbnail
-            all_pages=all_pages, # Store all pages
-            ocr_text=ocr_text,
-            exam_date=exam_date
+        if isinstance(contexts, BaseException):
+            raise contexts
+        # A failed feedback load is retried (and tolerated) per question while grading
+        feedback_version = None if isinstance(feedback, BaseException) else feedback.version
+        
+        # ===== PER-QUESTION LLM EVALUATION =====
+        eval_results = await grade_script_contexts(
+            contexts, syllabus.get('questions_text'), answer_script.subject, answer_script.topic, feedback_version
         )
         
-        answer_doc = answer_script.model_dump()
-        answer_doc['created_at'] = answer_doc['created_at'].isoformat()
-        await db.answer_scripts.insert_one(answer_doc)
-        
-        # ===== RAG RETRIEVAL =====
-        rag_result = await rag_retrieve(ocr_text, syllabus, top_k=5)
-        
-        # ===== LLM EVALUATION (MULTI-QUESTION) =====
-        eval_results = await evaluate_answer(
-            ocr_text, 
-            rag_result['context'],
-            syllabus.get('questions_text'),
-            subject, 
-            topic
+        saved_evaluations = await store_evaluations(answer_script, answer_data, eval_results)
+        await db.answer_scripts.update_one(
+            {"id": answer_script.id},
+            {"$set": {"evaluation_ids": [e.id for e in saved_evaluations]}}
         )
+    except BaseException:
+        # Release the claim (and drop anything already stored) so the submission can be retried
+        await discard_submission(answer_script.id, counted=saved_evaluations is not None)
+        raise
+    finally:
+        heartbeat.cancel()
         
-        saved_evaluations = []
-        for res in eval_results:
-            evaluation = Evaluation(
-                answer_script_id=answer_script.id,
-                student_id=student_id,
-                class_id=class_id,
-                section_id=section_id,
-                student_name=student_name,
-                subject=subject,
-                topic=topic,
-                question=res.get('question'),
-                score=res['score'],
-                explanation=res['explanation'],
-                exam_date=exam_date,
-                class_name=class_name,
-                section_name=section_name,
-                answer_text=ocr_text,
-                missing_keywords=res.get('missing_keywords', []),
-                matched_concepts=res.get('matched_concepts', []),
-                similarity_score=rag_result['similarity_score'],
-                retrieved_chunks=rag_result['num_chunks_used'],
-                student_script_image=image_base64 # Added for review preview
-            )
-            
-            # Store evaluation
-            eval_doc = evaluation.model_dump()
-            eval_doc['created_at'] = eval_doc['created_at'].isoformat()
-            if 'updated_at' in eval_doc and eval_doc['updated_at']:
-                eval_doc['updated_at'] = eval_doc['updated_at'].isoformat()
-            eval_doc['rag_chunk_scores'] = rag_result.get('chunk_scores', [])
-            await db.evaluations.insert_one(eval_doc)
-            saved_evaluations.append(evaluation)
-            
-        logger.info(f"RAG Evaluation completed for {student_name}: {len(saved_evaluations)} items evaluated")
-        return saved_evaluations
+    logger.info(f"RAG Evaluation completed for {answer_script.student_name}: {len(saved_evaluations)} items evaluated")
+    return saved_evaluations
+
+@api_router.post("/answer/evaluate", response_model=List[Evaluation])
+async def evaluate_answer_script(answer_data: dict, idempotency_key: Optional[str] = Header(None)):
+    """Evaluate an answer script using RAG pipeline (supports multiple questions per page).
+    
+    Page images are referenced by the upload_token from /answer/ocr (image_base64 and
+    all_pages are still accepted inline).
+    """
+    try:
+        return await run_answer_evaluation(answer_data, idempotency_key)
     except HTTPException:
         raise
     except Exception as e:
@@ -934,26 +1483,127 @@ async def evaluate_answer_script(answer_data: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/evaluations", response_model=List[Evaluation])
-async def get_evaluations():
-    """Get all evaluations (optimized with pagination)"""
-    try:
+async def get_evaluations(
+    request: Request,
+    subject: Optional[str] = None,
+    topic: Optional[str] = None,
+    class_id: Optional[str] = None,
+    section_id: Optional[str] = None,
+    student_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    reviewed: Optional[bool] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get evaluations newest first, filtered server-side (cached until the next evaluation write).
+    
+    Keyset-paginated on (created_at, id): pass the X-Next-Cursor response header back
+    as `cursor` to fetch the next page at constant cost however deep the teacher scrolls.
+    `fields` (comma-separated) limits the response to those fields.
+    """
+    limit = max(1, min(limit, pagination.MAX_PAGE_SIZE))
+    selected = fieldsets.parse_fields(fields, Evaluation)
+    query = evaluation_filter(subject, topic, class_id, section_id, student_id, date_from, date_to, reviewed)
+    keyset = pagination.keyset_filter(PAGE_SORT, cursor)
+    if keyset:
+        query.setdefault("$and", []).append(keyset)
+    
+    async def load():
         # Fetch only needed fields (EXCLUDE large images for list performance)
-        evaluations = await db.evaluations.find(
-            {}, 
-            {"_id": 0, "student_script_image": 0} 
-        ).sort("created_at", -1).limit(1000).to_list(1000)
-        
-        for eval in evaluations:
-            if isinstance(eval['created_at'], str):
-                eval['created_at'] = datetime.fromisoformat(eval['created_at'])
-            if isinstance(eval.get('updated_at'), str):
-                eval['updated_at'] = datetime.fromisoformat(eval['updated_at'])
-        
-        return evaluations
+        return await db.evaluations.find(
+            query, 
+            fieldsets.projection(selected, extra=("created_at",), exclude={"student_script_image": 0, "rag_chunk_scores": 0}, model=Evaluation)
+        ).sort(PAGE_SORT).limit(limit).to_list(limit)
+    
+    try:
+        # Documents were validated on write; the projection fills in defaults for older ones
+        return await response_cache.cached_json(
+            request, db, ["evaluations"], load,
+            headers_from=lambda rows: page_headers(rows, limit),
+            omit=fieldsets.unrequested(selected, ("created_at",))
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching evaluations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/evaluations/stats")
+async def get_evaluation_stats(
+    request: Request,
+    subject: Optional[str] = None,
+    topic: Optional[str] = None,
+    class_id: Optional[str] = None,
+    section_id: Optional[str] = None,
+    student_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    reviewed: Optional[bool] = None
+):
+    """Totals over every evaluation matching the list filters (not just the loaded pages)"""
+    query = evaluation_filter(subject, topic, class_id, section_id, student_id, date_from, date_to, reviewed)
+    
+    async def load():
+        rows = await db.evaluations.aggregate([
+            {"$match": query},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "reviewed": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$feedback", ""]}, ""]}, 0, 1]}},
+                "avg_score": {"$avg": "$score"}
+            }}
+        ]).to_list(1)
+        stats = rows[0] if rows else {"total": 0, "reviewed": 0, "avg_score": None}
+        return {
+            "total": stats['total'],
+            "pending": stats['total'] - stats['reviewed'],
+            "reviewed": stats['reviewed'],
+            "avg_score": round(stats['avg_score'], 1) if stats['avg_score'] is not None else None
+        }
+    
+    try:
+        return await response_cache.cached_json(request, db, ["evaluations"], load)
+    except Exception as e:
+        logger.error(f"Error fetching evaluation stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Columns exported when `fields` is not given (the script image and RAG scores are never included by default)
+EXPORT_COLUMNS = (
+    "id", "created_at", "exam_date", "student_id", "student_name", "class_name", "section_name",
+    "subject", "topic", "question", "score", "raw_score", "max_score", "feedback_score", "is_correct", "feedback"
+)
+
+@api_router.get("/evaluations/export")
+async def export_evaluations(
+    format: str = "csv",
+    subject: Optional[str] = None,
+    topic: Optional[str] = None,
+    class_id: Optional[str] = None,
+    section_id: Optional[str] = None,
+    student_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    reviewed: Optional[bool] = None,
+    fields: Optional[str] = None
+):
+    """Stream every matching evaluation (newest first) as CSV or NDJSON.
+    
+    Rows are written as they are read from the cursor, so memory use does not grow
+    with the export size. `fields` (comma-separated) selects and orders the columns.
+    """
+    if format not in exports.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(exports.MEDIA_TYPES)}")
+    columns = fieldsets.parse_fields(fields, Evaluation, always=()) or EXPORT_COLUMNS
+    query = evaluation_filter(subject, topic, class_id, section_id, student_id, date_from, date_to, reviewed)
+    cursor = db.evaluations.find(query, fieldsets.projection(columns)).sort(PAGE_SORT).batch_size(exports.EXPORT_BATCH_SIZE)
+    return StreamingResponse(
+        exports.stream_rows(cursor, format, columns),
+        media_type=exports.MEDIA_TYPES[format],
+        headers=exports.attachment_headers("evaluations", format)
+    )
+
 @api_router.get("/evaluations/{evaluation_id}/full")
 async def get_evaluation_full(evaluation_id: str):
     """Get full evaluation details including ALL script pages"""
@@ -990,6 +1640,7 @@ async def submit_feedback(feedback: FeedbackSubmit):
         
         # Calculate accuracy
         ai_score = evaluation['score']
+        raw_score = evaluation['raw_score'] if evaluation.get('raw_score') is not None else ai_score
         teacher_score = feedback.teacher_score
         error = abs(ai_score - teacher_score)
         accuracy_percentage = max(0, 100 - error)
@@ -999,7 +1650,7 @@ async def submit_feedback(feedback: FeedbackSubmit):
             "feedback": feedback.feedback,
             "feedback_score": teacher_score,
             "is_correct": feedback.is_correct,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }
         
         result = await db.evaluations.update_one(
@@ -1010,6 +1661,8 @@ async def submit_feedback(feedback: FeedbackSubmit):
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Evaluation not found")
         
+        await rollups.apply_feedback_rollup(db, evaluation, feedback.feedback, feedback.is_correct)
+        
         # Log feedback for adaptive learning with detailed info
         feedback_log = {
             "id": str(uuid.uuid4()),
@@ -1019,6 +1672,7 @@ async def submit_feedback(feedback: FeedbackSubmit):
             "topic": evaluation.get('topic') or 'General', # Normalize topic
             "question": evaluation.get('question'), # Added specific question
             "ai_score": ai_score,
+            "raw_score": raw_score,
             "teacher_score": teacher_score,
             "score_difference": error,
             "accuracy_percentage": accuracy_percentage,
@@ -1028,11 +1682,22 @@ async def submit_feedback(feedback: FeedbackSubmit):
             "answer_text": evaluation.get('answer_text'),
             "matched_concepts": evaluation.get('matched_concepts', []),
             "missing_keywords": evaluation.get('missing_keywords', []),
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": datetime.now(timezone.utc)
         }
         
+        # Embed the corrected answer so evaluations can retrieve similar corrections
+        embedding = await get_embeddings(
+            feedback_index.feedback_embedding_text(feedback_log['question'], feedback_log['answer_text'])
+        )
+        feedback_log['embedding'] = embedding
+        
         await db.feedback_logs.insert_one(feedback_log)
         
+        # Invalidate compiled feedback blocks for this subject everywhere
+        feedback_version = await feedback_index.bump_version(feedback_log['subject'])
+        feedback_index.add_feedback(feedback_log['subject'], feedback_log, embedding, feedback_version)
+        await response_cache.bump_versions(db, "evaluations", "feedback_logs")
+        
         logger.info(f"Feedback submitted for evaluation: {feedback.evaluation_id}, accuracy: {accuracy_percentage}%")
         return {
             "success": True, 
@@ -1046,149 +1711,227 @@ async def submit_feedback(feedback: FeedbackSubmit):
         logger.error(f"Error submitting feedback: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/analytics", response_model=Analytics)
-async def get_analytics():
-    """Get performance analytics (optimized queries)"""
-    try:
-        # Get evaluations with only needed fields
-        evaluations = await db.evaluations.find(
-            {}, 
-            {"_id": 0, "score": 1, "student_name": 1, "subject": 1, "created_at": 1, "feedback": 1, "is_correct": 1, "similarity_score": 1, "retrieved_chunks": 1}
-        ).limit(5000).to_list(5000)
-        
-        if not evaluations:
-            return Analytics(
-                total_evaluations=0,
-                average_score=0.0,
-                total_students=0,
-                feedback_count=0,
-                model_accuracy=0.0,
-                subject_wise_stats={},
-                recent_trends=[]
-            )
-        
-        # Calculate metrics
-        total_evaluations = len(evaluations)
-        total_score = sum(e['score'] for e in evaluations)
-        average_score = total_score / total_evaluations if total_evaluations > 0 else 0
-        
-        unique_students = len(set(e['student_name'] for e in evaluations))
-        
-        feedback_count = sum(1 for e in evaluations if e.get('feedback'))
-        
-        avg_similarity = sum(e.get('similarity_score', 0) for e in evaluations) / total_evaluations
-        avg_chunks = sum(e.get('retrieved_chunks', 0) for e in evaluations) / total_evaluations
-        
-        # Calculate model accuracy based on feedback
-        correct_predictions = sum(1 for e in evaluations if e.get('is_correct') == True)
-        model_accuracy = (correct_predictions / feedback_count * 100) if feedback_count > 0 else 0
-        
-        # Subject-wise stats
-        subject_wise = {}
-        for eval in evaluations:
-            subject = eval['subject']
-            if subject not in subject_wise:
-                subject_wise[subject] = {'count': 0, 'total_score': 0, 'avg_score': 0}
-            subject_wise[subject]['count'] += 1
-            subject_wise[subject]['total_score'] += eval['score']
-        
-        for subject, stats in subject_wise.items():
-            stats['avg_score'] = stats['total_score'] / stats['count']
-        
-        # Recent trends (last 10 evaluations)
-        recent_trends = sorted(evaluations, key=lambda x: x.get('created_at', ''), reverse=True)[:10]
-        recent_trends_data = [
-            {
-                'student_name': e['student_name'],
-                'subject': e['subject'],
-                'score': e['score'],
-                'date': e.get('created_at', '')
-            }
-            for e in recent_trends
-        ]
-        
+async def load_analytics() -> Analytics:
+    """Compute performance analytics from the incrementally maintained rollups"""
+    subject_totals, total_students, recent_trends = await asyncio.gather(
+        rollups.read_rollup_totals(db),
+        db.analytics_students.estimated_document_count(),
+        db.evaluations.find(
+            {},
+            {"_id": 0, "student_name": 1, "subject": 1, "score": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(10).to_list(10)
+    )
+
+    total_evaluations = sum(s['count'] for s in subject_totals)
+    if total_evaluations == 0:
         return Analytics(
-            total_evaluations=total_evaluations,
-            average_score=round(average_score, 2),
-            total_students=unique_students,
-            feedback_count=feedback_count,
-            model_accuracy=round(model_accuracy, 2),
-            avg_similarity=round(avg_similarity, 3),
-            avg_chunks=round(avg_chunks, 1),
-            subject_wise_stats=subject_wise,
-            recent_trends=recent_trends_data
+            total_evaluations=0,
+            average_score=0.0,
+            total_students=0,
+            feedback_count=0,
+            model_accuracy=0.0,
+            subject_wise_stats={},
+            recent_trends=[]
         )
+
+    # Calculate metrics
+    average_score = sum(s['score_sum'] for s in subject_totals) / total_evaluations
+    feedback_count = sum(s['feedback_count'] for s in subject_totals)
+    correct_count = sum(s['correct_count'] for s in subject_totals)
+    avg_similarity = sum(s['similarity_sum'] for s in subject_totals) / total_evaluations
+    avg_chunks = sum(s['chunks_sum'] for s in subject_totals) / total_evaluations
+
+    # Calculate model accuracy based on feedback
+    model_accuracy = (correct_count / feedback_count * 100) if feedback_count > 0 else 0
+
+    # Subject-wise stats
+    subject_wise = {
+        s['_id']: {
+            'count': s['count'],
+            'total_score': s['score_sum'],
+            'avg_score': s['score_sum'] / s['count']
+        }
+        for s in subject_totals if s['count'] > 0
+    }
+
+    recent_trends_data = [
+        {
+            'student_name': e['student_name'],
+            'subject': e['subject'],
+            'score': e['score'],
+            'date': e.get('created_at', '')
+        }
+        for e in recent_trends
+    ]
+
+    return Analytics(
+        total_evaluations=total_evaluations,
+        average_score=round(average_score, 2),
+        total_students=total_students,
+        feedback_count=feedback_count,
+        model_accuracy=round(model_accuracy, 2),
+        avg_similarity=round(avg_similarity, 3),
+        avg_chunks=round(avg_chunks, 1),
+        subject_wise_stats=subject_wise,
+        recent_trends=recent_trends_data
+    )
+
+@api_router.get("/analytics", response_model=Analytics)
+async def get_analytics(request: Request):
+    """Get performance analytics (cached until evaluations or feedback change)"""
+    try:
+        return await response_cache.cached_json(request, db, ["evaluations", "feedback_logs"], load_analytics, Analytics)
     except Exception as e:
         logger.error(f"Error fetching analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# $dateTrunc units, finest first, with their (shortest) length in seconds
+PERFORMANCE_BUCKETS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 28 * 86400,
+    "quarter": 90 * 86400,
+    "year": 365 * 86400
+}
+
+def performance_bucket(bucket: str, first: datetime, last: datetime, max_points: int) -> str:
+    """The requested unit, or the finest coarser one that covers first..last in max_points buckets"""
+    span = (last - first).total_seconds()
+    units = list(PERFORMANCE_BUCKETS)
+    for unit in units[units.index(bucket):]:
+        if span // PERFORMANCE_BUCKETS[unit] + 1 <= max_points:
+            return unit
+    return units[-1]
+
 @api_router.get("/model/performance")
-async def get_model_performance():
-    """Get model performance metrics over time"""
+async def get_model_performance(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "day",
+    max_points: int = 200,
+    rolling_window: int = 20
+):
+    """Get model performance over time as a time-bucketed, downsampled series.
+    
+    Each point aggregates the feedback logs of one time bucket (means plus count and
+    correct). When the range would need more than max_points buckets of the requested
+    unit, a coarser unit is used instead. Running accuracy and rolling mean absolute
+    error are computed per feedback log with $setWindowFields, then the last value of
+    each bucket is kept. The response is cached until feedback or evaluations change.
+    """
     try:
-        # Get feedback logs with only needed fields
-        feedback_logs = await db.feedback_logs.find(
-            {}, 
-            {"_id": 0, "evaluation_id": 1, "teacher_score": 1, "is_correct": 1, "timestamp": 1}
-        ).limit(1000).to_list(1000)
-        
-        if not feedback_logs:
-            return {
-                "performance_data": [],
-                "running_accuracy": [],
-                "total_feedback": 0,
-                "avg_error": 0
-            }
-        
-        # Batch query all needed evaluations (FIX N+1 QUERY ISSUE)
-        evaluation_ids = [log['evaluation_id'] for log in feedback_logs]
-        evaluations_cursor = db.evaluations.find(
-            {"id": {"$in": evaluation_ids}},
-            {"_id": 0, "id": 1, "score": 1}
-        )
-        evaluations_list = await evaluations_cursor.to_list(1000)
-        
-        # Create lookup dictionary for O(1) access
-        evaluations_map = {eval['id']: eval for eval in evaluations_list}
-        
-        # Calculate accuracy over time
-        performance_data = []
+        if bucket not in PERFORMANCE_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(PERFORMANCE_BUCKETS)}")
+        max_points = max(1, min(max_points, 1000))
+        rolling_window = max(1, min(rolling_window, 1000))
+        
+        async def load():
+            match = {"teacher_score": {"$ne": None}, "ai_score": {"$ne": None}}
+            if start or end:
+                match.update(date_range_filter("timestamp", start, end))
+        
+            first, last = await asyncio.gather(
+                db.feedback_logs.find_one(match, {"_id": 0, "timestamp": 1}, sort=[("timestamp", 1)]),
+                db.feedback_logs.find_one(match, {"_id": 0, "timestamp": 1}, sort=[("timestamp", -1)])
+            )
+            unit = performance_bucket(bucket, first['timestamp'], last['timestamp'], max_points) if first else bucket
+        
+            pipeline = [
+                {"$match": match},
+                {"$set": {
+                    "error": {"$abs": {"$subtract": ["$ai_score", "$teacher_score"]}},
+                    "correct": {"$cond": [{"$eq": ["$is_correct", True]}, 1, 0]}
+                }},
+                {"$setWindowFields": {
+                    "sortBy": {"timestamp": 1},
+                    "output": {
+                        "correct_so_far": {"$sum": "$correct", "window": {"documents": ["unbounded", "current"]}},
+                        "seen_so_far": {"$count": {}, "window": {"documents": ["unbounded", "current"]}},
+                        "rolling_mae": {"$avg": "$error", "window": {"documents": [-(rolling_window - 1), "current"]}}
+                    }
+                }},
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$timestamp", "unit": unit}},
+                    "count": {"$sum": 1},
+                    "correct": {"$sum": "$correct"},
+                    "predicted_score": {"$avg": "$ai_score"},
+                    "actual_score": {"$avg": "$teacher_score"},
+                    "error_sum": {"$sum": "$error"},
+                    "running_accuracy": {"$last": {"$multiply": [{"$divide": ["$correct_so_far", "$seen_so_far"]}, 100]}},
+                    "rolling_mae": {"$last": "$rolling_mae"},
+                    # Raw LLM error vs. error of the calibrated scores teachers reviewed
+                    "calibrated_samples": {"$sum": {"$cond": [{"$ne": [{"$ifNull": ["$raw_score", None]}, None]}, 1, 0]}},
+                    "raw_error_sum": {"$sum": {"$cond": [
+                        {"$ne": [{"$ifNull": ["$raw_score", None]}, None]},
+                        {"$abs": {"$subtract": ["$raw_score", "$teacher_score"]}}, 0
+                    ]}},
+                    "calibrated_error_sum": {"$sum": {"$cond": [{"$ne": [{"$ifNull": ["$raw_score", None]}, None]}, "$error", 0]}}
+                }},
+                {"$facet": {
+                    "buckets": [{"$sort": {"_id": 1}}],
+                    "totals": [{"$group": {
+                        "_id": None,
+                        "count": {"$sum": "$count"},
+                        "error_sum": {"$sum": "$error_sum"},
+                        "calibrated_samples": {"$sum": "$calibrated_samples"},
+                        "raw_error_sum": {"$sum": "$raw_error_sum"},
+                        "calibrated_error_sum": {"$sum": "$calibrated_error_sum"}
+                    }}]
+                }}
+            ]
+        
+            result, total_evaluations = await asyncio.gather(
+                db.feedback_logs.aggregate(pipeline, allowDiskUse=True).to_list(1),
+                db.evaluations.estimated_document_count()
+            )
+            facets = result[0] if result else {"buckets": [], "totals": []}
+            buckets = facets['buckets']
+            totals = facets['totals'][0] if facets['totals'] else {}
         
-        for i, log in enumerate(feedback_logs):
-            eval = evaluations_map.get(log['evaluation_id'])
-            
-            if eval and log.get('teacher_score') is not None:
-                error = abs(eval['score'] - log['teacher_score'])
+            performance_data = []
+            running_accuracy = []
+            for i, b in enumerate(buckets):
                 performance_data.append({
                     'index': i + 1,
-                    'predicted_score': eval['score'],
-                    'actual_score': log['teacher_score'],
-                    'error': error,
-                    'is_correct': log.get('is_correct', False),
-                    'timestamp': log.get('timestamp', '')
+                    'predicted_score': b['predicted_score'],
+                    'actual_score': b['actual_score'],
+                    'error': b['error_sum'] / b['count'],
+                    'accuracy': b['correct'] / b['count'] * 100,
+                    'correct': b['correct'],
+                    'count': b['count'],
+                    'timestamp': b['_id']
                 })
-        
-        # Calculate running accuracy
-        if performance_data:
-            running_accuracy = []
-            correct_count = 0
-            for i, item in enumerate(performance_data):
-                if item['is_correct']:
-                    correct_count += 1
                 running_accuracy.append({
                     'index': i + 1,
-                    'accuracy': (correct_count / (i + 1)) * 100
+                    'accuracy': b['running_accuracy'],
+                    'rolling_mae': b['rolling_mae'],
+                    'timestamp': b['_id']
                 })
-        else:
-            running_accuracy = []
         
-        return {
-            "performance_data": performance_data,
-            "running_accuracy": running_accuracy,
-            "total_feedback": len(feedback_logs),
-            "total_evaluations": await db.evaluations.count_documents({}),
-            "avg_error": sum(p['error'] for p in performance_data) / len(performance_data) if performance_data else 0
-        }
+            total_feedback = totals.get('count', 0)
+            calibrated_samples = totals.get('calibrated_samples', 0)
+            calibration = {
+                "samples": calibrated_samples,
+                "raw_mae": round(totals['raw_error_sum'] / calibrated_samples, 2) if calibrated_samples else 0,
+                "calibrated_mae": round(totals['calibrated_error_sum'] / calibrated_samples, 2) if calibrated_samples else 0
+            }
+        
+            return {
+                "performance_data": performance_data,
+                "running_accuracy": running_accuracy,
+                "bucket": unit,
+                "total_feedback": total_feedback,
+                "total_evaluations": total_evaluations,
+                "avg_error": totals['error_sum'] / total_feedback if total_feedback else 0,
+                "calibration": calibration
+            }
+        
+        return await response_cache.cached_json(request, db, ["feedback_logs", "evaluations"], load)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching model performance: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1197,99 +1940,46 @@ async def get_model_performance():
 
 @api_router.get("/database/collections")
 async def get_database_collections():
-    """Get all collections in the database with document counts and sample schema"""
+    """Get all collections with estimated document counts and a schema sampled from each.
+    
+    Collections are described concurrently and the overview is cached briefly, so
+    reopening the explorer does not rescan the database.
+    """
     try:
-        collection_names = await db.list_collection_names()
-        collections = []
-        
-        for name in sorted(collection_names):
-            collection = db[name]
-            count = await collection.count_documents({})
-            
-            # Get one sample document to infer schema
-            sample = await collection.find_one({}, {"_id": 0})
-            schema = {}
-            if sample:
-                for key, value in sample.items():
-                    val_type = type(value).__name__
-                    if isinstance(value, list):
-                        if len(value) > 0:
-                            val_type = f"list[{type(value[0]).__name__}] ({len(value)} items)"
-                        else:
-                            val_type = "list (empty)"
-                    elif isinstance(value, dict):
-                        val_type = f"dict ({len(value)} keys)"
-                    elif isinstance(value, str) and len(value) > 100:
-                        val_type = f"str (len={len(value)})"
-                    schema[key] = val_type
-            
-            collections.append({
-                "name": name,
-                "count": count,
-                "schema": schema
-            })
-        
-        return {
-            "database": db.name,
-            "total_collections": len(collections),
-            "collections": collections
-        }
+        return await explorer.collections_overview(db)
     except Exception as e:
         logger.error(f"Error listing collections: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/database/collection/{collection_name}")
-async def get_collection_data(collection_name: str, page: int = 1, limit: int = 20):
-    """Get paginated data from a collection (like a Workbench table view)"""
+async def get_collection_data(
+    collection_name: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "_id",
+    order: str = "desc",
+    filter: List[str] = Query(default=[]),
+    fields: Optional[str] = None
+):
+    """Browse a collection like a Workbench table view, one keyset page at a time.
+    
+    `filter` (repeatable) takes `field=value`, `!=`, `>`, `>=`, `<`, `<=` or `field~text`;
+    `sort`/`order` pick the column order and `fields` limits the columns. Vectors and long
+    strings are summarized by MongoDB; pass `next_cursor` back as `cursor` for the next page.
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    limit = max(1, min(limit, pagination.MAX_PAGE_SIZE))
     try:
         collection_names = await db.list_collection_names()
         if collection_name not in collection_names:
             raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found")
         
-        collection = db[collection_name]
-        total = await collection.count_documents({})
-        skip = (page - 1) * limit
-        
-        # Fetch documents, exclude _id (not JSON serializable) and large binary fields
-        cursor = collection.find({}, {"_id": 0}).skip(skip).limit(limit)
-        documents = await cursor.to_list(limit)
-        
-        # Process documents for display
-        processed_docs = []
-        for doc in documents:
-            processed = {}
-            for key, value in doc.items():
-                if isinstance(value, list) and len(value) > 0:
-                    if isinstance(value[0], float):
-                        # Embedding vector — show summary
-                        processed[key] = f"[Vector: {len(value)} dims, min={min(value):.4f}, max={max(value):.4f}]"
-                    elif isinstance(value[0], dict):
-                        # Chunks or other nested objects
-                        processed[key] = value  # Keep as is for detailed view
-                    else:
-                        processed[key] = value
-                elif isinstance(value, str) and len(value) > 500:
-                    processed[key] = value[:500] + f"... ({len(value)} chars total)"
-                else:
-                    processed[key] = value
-            processed_docs.append(processed)
-        
-        # Get schema from first document
-        columns = []
-        if documents:
-            for key in documents[0].keys():
-                col_type = type(documents[0][key]).__name__
-                columns.append({"name": key, "type": col_type})
-        
-        return {
-            "collection": collection_name,
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "total_pages": (total + limit - 1) // limit,
-            "columns": columns,
-            "data": processed_docs
-        }
+        page = await explorer.browse_collection(
+            db[collection_name], filter, sort, order == "desc", limit, cursor,
+            fieldsets.parse_fields(fields, always=())
+        )
+        return {"collection": collection_name, "limit": limit, "sort": sort, "order": order, **page}
     except HTTPException:
         raise
     except Exception as e:
@@ -1355,19 +2045,33 @@ async def get_document_detail(collection_name: str, doc_id: str):
         logger.error(f"Error fetching document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Fields of a deleted evaluation needed to take it back out of the rollups
+EVALUATION_ROLLUP_FIELDS = {
+    "_id": 0, "score": 1, "subject": 1, "topic": 1, "class_id": 1, "section_id": 1, "student_id": 1,
+    "student_name": 1, "created_at": 1, "exam_date": 1, "similarity_score": 1, "retrieved_chunks": 1,
+    "feedback": 1, "is_correct": 1
+}
+
 @api_router.delete("/database/document/{collection_name}/{doc_id}")
 async def delete_document(collection_name: str, doc_id: str):
     """Delete a document from the database explorer"""
     try:
         collection = db[collection_name]
         
-        # Try multiple ID fields
-        result = await collection.delete_one({"id": doc_id})
-        if result.deleted_count == 0:
-            result = await collection.delete_one({"evaluation_id": doc_id})
+        # Try multiple ID fields; evaluations come back with what their rollups need
+        projection = EVALUATION_ROLLUP_FIELDS if collection_name == "evaluations" else {"_id": 1}
+        deleted = await collection.find_one_and_delete({"id": doc_id}, projection=projection)
+        if deleted is None:
+            deleted = await collection.find_one_and_delete({"evaluation_id": doc_id}, projection=projection)
         
-        if result.deleted_count == 0:
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Document not found")
+        if collection_name == "evaluations":
+            await rollups.remove_evaluation_rollups(db, [deleted])
+        await response_cache.bump_versions(db, collection_name)
+        explorer.invalidate()
+        if collection_name == "syllabus":
+            await syllabus_catalog.rebuild(db)
         
         return {"success": True, "message": "Document deleted"}
     except HTTPException:
@@ -1376,18 +2080,36 @@ async def delete_document(collection_name: str, doc_id: str):
         logger.error(f"Error deleting document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ==================== BACKGROUND JOB HANDLERS ====================
+
+async def ocr_job_handler(payload: dict) -> dict:
+    return await run_answer_ocr(payload['file_data'], payload['filename'], payload.get('content_type'))
+
+async def evaluate_job_handler(payload: dict) -> list:
+    evaluations = await run_answer_evaluation(payload)
+    return [e.model_dump(mode="json") for e in evaluations]
+
+job_queue.register_handler("ocr", ocr_job_handler)
+job_queue.register_handler("evaluate", evaluate_job_handler)
+
 # Include new routers
 app.include_router(auth_routes.router)
 app.include_router(class_routes.router)
 app.include_router(student_routes.router)
+app.include_router(batch_routes.router)
+app.include_router(job_routes.router)
+app.include_router(progress_routes.router)
 app.include_router(api_router)
 
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Uncompressed-Length", "Server-Timing", "Content-Disposition"],
 )
 
 @app.on_event("shutdown")
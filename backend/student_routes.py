@@ -7,11 +7,17 @@ import csv
 import io
 import logging
 
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
 from auth_utils import get_current_teacher_id
+import fieldsets
+import response_cache
 
 router = APIRouter(prefix="/api/students", tags=["students"])
 logger = logging.getLogger(__name__)
 
+IMPORT_CHUNK_SIZE = 500  # CSV rows checked and inserted per round trip
+
 # ==================== MODELS ====================
 
 class StudentCreate(BaseModel):
@@ -37,6 +43,21 @@ class StudentResponse(BaseModel):
     average_score: float = 0.0
     created_at: datetime
 
+def lookup_name(collection: str, local_field: str, as_field: str) -> List[dict]:
+    """Pipeline stages setting `as_field` to the name of the referenced class/section"""
+    joined = f"_{as_field}"
+    return [
+        {"$lookup": {
+            "from": collection,
+            "localField": local_field,
+            "foreignField": "id",
+            "pipeline": [{"$project": {"_id": 0, "name": 1}}],
+            "as": joined
+        }},
+        {"$set": {as_field: {"$ifNull": [{"$arrayElemAt": [f"${joined}.name", 0]}, "Unknown"]}}},
+        {"$unset": joined}
+    ]
+
 # ==================== ROUTES ====================
 
 @router.post("/", response_model=StudentResponse, status_code=status.HTTP_201_CREATED)
@@ -83,7 +104,11 @@ async def create_student(
             "created_at": datetime.now(timezone.utc)
         }
         
-        await db.students.insert_one(student)
+        try:
+            await db.students.insert_one(student)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Roll number already exists in this class")
+        await response_cache.bump_versions(db, "students")
         
         return {
             **student,
@@ -103,15 +128,18 @@ async def create_student(
 async def get_students(
     class_id: Optional[str] = None,
     section_id: Optional[str] = None,
+    fields: Optional[str] = None,
     request: Request = None,
     authorization: Optional[str] = Header(None),
     session_token: Optional[str] = Cookie(None)
 ):
-    """Get all students with optional filtering"""
+    """Get all students with optional filtering; `fields` (comma-separated) limits the response"""
     from server import db
     
     try:
         teacher_id = await get_current_teacher_id(request, authorization, session_token)
+        selected = fieldsets.parse_fields(fields, StudentResponse)
+        wanted = lambda *names: selected is None or any(name in selected for name in names)
         
         query = {"teacher_id": teacher_id}
         if class_id:
@@ -119,21 +147,37 @@ async def get_students(
         if section_id:
             query["section_id"] = section_id
         
-        students = await db.students.find(query, {"_id": 0}).sort("roll_number", 1).to_list(5000)
-        
-        # Enrich with class/section names and stats
-        for student in students:
-            cls = await db.classes.find_one({"id": student["class_id"]}, {"_id": 0, "name": 1})
-            section = await db.sections.find_one({"id": student["section_id"]}, {"_id": 0, "name": 1})
-            
-            student["class_name"] = cls["name"] if cls else "Unknown"
-            student["section_name"] = section["name"] if section else "Unknown"
-            
-            # Get evaluation stats
-            evals = await db.evaluations.find({"student_id": student["id"]}, {"_id": 0, "score": 1}).to_list(1000)
-            student["evaluation_count"] = len(evals)
-            student["average_score"] = sum(e["score"] for e in evals) / len(evals) if evals else 0.0
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"roll_number": 1}},
+            {"$limit": 5000},
+            {"$project": fieldsets.projection(selected, extra=("id", "class_id", "section_id"))}
+        ]
+        # Class/section names and evaluation stats are joined in the same pipeline (only those requested)
+        if wanted("class_name"):
+            pipeline += lookup_name("classes", "class_id", "class_name")
+        if wanted("section_name"):
+            pipeline += lookup_name("sections", "section_id", "section_name")
+        if wanted("evaluation_count", "average_score"):
+            pipeline += [
+                {"$lookup": {
+                    "from": "evaluations",
+                    "localField": "id",
+                    "foreignField": "student_id",
+                    "pipeline": [{"$group": {"_id": None, "count": {"$sum": 1}, "average": {"$avg": "$score"}}}],
+                    "as": "_stats"
+                }},
+                {"$set": {
+                    "evaluation_count": {"$ifNull": [{"$arrayElemAt": ["$_stats.count", 0]}, 0]},
+                    "average_score": {"$ifNull": [{"$arrayElemAt": ["$_stats.average", 0]}, 0.0]}
+                }},
+                {"$unset": "_stats"}
+            ]
+        
+        students = await db.students.aggregate(pipeline).to_list(None)
         
+        if selected is not None:
+            return fieldsets.model_response(students, StudentResponse, selected)
         return students
         
     except HTTPException:
@@ -142,6 +186,47 @@ async def get_students(
         logger.error(f"Get students error: {e}")
         raise HTTPException(status_code=500, detail="Failed to get students")
 
+async def import_chunk(db, rows: List[dict], class_id: str, section_id: str, teacher_id: str, errors: List[str]) -> int:
+    """Insert a chunk of CSV rows, skipping roll numbers already in the class; returns the number added"""
+    existing = await db.students.find(
+        {"class_id": class_id, "roll_number": {"$in": [row['roll_number'] for row in rows]}},
+        {"_id": 0, "roll_number": 1}
+    ).to_list(None)
+    taken = {doc['roll_number'] for doc in existing}
+    
+    now = datetime.now(timezone.utc)
+    students = []
+    for row in rows:
+        if row['roll_number'] in taken:
+            errors.append(f"Roll {row['roll_number']} already exists")
+            continue
+        students.append({
+            "id": f"student_{uuid.uuid4().hex[:12]}",
+            "name": row['name'],
+            "roll_number": row['roll_number'],
+            "class_id": class_id,
+            "section_id": section_id,
+            "teacher_id": teacher_id,
+            "contact_email": row.get('email'),
+            "contact_phone": row.get('phone'),
+            "created_at": now
+        })
+    if not students:
+        return 0
+    
+    try:
+        result = await db.students.insert_many(students, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        # Rows inserted concurrently since the $in check hit the unique index
+        for error in e.details.get('writeErrors', []):
+            roll_number = students[error['index']]['roll_number']
+            if error.get('code') == 11000:
+                errors.append(f"Roll {roll_number} already exists")
+            else:
+                errors.append(f"Row error (roll {roll_number}): {error.get('errmsg')}")
+        return e.details.get('nInserted', 0)
+
 @router.post("/bulk")
 async def bulk_import_students(
     file: UploadFile = File(...),
@@ -166,45 +251,33 @@ async def bulk_import_students(
         if not section:
             raise HTTPException(status_code=404, detail="Section not found")
         
-        # Read CSV
-        contents = await file.read()
-        csv_data = contents.decode('utf-8')
-        reader = csv.DictReader(io.StringIO(csv_data))
+        # Stream the CSV and write it a chunk at a time (utf-8-sig drops an Excel byte order mark)
+        reader = csv.DictReader(io.TextIOWrapper(file.file, encoding='utf-8-sig', newline=''))
         
         students_added = 0
         errors = []
+        seen = set()
+        chunk = []
         
-        for row in reader:
-            try:
+        try:
+            for row in reader:
                 if not row.get('name') or not row.get('roll_number'):
                     continue
-                
-                # Check duplicate
-                existing = await db.students.find_one({
-                    "roll_number": row['roll_number'],
-                    "class_id": class_id
-                })
-                if existing:
+                if row['roll_number'] in seen:
                     errors.append(f"Roll {row['roll_number']} already exists")
                     continue
-                
-                student = {
-                    "id": f"student_{uuid.uuid4().hex[:12]}",
-                    "name": row['name'],
-                    "roll_number": row['roll_number'],
-                    "class_id": class_id,
-                    "section_id": section_id,
-                    "teacher_id": teacher_id,
-                    "contact_email": row.get('email'),
-                    "contact_phone": row.get('phone'),
-                    "created_at": datetime.now(timezone.utc)
-                }
-                
-                await db.students.insert_one(student)
-                students_added += 1
-                
-            except Exception as e:
-                errors.append(f"Row error: {str(e)}")
+                seen.add(row['roll_number'])
+                chunk.append(row)
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    students_added += await import_chunk(db, chunk, class_id, section_id, teacher_id, errors)
+                    chunk = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Keep the rows read so far; report where the file stopped being readable
+            errors.append(f"Could not read the file after line {reader.line_num}: {e}")
+        if chunk:
+            students_added += await import_chunk(db, chunk, class_id, section_id, teacher_id, errors)
+        if students_added:
+            await response_cache.bump_versions(db, "students")
         
         return {
             "success": True,
@@ -237,6 +310,7 @@ async def delete_student(
             raise HTTPException(status_code=404, detail="Student not found")
         
         await db.students.delete_one({"id": student_id})
+        await response_cache.bump_versions(db, "students")
         
         return {"success": True, "message": "Student deleted"}
         
@@ -0,0 +1,104 @@
+# Normalized subject/topic catalog: (subject, topic) -> the syllabus used to grade it
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_SECONDS = 60  # Other processes' syllabus writes become visible after this
+GENERAL_TOPIC = ""  # Key of syllabi without a topic (or topic "General")
+
+# subject_key -> (loaded_at, {topic_key: syllabus_id}), most recent syllabus first
+_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+def normalize(value: Optional[str]) -> str:
+    """Casefolded, whitespace-collapsed form used for catalog keys"""
+    return " ".join((value or "").split()).casefold()
+
+def catalog_keys(subject: Optional[str], topic: Optional[str]) -> Tuple[str, str]:
+    topic_key = normalize(topic)
+    return normalize(subject), GENERAL_TOPIC if topic_key == "general" else topic_key
+
+def apply_keys(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Store the normalized keys on a syllabus document before it is written"""
+    doc['subject_key'], doc['topic_key'] = catalog_keys(doc.get('subject'), doc.get('topic'))
+    return doc
+
+def invalidate():
+    _cache.clear()
+
+async def ensure_catalog(db):
+    """Indexes, plus a backfill of keys and catalog entries for syllabi written before the catalog existed"""
+    await db.syllabus.create_index([("subject_key", 1), ("topic_key", 1), ("created_at", -1)])
+    await db.syllabus.create_index("id")
+    await db.syllabus_catalog.create_index([("subject_key", 1), ("created_at", -1)])
+
+    missing = await db.syllabus.find(
+        {"subject_key": {"$exists": False}},
+        {"_id": 0, "id": 1, "subject": 1, "topic": 1}
+    ).to_list(None)
+    if missing:
+        await db.syllabus.bulk_write([
+            UpdateOne({"id": doc['id']}, {"$set": {k: v for k, v in apply_keys(doc).items() if k.endswith('_key')}})
+            for doc in missing
+        ], ordered=False)
+        logger.info(f"Added catalog keys to {len(missing)} syllabus entries")
+    if missing or await db.syllabus_catalog.estimated_document_count() == 0:
+        await rebuild(db)
+
+async def rebuild(db, subject_keys: Optional[Iterable[str]] = None):
+    """Point each (subject, topic) key at its most recent syllabus (all keys, or just these subjects')"""
+    scope = {}
+    if subject_keys is not None:
+        scope = {"subject_key": {"$in": list(set(subject_keys))}}
+    latest = await db.syllabus.aggregate([
+        {"$match": scope},
+        {"$sort": {"created_at": -1}},
+        {"$group": {
+            "_id": {"subject": "$subject_key", "topic": "$topic_key"},
+            "syllabus_id": {"$first": "$id"},
+            "created_at": {"$first": "$created_at"}
+        }}
+    ]).to_list(None)
+
+    if latest:
+        await db.syllabus_catalog.bulk_write([
+            UpdateOne(
+                {"_id": entry['_id']},
+                {"$set": {
+                    "subject_key": entry['_id']['subject'],
+                    "topic_key": entry['_id']['topic'],
+                    "syllabus_id": entry['syllabus_id'],
+                    "created_at": entry['created_at']
+                }},
+                upsert=True
+            )
+            for entry in latest
+        ], ordered=False)
+    # Drop keys whose last syllabus was deleted or renamed
+    await db.syllabus_catalog.delete_many({**scope, "_id": {"$nin": [entry['_id'] for entry in latest]}})
+    invalidate()
+
+async def resolve(db, subject: str, topic: Optional[str]) -> Optional[str]:
+    """Syllabus id for a subject/topic: the exact topic, else the subject's general or newest syllabus"""
+    subject_key, topic_key = catalog_keys(subject, topic)
+    cached = _cache.get(subject_key)
+    if cached is None or time.monotonic() - cached[0] > CATALOG_CACHE_SECONDS:
+        entries = await db.syllabus_catalog.find(
+            {"subject_key": subject_key},
+            {"_id": 0, "topic_key": 1, "syllabus_id": 1}
+        ).sort("created_at", -1).to_list(None)
+        topics = {entry['topic_key']: entry['syllabus_id'] for entry in entries}
+        if not topics:
+            # Not cached, so a syllabus uploaded by another process is found immediately
+            return None
+        cached = (time.monotonic(), topics)
+        _cache[subject_key] = cached
+
+    topics = cached[1]
+    if topic_key in topics:
+        return topics[topic_key]
+    logger.info(f"Syllabus for {subject} with topic {topic} not found, falling back to subject-only match")
+    return topics.get(GENERAL_TOPIC) or next(iter(topics.values()))
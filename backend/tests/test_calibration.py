@@ -0,0 +1,30 @@
+"""LinearCalibrator: identity until active, then a regularized least-squares fit"""
+import numpy as np
+import pytest
+
+from calibration import CALIBRATION_MIN_SAMPLES, LinearCalibrator
+
+def test_calibrator_passes_scores_through_until_active():
+    calibrator = LinearCalibrator()
+    for _ in range(CALIBRATION_MIN_SAMPLES - 1):
+        calibrator.update(40, 60)
+    assert not calibrator.active
+    assert calibrator.apply(40) == 40.0
+    calibrator.update(40, 60)
+    assert calibrator.active
+
+def test_calibrator_learns_offset_and_clips():
+    raw = np.linspace(10, 80, 200)
+    calibrator = LinearCalibrator()
+    calibrator.update_many(raw, raw + 10)
+    assert calibrator.apply(50) == pytest.approx(60, abs=0.5)
+    assert calibrator.apply(100) == 100.0
+
+def test_calibrator_update_many_matches_updates():
+    raw, teacher = [20.0, 45.0, 70.0, 90.0, 55.0], [25.0, 50.0, 60.0, 85.0, 58.0]
+    one_by_one, batched = LinearCalibrator(), LinearCalibrator()
+    for x, y in zip(raw, teacher):
+        one_by_one.update(x, y)
+    batched.update_many(np.asarray(raw), np.asarray(teacher))
+    assert np.allclose(one_by_one.stats, batched.stats)
+    assert one_by_one.apply(65) == batched.apply(65)
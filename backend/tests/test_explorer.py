@@ -0,0 +1,129 @@
+"""Explorer filter parsing, and table values: the $switch built by _display_value, evaluated in Python"""
+from datetime import datetime
+from typing import Any, Dict
+
+import pytest
+from fastapi import HTTPException
+
+import explorer
+
+BSON_TYPES = {str: "string", bytes: "binData", float: "double", int: "int", bool: "bool",
+              list: "array", dict: "object", type(None): "null"}
+
+def bson_type(value: Any) -> str:
+    return BSON_TYPES[type(value)]
+
+def evaluate(expr: Any, variables: Dict[str, Any]) -> Any:
+    """Evaluate the subset of aggregation expressions _display_value uses"""
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, *path = expr[2:].split(".")
+        value = variables[name]
+        for key in path:
+            value = value[key]
+        return value
+    if isinstance(expr, list):
+        return [evaluate(item, variables) for item in expr]
+    if not isinstance(expr, dict) or len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return expr
+    (op, arg), = expr.items()
+    ev = lambda e: evaluate(e, variables)
+    if op == "$switch":
+        for branch in arg["branches"]:
+            if ev(branch["case"]):
+                return ev(branch["then"])
+        return ev(arg["default"])
+    if op == "$and":
+        return all(ev(e) for e in arg)  # Short-circuits, like MongoDB
+    if op == "$cond":
+        return ev(arg[1]) if ev(arg[0]) else ev(arg[2])
+    if op == "$let":
+        scope = {**variables, **{k: ev(v) for k, v in arg["vars"].items()}}
+        return evaluate(arg["in"], scope)
+    if op == "$map":
+        return [evaluate(arg["in"], {**variables, arg.get("as", "this"): item}) for item in ev(arg["input"])]
+    if op == "$reduce":
+        acc = ev(arg["initialValue"])
+        for item in ev(arg["input"]):
+            acc = evaluate(arg["in"], {**variables, "value": acc, "this": item})
+        return acc
+    args = ev(arg)
+    simple = {
+        "$isArray": lambda a: isinstance(a, list),
+        "$size": len,
+        "$type": bson_type,
+        "$strLenCP": len,
+        "$binarySize": len,
+        "$toString": str,
+        "$min": min,
+        "$max": max,
+    }
+    if op in simple:
+        return simple[op](args)
+    return {
+        "$gt": lambda a: a[0] > a[1],
+        "$eq": lambda a: a[0] == a[1],
+        "$in": lambda a: a[0] in a[1],
+        "$add": lambda a: sum(a),
+        "$concat": lambda a: "".join(a),
+        "$arrayElemAt": lambda a: a[0][a[1]],
+        "$round": lambda a: round(a[0], a[1]),
+        "$substrCP": lambda a: a[0][a[1]:a[1] + a[2]],
+    }[op](args)
+
+def display(value: Any) -> Any:
+    return evaluate(explorer._display_value("$$v"), {"v": value})
+
+def test_answer_script_pages_are_summarized():
+    # Shaped like answer_scripts: base64 page images next to short fields
+    doc = {
+        "id": "script_1",
+        "student_name": "Ann",
+        "all_pages": ["iVBORw0KGgo" * 20000, "iVBORw0KGgo" * 18000],
+        "image_data": "iVBORw0KGgo" * 20000,
+        "missing_keywords": ["osmosis", "diffusion"],
+    }
+    shown = {key: display(value) for key, value in doc.items()}
+    assert shown["all_pages"] == f"[2 items, {11 * 38000} chars total]"
+    assert shown["image_data"].endswith(f"... ({11 * 20000} chars total)")
+    assert len(shown["image_data"]) < explorer.PREVIEW_STRING_CHARS + 40
+    assert shown["missing_keywords"] == ["osmosis", "diffusion"]
+    assert shown["student_name"] == "Ann"
+
+def test_staged_upload_binary_pages_are_never_returned_as_bytes():
+    assert display([b"\x89PNG" * 1000, b"\x89PNG" * 500]) == "[2 items, 6000 bytes total]"
+    assert display([b"ab"]) == ["[binary data: 2 bytes]"]
+    assert display(b"\x00" * 10) == "[binary data: 10 bytes]"
+
+@pytest.mark.parametrize("value, shown", [
+    ([0.5, -0.25, 0.125], "[Vector: 3 dims, min=-0.25, max=0.5]"),
+    ([[0.1, 0.2], [0.3, 0.4]], "[2 vectors, 2 dims]"),
+    ([], []),
+    (None, None),
+    (42, 42),
+])
+def test_other_values(value, shown):
+    assert display(value) == shown
+
+@pytest.mark.parametrize("expression, expected", [
+    ("score>=5", {"score": {"$gte": 5}}),
+    ("score<=5", {"score": {"$lte": 5}}),
+    ("status!=done", {"status": {"$ne": "done"}}),
+    ("score>5", {"score": {"$gt": 5}}),
+    ("name=a=b", {"name": {"$eq": "a=b"}}),
+    ("is_correct=true", {"is_correct": {"$eq": True}}),
+    ("student_name~ann", {"student_name": {"$regex": "ann", "$options": "i"}}),
+])
+def test_parse_filters_operator_precedence(expression, expected):
+    assert explorer.parse_filters([expression]) == expected
+
+def test_parse_filters_combines_and_rejects():
+    assert explorer.parse_filters([]) == {}
+    assert explorer.parse_filters(["a=1", "b<2"]) == {"$and": [{"a": {"$eq": 1}}, {"b": {"$lt": 2}}]}
+    with pytest.raises(HTTPException) as exc:
+        explorer.parse_filters(["no operator"])
+    assert exc.value.status_code == 400
+
+def test_parse_filters_matches_dates_in_both_forms():
+    date = explorer.parse_filters(["exam_date=2024-05-01"])["exam_date"]["$in"][0]
+    assert isinstance(date, datetime) and date.date().isoformat() == "2024-05-01"
+    assert explorer.parse_filters(["exam_date=2024-05-01"]) == {"exam_date": {"$in": [date, "2024-05-01"]}}
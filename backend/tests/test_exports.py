@@ -0,0 +1,63 @@
+"""Streaming CSV / NDJSON export rendering"""
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import exports
+
+@pytest.mark.parametrize("value, expected", [
+    (None, ""),
+    (datetime(2024, 5, 1, 12, 30), "2024-05-01T12:30:00Z"),
+    (datetime(2024, 5, 1, 14, 30, tzinfo=timezone(timedelta(hours=2))), "2024-05-01T12:30:00Z"),
+    (["a", 1], '["a",1]'),
+    ({"k": True}, '{"k":true}'),
+    (7.5, 7.5),
+    ("text", "text"),
+])
+def test_csv_cell(value, expected):
+    assert exports.csv_cell(value) == expected
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+def collect(docs, export_format, columns):
+    async def drain():
+        return [chunk async for chunk in exports.stream_rows(FakeCursor(docs), export_format, columns)]
+    return asyncio.run(drain())
+
+DOCS = [
+    {"id": "e1", "score": 80.0, "feedback": "Good, clear\nanswer", "extra": "dropped"},
+    {"id": "e2", "score": None},
+]
+
+def test_stream_csv():
+    chunks = collect(DOCS, "csv", ["id", "score", "feedback"])
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows == [["id", "score", "feedback"], ["e1", "80.0", "Good, clear\nanswer"], ["e2", "", ""]]
+
+def test_stream_ndjson():
+    chunks = collect(DOCS, "ndjson", ["id", "score"])
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{"id": "e1", "score": 80.0}, {"id": "e2", "score": None}]
+
+@pytest.mark.parametrize("export_format", ["csv", "ndjson"])
+def test_stream_flushes_in_batches(monkeypatch, export_format):
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 2)
+    chunks = collect([{"id": str(i)} for i in range(5)], export_format, ["id"])
+    assert len(chunks) == 3
+
+def test_empty_exports():
+    assert collect([], "csv", ["id", "score"]) == [b"id,score\r\n"]
+    assert collect([], "ndjson", ["id"]) == []
@@ -0,0 +1,44 @@
+"""In-memory feedback index: search, calibration keys and write deduplication"""
+import pytest
+
+import feedback_index
+
+def log(log_id, topic=None, **fields):
+    return {"id": log_id, "topic": topic, "answer_text": "answer", "feedback": "rule",
+            "ai_score": 40, "teacher_score": 50, **fields}
+
+@pytest.fixture(autouse=True)
+def no_cached_indexes():
+    feedback_index._indexes.clear()
+    yield
+    feedback_index._indexes.clear()
+
+def test_search_prefers_similar_logs_and_topic():
+    index = feedback_index.SubjectIndex(
+        [log("a", "cells"), log("b", "plants"), log("c", "cells")],
+        [[1.0, 0.0], [0.0, 1.0], [0.2, 0.95]], version=1
+    )
+    assert index.search([1.0, 0.0], 1) == [0]
+    assert index.search([0.0, 1.0], 2) == [1, 2]
+    assert index.search([0.0, 1.0], 1, topic="cells") == [2]
+    assert index.search([1.0, 0.0], 5) == [0, 1, 2]
+
+def test_untopiced_log_counts_once_toward_subject_calibrator():
+    index = feedback_index.SubjectIndex([], [], version=1)
+    index.add_calibration(None, 40, 50)
+    index.add_calibration("cells", 40, 50)
+    assert index.calibrators[None].n == 2
+    assert index.calibrators["cells"].n == 1
+
+def test_add_feedback_skips_logs_already_loaded():
+    index = feedback_index.SubjectIndex([log("a")], [[1.0, 0.0]], version=3, log_ids={"a"})
+    feedback_index._indexes["bio"] = index
+    feedback_index.add_feedback("bio", log("a"), [1.0, 0.0], 4)
+    assert (len(index.logs), index.version, index.calibrators) == (1, 4, {})
+    feedback_index.add_feedback("bio", log("b"), [0.0, 1.0], 5)
+    assert (len(index.logs), index.version, index.calibrators[None].n) == (2, 5, 1)
+
+def test_add_feedback_drops_index_after_missed_writes():
+    feedback_index._indexes["bio"] = feedback_index.SubjectIndex([], [], version=3)
+    feedback_index.add_feedback("bio", log("a"), [1.0, 0.0], 6)
+    assert "bio" not in feedback_index._indexes
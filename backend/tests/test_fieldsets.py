@@ -0,0 +1,64 @@
+"""Sparse fieldsets: field parsing, Mongo projections and narrowed models"""
+from typing import List, Optional
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+
+import fieldsets
+
+class Row(BaseModel):
+    id: str
+    name: str
+    score: float = 0.0
+    note: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+
+def test_parse_fields():
+    assert fieldsets.parse_fields(None) is None
+    assert fieldsets.parse_fields("") is None
+    assert fieldsets.parse_fields(" name, score,,name ") == ("id", "name", "score")
+    assert fieldsets.parse_fields("id,name", always=()) == ("id", "name")
+
+def test_parse_fields_validates_against_the_model():
+    assert fieldsets.parse_fields("score", Row) == ("id", "score")
+    assert fieldsets.parse_fields("score", Row, always=("id", "created_at")) == ("id", "score")
+    with pytest.raises(HTTPException) as exc:
+        fieldsets.parse_fields("score,bogus,other", Row)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Unknown fields: bogus, other"
+
+def test_projection_without_model():
+    assert fieldsets.projection(None) == {"_id": 0}
+    assert fieldsets.projection(None, exclude={"embedding": 0}) == {"_id": 0, "embedding": 0}
+    assert fieldsets.projection(("id", "name"), extra=("score",), exclude={"embedding": 0}) == {
+        "_id": 0, "id": 1, "name": 1, "score": 1
+    }
+
+def test_unrequested():
+    assert fieldsets.unrequested(None, ["score"]) == ()
+    assert fieldsets.unrequested(("id", "score"), ["score", "note"]) == ("note",)
+
+def test_narrowed_model():
+    assert fieldsets.narrowed_model(Row, None) is Row
+    narrowed = fieldsets.narrowed_model(Row, ("id", "score"))
+    assert list(narrowed.model_fields) == ["id", "score"]
+    assert narrowed(id="a", name="ignored").model_dump() == {"id": "a", "score": 0.0}
+    assert fieldsets.narrowed_model(Row, ("id", "score")) is narrowed
+
+def test_model_projection_fills_static_defaults():
+    assert fieldsets.model_defaults(Row) == {"score": 0.0, "note": None}
+    assert fieldsets.projection(None, exclude={"note": 0}, model=Row) == {
+        "_id": 0, "id": 1, "name": 1,
+        "score": {"$ifNull": ["$score", {"$literal": 0.0}]},
+        "note": {"$literal": None},
+        "tags": 1
+    }
+    assert fieldsets.projection(("id", "score"), extra=("name",), model=Row) == {
+        "_id": 0, "id": 1, "score": {"$ifNull": ["$score", {"$literal": 0.0}]}, "name": 1
+    }
+
+def test_model_response_serializes_narrowed_rows():
+    response = fieldsets.model_response([{"id": "a", "score": 2, "name": "dropped"}], Row, ("id", "score"))
+    assert response.media_type == "application/json"
+    assert response.body == b'[{"id":"a","score":2.0}]'
@@ -0,0 +1,96 @@
+"""Job execution: success, retry backoff, final failure and shutdown hand-back"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import job_queue
+
+class FakeJobs:
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+
+class FakeDB:
+    def __init__(self):
+        self.jobs = FakeJobs()
+
+def make_job(attempts, kind="test"):
+    return {"id": "job_1", "kind": kind, "payload": {"n": 1}, "attempts": attempts, "max_attempts": 3}
+
+def run(job, handler):
+    db = FakeDB()
+    job_queue.register_handler("test", handler)
+    asyncio.run(job_queue.run_job(db, job))
+    (query, update), = db.jobs.updates
+    assert query == {"id": job["id"], "worker_id": job_queue.WORKER_ID}
+    return update
+
+def test_success_stores_result_and_drops_payload():
+    async def handler(payload):
+        return {"doubled": payload["n"] * 2}
+
+    update = run(make_job(1), handler)
+    assert update["$set"]["status"] == "succeeded"
+    assert update["$set"]["result"] == {"doubled": 2}
+    assert update["$set"]["expires_at"] - update["$set"]["finished_at"] == timedelta(hours=job_queue.JOB_RETENTION_HOURS)
+    assert update["$unset"] == {"payload": ""}
+
+async def failing(payload):
+    raise ValueError("boom")
+
+@pytest.mark.parametrize("attempts, delay", [(1, 5), (2, 10)])
+def test_failure_retries_with_exponential_backoff(attempts, delay):
+    before = datetime.now(timezone.utc)
+    update = run(make_job(attempts), failing)["$set"]
+    assert update["status"] == "queued" and update["error"] == "boom"
+    assert update["run_after"] - update["updated_at"] == timedelta(seconds=delay)
+    assert update["updated_at"] >= before
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_BACKOFF_MAX_SECONDS", 7)
+    update = run(make_job(2), failing)["$set"]
+    assert update["run_after"] - update["updated_at"] == timedelta(seconds=7)
+
+def test_final_attempt_fails_the_job():
+    update = run(make_job(3), failing)["$set"]
+    assert update["status"] == "failed" and update["error"] == "boom"
+    assert "run_after" not in update
+
+def test_reclaimed_past_final_attempt_fails_without_running():
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload)
+
+    update = run(make_job(4), handler)["$set"]
+    assert update["status"] == "failed"
+    assert update["error"] == "Worker lease expired on final attempt"
+    assert calls == []
+
+def test_unknown_kind_fails_like_a_handler_error():
+    db = FakeDB()
+    asyncio.run(job_queue.run_job(db, make_job(1, kind="unregistered")))
+    (_, update), = db.jobs.updates
+    assert update["$set"]["status"] == "queued"
+    assert "No handler registered" in update["$set"]["error"]
+
+def test_cancelled_job_is_handed_back_without_using_an_attempt():
+    async def handler(payload):
+        await asyncio.sleep(60)
+
+    async def cancel_midway(db):
+        task = asyncio.create_task(job_queue.run_job(db, make_job(2)))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    db = FakeDB()
+    job_queue.register_handler("test", handler)
+    asyncio.run(cancel_midway(db))
+    (_, update), = db.jobs.updates
+    assert update["$set"]["status"] == "queued"
+    assert update["$inc"] == {"attempts": -1}
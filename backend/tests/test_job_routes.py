@@ -0,0 +1,34 @@
+"""Job endpoints: oversized uploads are refused before anything is queued"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import job_queue
+import job_routes
+
+@pytest.fixture
+def client(monkeypatch):
+    queued = []
+
+    async def enqueue_job(kind, payload, idempotency_key=None):
+        queued.append(payload)
+        return {"id": "job_1", "status": "queued"}
+
+    monkeypatch.setattr(job_queue, "enqueue_job", enqueue_job)
+    monkeypatch.setattr(job_routes, "MAX_JOB_FILE_BYTES", 10)
+    app = FastAPI()
+    app.include_router(job_routes.router)
+    client = TestClient(app)
+    client.queued = queued
+    return client
+
+def test_ocr_job_is_queued(client):
+    response = client.post("/api/jobs/ocr", files={"file": ("page.png", b"0123456789", "image/png")})
+    assert response.status_code == 202
+    assert response.json() == {"job_id": "job_1", "status": "queued"}
+    assert client.queued[0]["file_data"] == b"0123456789"
+
+def test_oversized_ocr_upload_is_rejected(client):
+    response = client.post("/api/jobs/ocr", files={"file": ("page.png", b"0123456789x", "image/png")})
+    assert response.status_code == 413
+    assert client.queued == []
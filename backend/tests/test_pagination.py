@@ -0,0 +1,37 @@
+"""Keyset pagination cursors and filters"""
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+import pagination
+
+@pytest.mark.parametrize("values", [
+    [datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), "eval-1"],
+    [datetime(2024, 5, 1, 12, 30), "eval-1"],
+    [ObjectId("65f0c0ffee0000000000abcd"), 3],
+    [None, "x"],
+])
+def test_cursor_round_trip(values):
+    assert pagination.decode_cursor(pagination.encode_cursor(values), len(values)) == values
+
+@pytest.mark.parametrize("cursor", [
+    pagination.encode_cursor(["only-one"]),
+    "not a cursor!",
+    pagination.encode_cursor([{"$oid": "not-an-object-id"}, 1]),
+    pagination.encode_cursor([{"$date": "yesterday"}, 1]),
+])
+def test_decode_cursor_rejects_bad_cursors(cursor):
+    with pytest.raises(HTTPException) as exc:
+        pagination.decode_cursor(cursor, 2)
+    assert exc.value.status_code == 400
+
+def test_keyset_filter_seeks_past_cursor():
+    created = datetime(2024, 5, 1)
+    cursor = pagination.encode_cursor([created, "b"])
+    assert pagination.keyset_filter([("created_at", -1), ("id", -1)], None) == {}
+    assert pagination.keyset_filter([("created_at", -1), ("id", -1)], cursor) == {"$or": [
+        {"created_at": {"$lt": created}},
+        {"created_at": created, "id": {"$lt": "b"}}
+    ]}
@@ -0,0 +1,63 @@
+"""Progress buckets: per-scope updates and the statistics merged from them"""
+from datetime import datetime
+
+import progress_routes
+import rollups
+
+EVALUATION = {
+    "subject": "Biology", "student_id": "st1", "section_id": "s1", "class_id": "c1",
+    "exam_date": "2024-04-30", "created_at": datetime(2024, 5, 1), "score": 100.0
+}
+
+def test_progress_date_prefers_exam_date():
+    assert rollups.progress_date(EVALUATION) == "2024-04-30"
+    assert rollups.progress_date({**EVALUATION, "exam_date": "not a date"}) == "2024-05-01"
+    assert rollups.progress_date({**EVALUATION, "exam_date": None}) == "2024-05-01"
+
+def test_score_bin_edges():
+    assert [rollups.score_bin(s) for s in (0, 4.99, 5, 99.9, 100, -3)] == [0, 0, 1, 19, 19, 0]
+
+def test_progress_ops_one_bucket_per_scope():
+    ops = rollups.progress_ops([EVALUATION])
+    assert [op._filter for op in ops] == [
+        {"scope": scope, "scope_id": scope_id, "subject": "Biology", "date": "2024-04-30"}
+        for scope, scope_id in (("student", "st1"), ("section", "s1"), ("class", "c1"))
+    ]
+    assert ops[0]._doc == {"$inc": {"count": 1, "score_sum": 100.0, "score_sq_sum": 10000.0, "histogram.19": 1}}
+    assert all(op._upsert for op in ops)
+
+def test_progress_ops_remove_and_skip_missing_scopes():
+    ops = rollups.progress_ops([{**EVALUATION, "section_id": None, "class_id": ""}], sign=-1)
+    op, = ops
+    assert op._filter["scope"] == "student"
+    assert op._doc["$inc"]["count"] == -1 and op._doc["$inc"]["histogram.19"] == -1
+    assert op._upsert is False
+
+def test_summarize_merges_buckets():
+    buckets = [
+        {"count": 2, "score_sum": 100.0, "score_sq_sum": 5200.0, "histogram": {"8": 1, "12": 1}},
+        {"count": 2, "score_sum": 140.0, "score_sq_sum": 9800.0, "histogram": {"14": 2}},
+    ]
+    summary = progress_routes.summarize(buckets)
+    assert summary["count"] == 4
+    assert summary["mean"] == 60.0
+    assert summary["stddev"] == 12.25
+    assert summary["histogram"][14] == 2
+    assert progress_routes.summarize([]) == {"count": 0}
+
+def histogram(**bins):
+    counts = [0] * 20
+    for i, n in bins.items():
+        counts[int(i[1:])] = n
+    return counts
+
+def test_histogram_percentile_interpolates_within_bin():
+    h = histogram(b10=4)  # All scores in [50, 55)
+    assert progress_routes.histogram_percentile(h, 4, 50) == 52.5
+    assert progress_routes.histogram_percentile(h, 4, 100) == 55.0
+
+def test_histogram_percentile_spans_bins():
+    h = histogram(b0=2, b19=2)
+    assert progress_routes.histogram_percentile(h, 4, 25) == 2.5
+    assert progress_routes.histogram_percentile(h, 4, 50) == 5.0
+    assert progress_routes.histogram_percentile(h, 4, 75) == 97.5
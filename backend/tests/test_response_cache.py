@@ -0,0 +1,68 @@
+"""cached_json: responses are rendered once per (path, query, collection versions)"""
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import response_cache
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+class FakeVersions:
+    def __init__(self):
+        self.versions = {}
+
+    def find(self, query):
+        return FakeCursor([{"_id": name, "version": self.versions[name]}
+                           for name in query["_id"]["$in"] if name in self.versions])
+
+    async def update_one(self, query, update, upsert=False):
+        name = query["_id"]
+        self.versions[name] = self.versions.get(name, 0) + update["$inc"]["version"]
+
+class FakeDB:
+    def __init__(self):
+        self.cache_versions = FakeVersions()
+
+def make_request(path: str, query: str, headers=()) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+                    "headers": [(k.encode(), v.encode()) for k, v in headers]})
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache._responses.clear()
+    yield
+    response_cache._responses.clear()
+
+def serve(db, request, calls, omit=()):
+    async def compute():
+        calls.append(1)
+        return [{"id": "a", "subject": "Math", "created_at": "2024-05-01"}]
+    return asyncio.run(response_cache.cached_json(request, db, ["evaluations"], compute, omit=omit))
+
+def test_repeated_fields_request_is_served_from_cache():
+    db, calls = FakeDB(), []
+    for _ in range(3):
+        response = serve(db, make_request("/api/evaluations", "fields=subject"), calls, omit=("created_at",))
+    assert len(calls) == 1
+    assert response.body == b'[{"id":"a","subject":"Math"}]'
+    assert list(response_cache._responses)[0][0] == "/api/evaluations"
+
+def test_write_version_bump_recomputes():
+    db, calls = FakeDB(), []
+    serve(db, make_request("/api/evaluations", ""), calls)
+    asyncio.run(response_cache.bump_versions(db, "evaluations"))
+    serve(db, make_request("/api/evaluations", ""), calls)
+    assert len(calls) == 2
+
+def test_matching_etag_gets_304():
+    db, calls = FakeDB(), []
+    etag = serve(db, make_request("/api/evaluations", ""), calls).headers["etag"]
+    response = serve(db, make_request("/api/evaluations", "", [("if-none-match", etag[:-1] + '-gzip"')]), calls)
+    assert response.status_code == 304
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+"""Accept-Encoding negotiation"""
+import pytest
+
+from starlette.datastructures import Headers
+
+import response_compression
+
+@pytest.fixture
+def all_encoders(monkeypatch):
+    encoders = {name: (lambda body: body) for name in response_compression.PREFERENCE}
+    monkeypatch.setattr(response_compression, "_encoders", encoders)
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br, zstd", "zstd"),
+    ("gzip, br;q=0.5", "gzip"),
+    ("br;q=0.8, gzip;q=0.9", "gzip"),
+    ("zstd;q=0, br", "br"),
+    ("*;q=0.1, zstd;q=0", "br"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("", None),
+])
+def test_negotiate_q_values(all_encoders, header, expected):
+    assert response_compression.negotiate(header) == expected
+
+def test_negotiate_only_offers_available_encoders(monkeypatch):
+    monkeypatch.setattr(response_compression, "_encoders", {"gzip": lambda body: body})
+    assert response_compression.negotiate("zstd, br, gzip;q=0.1") == "gzip"
+    assert response_compression.negotiate("zstd, br") is None
+
+@pytest.mark.parametrize("content_type, size, headers, expected", [
+    ("application/json", 4096, {}, True),
+    ("text/csv; charset=utf-8", 4096, {}, True),
+    ("application/json", 10, {}, False),
+    ("image/png", 4096, {}, False),
+    ("text/event-stream", 4096, {}, False),
+    ("application/json", 4096, {"content-encoding": "gzip"}, False),
+])
+def test_is_compressible(content_type, size, headers, expected):
+    headers = Headers({"content-type": content_type, **headers})
+    assert response_compression.is_compressible(headers, size) is expected
@@ -0,0 +1,40 @@
+"""Analytics rollup keys and the bucket updates applied when evaluations are stored or deleted"""
+from datetime import datetime
+
+import rollups
+
+EVALUATION = {
+    "subject": "Biology", "topic": "Cells", "class_id": "c1", "section_id": "s1",
+    "created_at": datetime(2024, 5, 1, 23, 59), "score": 80.0,
+    "similarity_score": 0.5, "retrieved_chunks": 3
+}
+
+def test_rollup_day_accepts_dates_and_iso_strings():
+    assert rollups.rollup_day(datetime(2024, 5, 1, 23, 59)) == "2024-05-01"
+    assert rollups.rollup_day("2024-05-01T10:00:00+00:00") == "2024-05-01"
+
+def test_rollup_key():
+    assert rollups.rollup_key(EVALUATION) == {
+        "subject": "Biology", "topic": "Cells", "class_id": "c1", "section_id": "s1", "day": "2024-05-01"
+    }
+
+def test_analytics_ops_add_new_evaluations():
+    op, = rollups.analytics_ops([EVALUATION])
+    assert op._filter == rollups.rollup_key(EVALUATION)
+    assert op._doc == {"$inc": {
+        "count": 1, "score_sum": 80.0, "score_sq_sum": 6400.0, "similarity_sum": 0.5, "chunks_sum": 3,
+        "feedback_count": 0, "correct_count": 0
+    }}
+    assert op._upsert is True
+
+def test_analytics_ops_remove_takes_feedback_along():
+    reviewed = {**EVALUATION, "feedback": "Good", "is_correct": True}
+    unreviewed = {**EVALUATION, "similarity_score": None, "retrieved_chunks": None}
+    removed, plain = rollups.analytics_ops([reviewed, unreviewed], sign=-1)
+    assert removed._doc["$inc"] == {
+        "count": -1, "score_sum": -80.0, "score_sq_sum": -6400.0, "similarity_sum": -0.5, "chunks_sum": -3,
+        "feedback_count": -1, "correct_count": -1
+    }
+    assert removed._upsert is False
+    assert plain._doc["$inc"]["feedback_count"] == 0
+    assert plain._doc["$inc"]["similarity_sum"] == 0
@@ -0,0 +1,53 @@
+"""Local segmentation of answer scripts into per-question answers"""
+from server import segment_answer_script, split_numbered_blocks
+
+QUESTIONS = "1. Explain photosynthesis.\n2. What is osmosis?\n3. Define diffusion."
+
+def test_split_prefixed_and_bare_markers():
+    assert split_numbered_blocks("Q1) alpha\nQuestion 2 - beta\nAns 3. gamma") == [
+        {'number': 1, 'text': 'alpha'},
+        {'number': 2, 'text': 'beta'},
+        {'number': 3, 'text': 'gamma'},
+    ]
+    assert split_numbered_blocks("no markers here") == []
+    assert split_numbered_blocks("") == []
+
+def test_split_rejects_repeated_or_decreasing_numbers():
+    # A nested list restarts the numbering: the markers are ambiguous
+    assert split_numbered_blocks("1. a\nSteps:\n1. light\n2. dark\n2. b") == []
+    assert split_numbered_blocks("2. b\n1. a") == []
+
+def test_split_prefixed_markers_ignore_bare_list_items():
+    text = "Q1. Photosynthesis\nSteps:\n1. light\n2. dark\nQ2. Osmosis"
+    assert split_numbered_blocks(text, prefer_prefixed=True) == [
+        {'number': 1, 'text': 'Photosynthesis\nSteps:\n1. light\n2. dark'},
+        {'number': 2, 'text': 'Osmosis'},
+    ]
+
+def test_segment_matches_answers_to_questions():
+    segments = segment_answer_script("1. Plants use light.\n2. Water moves across membranes.", QUESTIONS)
+    assert [(s['number'], s['question'], s['answer']) for s in segments] == [
+        (1, 'Explain photosynthesis.', 'Plants use light.'),
+        (2, 'What is osmosis?', 'Water moves across membranes.'),
+    ]
+
+def test_segment_skipped_question():
+    segments = segment_answer_script("1. Plants use light.\n3. Particles spread out.", QUESTIONS)
+    assert [s['number'] for s in segments] == [1, 3]
+
+def test_segment_nested_list_falls_back_to_whole_script():
+    script = "1. Photosynthesis has stages.\nSteps:\n1. light\n2. dark\n2. Osmosis moves water.\n3. Diffusion spreads."
+    assert segment_answer_script(script, QUESTIONS) == []
+
+def test_segment_nested_list_with_prefixed_questions():
+    script = "Q1. Photosynthesis has stages.\nSteps:\n1. light\n2. dark\nQ2. Osmosis moves water."
+    segments = segment_answer_script(script, QUESTIONS)
+    assert [s['number'] for s in segments] == [1, 2]
+    assert segments[0]['answer'].endswith("2. dark")
+
+def test_segment_needs_a_paper_and_two_answers():
+    assert segment_answer_script("1. only one answer", QUESTIONS) == []
+    assert segment_answer_script("1. a\n2. b", None) == []
+    assert segment_answer_script("1. a\n2. b", "1. Only question") == []
+    # Answer numbers the paper doesn't have
+    assert segment_answer_script("1. a\n2. b\n4. c", QUESTIONS) == []
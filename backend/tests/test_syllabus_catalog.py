@@ -0,0 +1,72 @@
+"""Syllabus catalog keys and subject/topic resolution"""
+import asyncio
+
+import pytest
+
+import syllabus_catalog
+
+@pytest.mark.parametrize("value, expected", [
+    ("  Organic   Chemistry ", "organic chemistry"),
+    ("BIOLOGY", "biology"),
+    ("Straße", "strasse"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize(value, expected):
+    assert syllabus_catalog.normalize(value) == expected
+
+@pytest.mark.parametrize("topic", [None, "", "General", " general "])
+def test_general_topics_share_a_key(topic):
+    assert syllabus_catalog.catalog_keys("Physics", topic) == ("physics", syllabus_catalog.GENERAL_TOPIC)
+
+def test_apply_keys():
+    doc = syllabus_catalog.apply_keys({"id": "s1", "subject": " Physics", "topic": "Optics  "})
+    assert (doc["subject_key"], doc["topic_key"]) == ("physics", "optics")
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def sort(self, *args):
+        return self
+
+    async def to_list(self, length):
+        return self.rows
+
+class FakeCatalog:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        return FakeCursor([row for row in self.rows if row["subject_key"] == query["subject_key"]])
+
+class FakeDB:
+    def __init__(self, rows):
+        self.syllabus_catalog = FakeCatalog(rows)
+
+@pytest.fixture
+def db():
+    syllabus_catalog.invalidate()
+    yield FakeDB([
+        {"subject_key": "physics", "topic_key": "optics", "syllabus_id": "optics"},
+        {"subject_key": "physics", "topic_key": "", "syllabus_id": "general"},
+        {"subject_key": "chemistry", "topic_key": "acids", "syllabus_id": "acids"},
+    ])
+    syllabus_catalog.invalidate()
+
+@pytest.mark.parametrize("subject, topic, expected", [
+    ("Physics", " OPTICS", "optics"),
+    ("physics", "Mechanics", "general"),
+    ("PHYSICS", None, "general"),
+    ("Chemistry", "Bases", "acids"),
+    ("Biology", "Cells", None),
+])
+def test_resolve(db, subject, topic, expected):
+    assert asyncio.run(syllabus_catalog.resolve(db, subject, topic)) == expected
+
+def test_resolve_caches_per_subject_but_not_misses(db):
+    for subject in ["Physics", "physics ", "Biology", "Biology"]:
+        asyncio.run(syllabus_catalog.resolve(db, subject, None))
+    assert db.syllabus_catalog.queries == [{"subject_key": "physics"}, {"subject_key": "biology"}, {"subject_key": "biology"}]
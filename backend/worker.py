@@ -0,0 +1,26 @@
+# Standalone background job worker (run alongside uvicorn started with JOB_WORKERS=0)
+#   python worker.py [num_workers]
+import asyncio
+import logging
+import os
+import sys
+
+import job_queue
+from server import client, db, ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+async def main(count: int):
+    await ensure_indexes()
+    workers = job_queue.start_workers(db, count)
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 2)
+    try:
+        asyncio.run(main(count))
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
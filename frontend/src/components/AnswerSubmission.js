@@ -3,12 +3,32 @@ import axios from 'axios';
 import { API } from '../App';
 import { Upload, FileText, CheckCircle, AlertCircle, Loader, RefreshCw, Database, Zap, Users } from 'lucide-react';
 
+const JOB_POLL_MS = 1500;
+
 const AnswerSubmission = () => {
   const getAuthHeaders = () => {
     const token = localStorage.getItem('token');
     return token ? { Authorization: `Bearer ${token}` } : {};
   };
 
+  // Queue a background job, then poll it until it succeeds (returning its result) or fails
+  const runJob = async (path, body, headers = {}) => {
+    const { data } = await axios.post(`${API}/jobs/${path}`, body, {
+      headers: { ...headers, ...getAuthHeaders() },
+      withCredentials: true
+    });
+
+    for (;;) {
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+      const { data: job } = await axios.get(`${API}/jobs/${data.job_id}`, {
+        headers: getAuthHeaders(),
+        withCredentials: true
+      });
+      if (job.status === 'succeeded') return job.result;
+      if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+    }
+  };
+
   const [syllabi, setSyllabi] = useState([]);
   const [selectedSyllabus, setSelectedSyllabus] = useState(null);
   const [classes, setClasses] = useState([]);
@@ -33,8 +53,7 @@ const AnswerSubmission = () => {
   const [imageFile, setImageFile] = useState(null);
   const [imagePreview, setImagePreview] = useState(null);
   const [ocrText, setOcrText] = useState('');
-  const [imageBase64, setImageBase64] = useState('');
-  const [allPages, setAllPages] = useState([]); // Store all pages for multi-page PDFs
+  const [uploadToken, setUploadToken] = useState(''); // References the page images staged by OCR
   const [loading, setLoading] = useState(false);
   const [ocrLoading, setOcrLoading] = useState(false);
   const [result, setResult] = useState(null);
@@ -48,6 +67,7 @@ const AnswerSubmission = () => {
   const fetchSyllabi = async () => {
     try {
       const response = await axios.get(`${API}/syllabus`, {
+        params: { fields: 'subject,topic' },
         headers: getAuthHeaders(),
         withCredentials: true
       });
@@ -94,7 +114,7 @@ const AnswerSubmission = () => {
     setStudentsLoading(true);
     try {
       const response = await axios.get(`${API}/students/`, {
-        params: { class_id: classId, section_id: sectionId },
+        params: { class_id: classId, section_id: sectionId, fields: 'name,roll_number' },
         headers: getAuthHeaders(),
         withCredentials: true
       });
@@ -194,19 +214,12 @@ const AnswerSubmission = () => {
       const formDataOCR = new FormData();
       formDataOCR.append('file', imageFile);
 
-      const response = await axios.post(`${API}/answer/ocr`, formDataOCR, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-          ...getAuthHeaders()
-        },
-        withCredentials: true
-      });
+      const ocr = await runJob('ocr', formDataOCR, { 'Content-Type': 'multipart/form-data' });
 
-      setOcrText(response.data.ocr_text);
-      setImageBase64(response.data.image_base64);
-      setAllPages(response.data.all_pages || []);
+      setOcrText(ocr.ocr_text);
+      setUploadToken(ocr.upload_token);
     } catch (err) {
-      setError(err.response?.data?.detail || 'OCR failed');
+      setError(err.response?.data?.detail || err.message || 'OCR failed');
     } finally {
       setOcrLoading(false);
     }
@@ -229,7 +242,7 @@ const AnswerSubmission = () => {
     setResult(null);
 
     try {
-      const response = await axios.post(`${API}/answer/evaluate`, {
+      const evaluations = await runJob('evaluate', {
         student_id: formData.student_id || null,
         class_id: formData.class_id || null,
         class_name: formData.class_name || null,
@@ -239,17 +252,13 @@ const AnswerSubmission = () => {
         subject: formData.subject,
         topic: formData.topic || null,
         ocr_text: ocrText,
-        image_base64: imageBase64,
-        all_pages: allPages,
+        upload_token: uploadToken,
         exam_date: formData.exam_date,
-      }, {
-        headers: getAuthHeaders(),
-        withCredentials: true
       });
 
-      setResult(response.data);
+      setResult(evaluations);
     } catch (err) {
-      setError(err.response?.data?.detail || 'Evaluation failed');
+      setError(err.response?.data?.detail || err.message || 'Evaluation failed');
     } finally {
       setLoading(false);
     }
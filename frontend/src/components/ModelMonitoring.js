@@ -11,6 +11,13 @@ import {
   FileCheck, Users, Target
 } from 'lucide-react';
 
+// Share of a bucket's reviews marked correct: green when most are, red when most aren't
+const accuracyColor = (accuracy) => {
+  if (accuracy >= 80) return '#10b981';
+  if (accuracy >= 50) return '#f59e0b';
+  return '#ef4444';
+};
+
 const ModelMonitoring = () => {
   const getAuthHeaders = () => {
     const token = localStorage.getItem('token');
@@ -28,6 +35,8 @@ const ModelMonitoring = () => {
     setLoading(true);
     try {
       const response = await axios.get(`${API}/model/performance`, {
+        // Finest unit the server can fit in max_points; it coarsens long ranges itself
+        params: { bucket: 'hour', max_points: 200 },
         headers: getAuthHeaders(),
         withCredentials: true
       });
@@ -74,6 +83,11 @@ const ModelMonitoring = () => {
     : 0;
 
   const avgError = performanceData?.avg_error || 0;
+  const bucket = performanceData?.bucket || 'day';
+  const formatBucket = (timestamp) => {
+    const date = new Date(timestamp);
+    return ['minute', 'hour'].includes(bucket) ? date.toLocaleString() : date.toLocaleDateString();
+  };
 
   const stats = [
     {
@@ -95,7 +109,7 @@ const ModelMonitoring = () => {
       color: 'bg-orange-500',
     },
     {
-      label: 'Total Iterations',
+      label: 'Total Evaluations',
       value: performanceData?.total_evaluations || (performanceData?.performance_data?.length || 0),
       icon: Activity,
       color: 'bg-indigo-500',
@@ -138,9 +152,13 @@ const ModelMonitoring = () => {
             <ResponsiveContainer width="100%" height="100%">
               <LineChart data={performanceData.running_accuracy}>
                 <CartesianGrid strokeDasharray="3 3" vertical={false} stroke="#f3f4f6" />
-                <XAxis dataKey="index" hide />
+                <XAxis dataKey="timestamp" tickFormatter={formatBucket} hide />
                 <YAxis domain={[0, 100]} axisLine={false} tickLine={false} tick={{ fill: '#6b7280', fontSize: 12 }} />
-                <Tooltip contentStyle={{ borderRadius: '8px', border: '1px solid #e5e7eb' }} />
+                <Tooltip
+                  contentStyle={{ borderRadius: '8px', border: '1px solid #e5e7eb' }}
+                  labelFormatter={formatBucket}
+                  formatter={(value) => `${Number(value).toFixed(1)}%`}
+                />
                 <Line
                   type="monotone"
                   dataKey="accuracy"
@@ -157,20 +175,23 @@ const ModelMonitoring = () => {
 
         <div className="bg-white rounded-xl shadow-lg p-6">
           <div className="flex items-center justify-between mb-10">
-            <h2 className="text-xl font-bold text-gray-800">Prediction Alignment</h2>
+            <div>
+              <h2 className="text-xl font-bold text-gray-800">Prediction Alignment</h2>
+              <p className="text-xs text-gray-400 mt-1">Mean scores per {bucket}; bubble size is the number of reviews</p>
+            </div>
             <Zap size={24} className="text-blue-500" />
           </div>
           <div className="h-[350px]">
             <ResponsiveContainer width="100%" height="100%">
               <ScatterChart margin={{ top: 20, right: 20, bottom: 20, left: 20 }}>
                 <CartesianGrid strokeDasharray="3 3" stroke="#f3f4f6" />
-                <XAxis type="number" dataKey="predicted_score" name="Predicted" unit="%" domain={[0, 100]} axisLine={false} tickLine={false} />
-                <YAxis type="number" dataKey="actual_score" name="Actual" unit="%" domain={[0, 100]} axisLine={false} tickLine={false} />
-                <ZAxis type="number" range={[100, 400]} />
+                <XAxis type="number" dataKey="predicted_score" name="Mean predicted" unit="%" domain={[0, 100]} axisLine={false} tickLine={false} />
+                <YAxis type="number" dataKey="actual_score" name="Mean actual" unit="%" domain={[0, 100]} axisLine={false} tickLine={false} />
+                <ZAxis type="number" dataKey="count" name="Reviews" range={[60, 600]} />
                 <Tooltip cursor={{ strokeDasharray: '3 3' }} />
                 <Scatter data={performanceData.performance_data} fill="#6366f1">
                   {performanceData.performance_data.map((entry, index) => (
-                    <Cell key={`cell-${index}`} fill={entry.is_correct ? '#10b981' : '#ef4444'} fillOpacity={0.6} />
+                    <Cell key={`cell-${index}`} fill={accuracyColor(entry.accuracy)} fillOpacity={0.6} />
                   ))}
                 </Scatter>
               </ScatterChart>
@@ -181,17 +202,18 @@ const ModelMonitoring = () => {
 
       <div className="bg-white rounded-xl shadow-lg overflow-hidden">
         <div className="p-6 border-b border-gray-100 bg-gray-50/50">
-          <h2 className="text-xl font-bold text-gray-800">Validation Log</h2>
+          <h2 className="text-xl font-bold text-gray-800">Recent Periods</h2>
+          <p className="text-xs text-gray-400 mt-1">One row per {bucket}, averaged over its reviews</p>
         </div>
         <div className="overflow-x-auto text-sm">
           <table className="w-full text-left">
             <thead>
               <tr className="bg-gray-50">
-                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">Entry Point</th>
-                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">AI Score</th>
-                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">Faculty Score</th>
-                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">Error Δ</th>
-                <th className="px-6 py-4 text-right text-xs font-bold text-gray-400 uppercase tracking-wider italic">Status</th>
+                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">Period</th>
+                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">Mean AI Score</th>
+                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">Mean Faculty Score</th>
+                <th className="px-6 py-4 text-xs font-bold text-gray-400 uppercase tracking-wider italic">Mean Error Δ</th>
+                <th className="px-6 py-4 text-right text-xs font-bold text-gray-400 uppercase tracking-wider italic">Accuracy</th>
               </tr>
             </thead>
             <tbody className="divide-y divide-gray-100">
@@ -199,10 +221,8 @@ const ModelMonitoring = () => {
                 <tr key={idx} className="hover:bg-gray-50 transition-colors group">
                   <td className="px-6 py-4">
                     <div className="flex items-center gap-3">
-                      <div className="w-8 h-8 rounded-lg bg-gray-100 flex items-center justify-center font-bold text-gray-500">
-                        {item.index}
-                      </div>
-                      <span className="text-gray-400">{new Date(item.timestamp).toLocaleDateString()}</span>
+                      <span className="text-gray-700">{formatBucket(item.timestamp)}</span>
+                      <span className="text-gray-400">{item.count} {item.count === 1 ? 'review' : 'reviews'}</span>
                     </div>
                   </td>
                   <td className="px-6 py-4 font-bold text-gray-800">{item.predicted_score.toFixed(1)}%</td>
@@ -213,8 +233,8 @@ const ModelMonitoring = () => {
                     </span>
                   </td>
                   <td className="px-6 py-4 text-right">
-                    <span className={`px-3 py-1 rounded-full text-[10px] font-bold uppercase tracking-wider ${item.is_correct ? 'bg-green-600 text-white' : 'bg-orange-500 text-white'}`}>
-                      {item.is_correct ? 'Verified' : 'Review'}
+                    <span className="px-3 py-1 rounded-full text-[10px] font-bold uppercase tracking-wider text-white" style={{ backgroundColor: accuracyColor(item.accuracy) }}>
+                      {item.correct}/{item.count} ({item.accuracy.toFixed(0)}%)
                     </span>
                   </td>
                 </tr>
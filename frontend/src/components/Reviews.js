@@ -25,21 +25,49 @@ const Reviews = () => {
   const [filterClass, setFilterClass] = useState('All');
   const [filterStatus, setFilterStatus] = useState('All'); // All, Pending, Reviewed
 
+  // Keyset pagination: cursor for the next page (null when everything is loaded)
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Filter options seen so far (kept when a filter narrows the loaded rows)
+  const [subjectOptions, setSubjectOptions] = useState([]);
+  const [classOptions, setClassOptions] = useState({}); // class_id -> class_name
+  // Totals over every evaluation matching the filters, not just the loaded pages
+  const [stats, setStats] = useState({ total: 0, pending: 0, reviewed: 0, avg_score: null });
+
   useEffect(() => {
     fetchEvaluations();
-  }, []);
+  }, [filterSubject, filterClass, filterStatus]);
 
-  const fetchEvaluations = async () => {
+  const fetchEvaluations = async (cursor = null) => {
+    if (cursor) setLoadingMore(true);
     try {
-      const response = await axios.get(`${API}/evaluations`, {
-        headers: getAuthHeaders(),
-        withCredentials: true
+      const filters = {};
+      if (filterSubject !== 'All') filters.subject = filterSubject;
+      if (filterClass !== 'All') filters.class_id = filterClass;
+      if (filterStatus !== 'All') filters.reviewed = filterStatus === 'Reviewed';
+      const params = { ...filters, limit: 50 };
+      if (cursor) params.cursor = cursor;
+
+      const requestOptions = { headers: getAuthHeaders(), withCredentials: true };
+      const [response, statsResponse] = await Promise.all([
+        axios.get(`${API}/evaluations`, { params, ...requestOptions }),
+        cursor ? null : axios.get(`${API}/evaluations/stats`, { params: filters, ...requestOptions })
+      ]);
+      if (statsResponse) setStats(statsResponse.data);
+      const page = response.data;
+      setEvaluations(prev => (cursor ? [...prev, ...page] : page));
+      setNextCursor(response.headers['x-next-cursor'] || null);
+      setSubjectOptions(prev => [...new Set([...prev, ...page.map(e => e.subject).filter(Boolean)])]);
+      setClassOptions(prev => {
+        const next = { ...prev };
+        page.forEach(e => { if (e.class_id && e.class_name) next[e.class_id] = e.class_name; });
+        return next;
       });
-      setEvaluations(response.data);
     } catch (error) {
       console.error('Error fetching evaluations:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -108,27 +136,14 @@ const Reviews = () => {
     }
   };
 
-  const filteredEvaluations = evaluations.filter(ev => {
-    const matchesSearch = ev.student_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      (ev.question && ev.question.toLowerCase().includes(searchTerm.toLowerCase()));
-    const matchesSubject = filterSubject === 'All' || ev.subject === filterSubject;
-    const matchesClass = filterClass === 'All' || (ev.class_name && ev.class_name === filterClass);
-    const matchesStatus = filterStatus === 'All' ||
-      (filterStatus === 'Reviewed' && ev.feedback) ||
-      (filterStatus === 'Pending' && !ev.feedback);
-
-    return matchesSearch && matchesSubject && matchesClass && matchesStatus;
-  });
-
-  const subjects = ['All', ...new Set(evaluations.map(e => e.subject).filter(Boolean))];
-  const classes = ['All', ...new Set(evaluations.map(e => e.class_name).filter(Boolean))];
-
-  const stats = {
-    total: evaluations.length,
-    pending: evaluations.filter(e => !e.feedback).length,
-    reviewed: evaluations.filter(e => e.feedback).length,
-    avgScore: evaluations.length > 0 ? (evaluations.reduce((acc, e) => acc + e.score, 0) / evaluations.length).toFixed(1) : 0
-  };
+  // Subject, class and status are filtered server-side; search applies to the loaded rows
+  const filteredEvaluations = evaluations.filter(ev =>
+    ev.student_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
+    (ev.question && ev.question.toLowerCase().includes(searchTerm.toLowerCase()))
+  );
+
+  const subjects = ['All', ...subjectOptions];
+  const classes = ['All', ...Object.keys(classOptions)];
 
   if (loading) {
     return (
@@ -155,7 +170,7 @@ const Reviews = () => {
             { label: 'Total', value: stats.total, icon: BarChart3, color: 'blue' },
             { label: 'Pending', value: stats.pending, icon: AlertCircle, color: 'amber' },
             { label: 'Reviewed', value: stats.reviewed, icon: CheckCircle, color: 'green' },
-            { label: 'Avg AI Score', value: stats.avgScore, icon: Star, color: 'indigo' }
+            { label: 'Avg AI Score', value: stats.avg_score ?? '-', icon: Star, color: 'indigo' }
           ].map((stat, i) => (
             <div key={i} className={`bg-white p-4 rounded-2xl border border-gray-100 shadow-sm flex items-center gap-3 min-w-[140px]`}>
               <div className={`w-10 h-10 rounded-xl bg-${stat.color}-50 flex items-center justify-center text-${stat.color}-600`}>
@@ -202,7 +217,7 @@ const Reviews = () => {
               onChange={(e) => setFilterClass(e.target.value)}
               className="bg-transparent border-none text-[10px] font-black uppercase tracking-widest text-gray-700 focus:ring-0 cursor-pointer"
             >
-              {classes.map(c => <option key={c} value={c}>{c === 'All' ? 'Class: All' : c}</option>)}
+              {classes.map(c => <option key={c} value={c}>{c === 'All' ? 'Class: All' : classOptions[c]}</option>)}
             </select>
           </div>
 
@@ -361,6 +376,19 @@ const Reviews = () => {
         </div>
       )}
 
+      {nextCursor && (
+        <div className="flex justify-center mt-10">
+          <button
+            onClick={() => fetchEvaluations(nextCursor)}
+            disabled={loadingMore}
+            data-testid="load-more-button"
+            className="px-8 py-3 bg-white border border-gray-200 rounded-2xl text-[10px] font-black uppercase tracking-widest text-blue-600 shadow-sm hover:bg-blue-50 transition-all disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load More'}
+          </button>
+        </div>
+      )}
+
       {feedbackModal && (
         <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50 p-4" data-testid="feedback-modal">
           <div className="bg-white rounded-xl p-8 max-w-2xl w-full mx-4 max-h-screen overflow-y-auto">
@@ -4,9 +4,11 @@ import { API } from '../App';
 import {
     Database, Table, ChevronLeft, ChevronRight, Eye, X,
     RefreshCw, Layers, Hash, FileText, Code, Zap, Lock,
-    Search, Trash2, Calendar, HardDrive, Cpu
+    Search, Trash2, Calendar, HardDrive, Cpu, ArrowUp, ArrowDown
 } from 'lucide-react';
 
+const PAGE_SIZE = 12;
+
 const DatabaseExplorer = () => {
     const getAuthHeaders = () => {
         const token = localStorage.getItem('token');
@@ -20,7 +22,11 @@ const DatabaseExplorer = () => {
     const [dbName, setDbName] = useState('');
     const [selectedCollection, setSelectedCollection] = useState(null);
     const [collectionData, setCollectionData] = useState(null);
-    const [currentPage, setCurrentPage] = useState(1);
+    const [pageIndex, setPageIndex] = useState(0);
+    const [pageCursors, setPageCursors] = useState([null]); // Cursor of each page visited so far
+    const [sortField, setSortField] = useState('_id');
+    const [sortOrder, setSortOrder] = useState('desc');
+    const [filterText, setFilterText] = useState('');
     const [loading, setLoading] = useState(false);
     const [detailDoc, setDetailDoc] = useState(null);
     const [showDetail, setShowDetail] = useState(false);
@@ -62,16 +68,23 @@ const DatabaseExplorer = () => {
         }
     };
 
-    const selectCollection = async (name, page = 1) => {
+    const selectCollection = async (name, index = 0, cursors = [null], view = { sort: sortField, order: sortOrder, filter: filterText }) => {
         setLoading(true);
         setSelectedCollection(name);
-        setCurrentPage(page);
+        setPageIndex(index);
         try {
-            const response = await axios.get(`${API}/database/collection/${name}?page=${page}&limit=12`, {
+            const params = new URLSearchParams({ limit: PAGE_SIZE, sort: view.sort, order: view.order });
+            if (cursors[index]) params.append('cursor', cursors[index]);
+            // Comma-separated filters, e.g. "subject=Math, score>=50, student_name~ann"
+            view.filter.split(',').map(f => f.trim()).filter(Boolean).forEach(f => params.append('filter', f));
+            const response = await axios.get(`${API}/database/collection/${name}?${params}`, {
                 headers: getAuthHeaders(),
                 withCredentials: true
             });
             setCollectionData(response.data);
+            const visited = cursors.slice(0, index + 1);
+            if (response.data.next_cursor) visited.push(response.data.next_cursor);
+            setPageCursors(visited);
             setError('');
         } catch (err) {
             setError(`Error reading collection: ${name}`);
@@ -81,6 +94,20 @@ const DatabaseExplorer = () => {
         }
     };
 
+    const openCollection = (name) => {
+        setSortField('_id');
+        setSortOrder('desc');
+        setFilterText('');
+        selectCollection(name, 0, [null], { sort: '_id', order: 'desc', filter: '' });
+    };
+
+    const applyView = (view) => {
+        const next = { sort: sortField, order: sortOrder, filter: filterText, ...view };
+        setSortField(next.sort);
+        setSortOrder(next.order);
+        selectCollection(selectedCollection, 0, [null], next);
+    };
+
     const viewDocument = async (doc) => {
         const docId = doc._id || doc.id || doc.evaluation_id || doc.student_id;
         if (selectedCollection && docId) {
@@ -112,7 +139,7 @@ const DatabaseExplorer = () => {
                 headers: getAuthHeaders(),
                 withCredentials: true
             });
-            selectCollection(selectedCollection, currentPage); // Refresh
+            selectCollection(selectedCollection, pageIndex, pageCursors); // Refresh
         } catch (err) {
             alert('Delete failed');
         }
@@ -214,7 +241,7 @@ const DatabaseExplorer = () => {
                             {collections.map(col => (
                                 <button
                                     key={col.name}
-                                    onClick={() => selectCollection(col.name)}
+                                    onClick={() => openCollection(col.name)}
                                     className={`w-full text-left px-4 py-4 transition-colors flex items-center justify-between group ${selectedCollection === col.name ? 'bg-blue-50' : 'hover:bg-gray-50'
                                         }`}
                                 >
@@ -225,7 +252,7 @@ const DatabaseExplorer = () => {
                                         </span>
                                     </div>
                                     <span className="text-[10px] font-mono bg-gray-100 px-1.5 py-0.5 rounded text-gray-500">
-                                        {col.count}
+                                        {col.count ?? '—'}
                                     </span>
                                 </button>
                             ))}
@@ -250,12 +277,39 @@ const DatabaseExplorer = () => {
                                     </div>
                                     <div>
                                         <h2 className="text-lg font-bold text-gray-900 leading-none">{collectionData.collection}</h2>
-                                        <p className="text-xs text-gray-500 mt-1">{collectionData.total} documents found</p>
+                                        <p className="text-xs text-gray-500 mt-1">
+                                            {collectionData.total != null ? `~${collectionData.total} documents` : 'Filtered view'}
+                                        </p>
                                     </div>
                                 </div>
-                                <div className="flex gap-2">
+                                <div className="flex gap-2 items-center">
+                                    <input
+                                        type="text"
+                                        value={filterText}
+                                        onChange={(e) => setFilterText(e.target.value)}
+                                        onKeyDown={(e) => e.key === 'Enter' && applyView({})}
+                                        placeholder="Filter: subject=Math, score>=50"
+                                        className="w-64 px-3 py-1.5 text-xs font-mono border border-gray-200 rounded bg-white focus:outline-none focus:ring-2 focus:ring-blue-500"
+                                    />
+                                    <select
+                                        value={sortField}
+                                        onChange={(e) => applyView({ sort: e.target.value })}
+                                        className="px-2 py-1.5 text-xs border border-gray-200 rounded bg-white"
+                                    >
+                                        <option value="_id">Inserted</option>
+                                        {[...new Set([...(collectionData.columns || []).map(c => c.name), sortField])]
+                                            .filter(name => name !== '_id')
+                                            .map(name => <option key={name} value={name}>{name}</option>)}
+                                    </select>
                                     <button
-                                        onClick={() => selectCollection(selectedCollection, currentPage)}
+                                        onClick={() => applyView({ order: sortOrder === 'desc' ? 'asc' : 'desc' })}
+                                        className="p-1.5 text-gray-400 hover:text-gray-700 hover:bg-white rounded border border-transparent hover:border-gray-200 transition-all"
+                                        title={sortOrder === 'desc' ? 'Descending' : 'Ascending'}
+                                    >
+                                        {sortOrder === 'desc' ? <ArrowDown size={16} /> : <ArrowUp size={16} />}
+                                    </button>
+                                    <button
+                                        onClick={() => selectCollection(selectedCollection, pageIndex, pageCursors)}
                                         className="p-1.5 text-gray-400 hover:text-gray-700 hover:bg-white rounded border border-transparent hover:border-gray-200 transition-all"
                                     >
                                         <RefreshCw size={16} />
@@ -286,7 +340,7 @@ const DatabaseExplorer = () => {
                                         {collectionData.data.map((doc, idx) => (
                                             <tr key={idx} className="hover:bg-gray-50/50 group">
                                                 <td className="px-6 py-4 text-xs font-mono text-gray-400">
-                                                    {(currentPage - 1) * 12 + idx + 1}
+                                                    {pageIndex * PAGE_SIZE + idx + 1}
                                                 </td>
                                                 {collectionData.columns?.slice(0, 6).map(col => (
                                                     <td key={col.name} className="px-6 py-4 truncate max-w-[180px]">
@@ -318,32 +372,23 @@ const DatabaseExplorer = () => {
                             </div>
 
                             {/* Pagination */}
-                            {collectionData.total_pages > 1 && (
+                            {(pageIndex > 0 || collectionData.next_cursor) && (
                                 <div className="px-6 py-4 border-t border-gray-100 bg-gray-50/30 flex items-center justify-between">
-                                    <p className="text-xs text-gray-500 font-medium">Record {((currentPage - 1) * 12) + 1} to {Math.min(currentPage * 12, collectionData.total)}</p>
+                                    <p className="text-xs text-gray-500 font-medium">Record {pageIndex * PAGE_SIZE + 1} to {pageIndex * PAGE_SIZE + collectionData.data.length}</p>
                                     <div className="flex gap-1">
                                         <button
-                                            onClick={() => selectCollection(selectedCollection, currentPage - 1)}
-                                            disabled={currentPage <= 1}
+                                            onClick={() => selectCollection(selectedCollection, pageIndex - 1, pageCursors)}
+                                            disabled={pageIndex <= 0}
                                             className="p-1.5 border border-gray-200 rounded bg-white disabled:opacity-30 disabled:cursor-not-allowed hover:bg-gray-50"
                                         >
                                             <ChevronLeft size={16} />
                                         </button>
-                                        <div className="flex gap-1 px-2">
-                                            {[...Array(Math.min(collectionData.total_pages, 5))].map((_, i) => (
-                                                <button
-                                                    key={i}
-                                                    onClick={() => selectCollection(selectedCollection, i + 1)}
-                                                    className={`w-8 h-8 rounded text-xs font-bold transition-all ${currentPage === i + 1 ? 'bg-gray-900 text-white shadow-sm' : 'text-gray-500 hover:bg-gray-100'
-                                                        }`}
-                                                >
-                                                    {i + 1}
-                                                </button>
-                                            ))}
-                                        </div>
+                                        <span className="w-8 h-8 flex items-center justify-center rounded text-xs font-bold bg-gray-900 text-white shadow-sm">
+                                            {pageIndex + 1}
+                                        </span>
                                         <button
-                                            onClick={() => selectCollection(selectedCollection, currentPage + 1)}
-                                            disabled={currentPage >= collectionData.total_pages}
+                                            onClick={() => selectCollection(selectedCollection, pageIndex + 1, pageCursors)}
+                                            disabled={!collectionData.next_cursor}
                                             className="p-1.5 border border-gray-200 rounded bg-white disabled:opacity-30 disabled:cursor-not-allowed hover:bg-gray-50"
                                         >
                                             <ChevronRight size={16} />